@@ -1,66 +1,129 @@
+from statistics import pstdev
 from backend.cache_simulator import CacheSimulator, WritePolicy, ReplacementPolicy
-import numpy as np
+from backend.replacement import DuelingPolicy
 
 class AdaptiveCache:
-    def __init__(self, base_config):
-        self.config = base_config
+    """Online adaptation of a running CacheSimulator.
+
+    The replacement policy is chosen continuously by set dueling between
+    `candidates` (see backend.replacement.DuelingPolicy). Every
+    `adaptation_interval` accesses the miss rate of the interval just ended
+    is read from the simulator's counters, the workload is classified from
+    the recent history, and block size / associativity are changed in place
+    with CacheSimulator.reconfigure(), keeping the cache warm. Per access
+    this costs a counter increment; nothing recomputes full statistics.
+    """
+
+    def __init__(self, base_config, candidates=(ReplacementPolicy.LRU, ReplacementPolicy.FIFO),
+                 adaptation_interval=1000, leader_sets=32):
+        self.config = dict(base_config)
+        self.candidates = tuple(candidates)
+        self.leader_sets = leader_sets
         self.miss_rate_history = []
-        self.threshold = 0.1  # 10% miss rate threshold
-        self.adaptation_interval = 1000
+        self.adaptation_interval = adaptation_interval
         self.access_count = 0
-        self.current_policy = ReplacementPolicy.LRU
-        self.best_config = None
-        
+        self.reconfigurations = 0
+        self.simulator = None
+        self._last_accesses = 0
+        self._last_misses = 0
+
+    @property
+    def current_policy(self):
+        """Name of the policy the follower sets currently use."""
+        if self.simulator is None:
+            return None
+        return self.simulator.policy.winner_name
+
+    def attach(self, simulator):
+        """Install set dueling on `simulator` (keeping its resident lines)."""
+        self.simulator = simulator
+        simulator.replacement_policy = DuelingPolicy(
+            simulator.num_sets, simulator.associativity, simulator.rng,
+            candidates=self.candidates, leader_sets=self.leader_sets)
+        self.config.update(cache_size=simulator.cache_size,
+                           block_size=simulator.block_size,
+                           associativity=simulator.associativity)
+        self._last_accesses = simulator.accesses
+        self._last_misses = simulator.misses
+
     def adapt(self, simulator):
-        """Monitor and adapt cache configuration"""
+        """Call after every single access()"""
+        if simulator is not self.simulator:
+            self.attach(simulator)
         self.access_count += 1
-        
+
         if self.access_count % self.adaptation_interval == 0:
-            current_miss_rate = simulator.misses / simulator.accesses
-            
-            # Store miss rate
-            self.miss_rate_history.append(current_miss_rate)
-            
-            # Check if adaptation needed
-            if current_miss_rate > self.threshold:
-                self.adapt_policy(simulator)
-            
-            # Analyze workload pattern
-            if len(self.miss_rate_history) > 5:
-                workload_type = self.classify_workload()
-                self.adapt_config(workload_type)
-    
-    def adapt_policy(self, simulator):
-        """Switch replacement policy based on miss rate"""
-        if self.current_policy == ReplacementPolicy.LRU:
-            simulator.replacement_policy = ReplacementPolicy.FIFO
-            self.current_policy = ReplacementPolicy.FIFO
-        else:
-            simulator.replacement_policy = ReplacementPolicy.LRU
-            self.current_policy = ReplacementPolicy.LRU
-    
+            self._end_interval(simulator)
+
+    def access_batch(self, simulator, addresses, is_write=None):
+        """Simulate a batch with access_batch(), adapting at every interval boundary."""
+        if simulator is not self.simulator:
+            self.attach(simulator)
+        start = 0
+        while start < len(addresses):
+            room = self.adaptation_interval - self.access_count % self.adaptation_interval
+            end = start + room
+            simulator.access_batch(addresses[start:end],
+                                   None if is_write is None else is_write[start:end])
+            self.access_count += len(addresses[start:end])
+            if self.access_count % self.adaptation_interval == 0:
+                self._end_interval(simulator)
+            start = end
+
+    def _end_interval(self, simulator):
+        if simulator.accesses < self._last_accesses:
+            # Statistics were reset mid-interval (e.g. after a warm-up): count
+            # only what happened since
+            self._last_accesses = self._last_misses = 0
+        accesses = simulator.accesses - self._last_accesses
+        misses = simulator.misses - self._last_misses
+        self._last_accesses = simulator.accesses
+        self._last_misses = simulator.misses
+        if not accesses:
+            return
+
+        # Store miss rate of this interval
+        self.miss_rate_history.append(misses / accesses)
+
+        # Analyze workload pattern
+        if len(self.miss_rate_history) > 5:
+            workload_type = self.classify_workload()
+            self.adapt_config(workload_type)
+
     def classify_workload(self):
         """Classify workload based on miss rate pattern"""
         recent_rates = self.miss_rate_history[-5:]
-        
+
         if all(r < 0.05 for r in recent_rates):
             return "sequential"
         elif any(r > 0.2 for r in recent_rates):
-            if np.std(recent_rates) > 0.1:
+            if pstdev(recent_rates) > 0.1:
                 return "random"
             else:
                 return "conflict"
         else:
             return "mixed"
-    
+
     def adapt_config(self, workload_type):
-        """Adapt configuration based on workload type"""
+        """Adapt configuration based on workload type and apply it in place"""
+        block_size = self.config['block_size']
+        associativity = self.config['associativity']
         if workload_type == "sequential":
             # Increase block size for sequential access
-            self.config['block_size'] = min(128, self.config['block_size'] * 2)
+            block_size = min(128, block_size * 2)
         elif workload_type == "random":
             # Decrease block size for random access
-            self.config['block_size'] = max(16, self.config['block_size'] // 2)
+            block_size = max(16, block_size // 2)
         elif workload_type == "conflict":
             # Increase associativity for conflict misses
-            self.config['associativity'] = min(8, self.config['associativity'] * 2)
\ No newline at end of file
+            associativity = min(8, associativity * 2)
+
+        if (block_size, associativity) == (self.config['block_size'], self.config['associativity']):
+            return
+        if self.config['cache_size'] // (block_size * associativity) < 1:
+            return
+        self.config['block_size'] = block_size
+        self.config['associativity'] = associativity
+        if self.simulator is not None:
+            self.simulator.reconfigure(block_size=block_size, associativity=associativity)
+            self.reconfigurations += 1
@@ -1,115 +1,65 @@
+import argparse
 import os
-import random
-import matplotlib.pyplot as plt
-import pandas as pd
-from backend.cache_simulator import CacheSimulator, WritePolicy, ReplacementPolicy
-from backend.benchmark_programs import *
+from backend.cache_simulator import ReplacementPolicy
+from backend.reporting import plot_results, results_table
+from backend.reuse_distance import lru_sweep
+from backend.sampling import add_sampling_arguments, sampling_from_args
+from backend.sweep import expand_grid, run_sweep
+from backend.trace_cache import cached_trace
 
 # make sure results directory exists
 os.makedirs('results', exist_ok=True)
 
-def run_comparison():
-    results = []
-    
+def run_comparison(sampling=None):
+    """Simulate the configuration grid on the matrix multiplication trace.
+
+    `sampling` (see backend.sampling) trades exact results for estimates
+    with confidence intervals.
+    """
     # Test different configurations
     associativity_values = [1, 2, 4, 8]  # 1 = direct-mapped
     block_sizes = [16, 32, 64, 128]
-    policies = [ReplacementPolicy.LRU, ReplacementPolicy.FIFO, ReplacementPolicy.RANDOM]
+    policies = [ReplacementPolicy.LRU, ReplacementPolicy.FIFO, ReplacementPolicy.RANDOM,
+                ReplacementPolicy.OPT]
     
     # Run matrix multiplication benchmark
-    addresses = matrix_multiplication(32)
-    
-    for assoc in associativity_values:
-        for block_size in block_sizes:
-            for policy in policies:
-                # Create simulator
-                sim = CacheSimulator(
-                    cache_size=16384,
-                    block_size=block_size,
-                    associativity=assoc,
-                    replacement_policy=policy
-                )
-                
-                # Run simulation
-                for addr in addresses[:5000]:  # Limit for speed
-                    sim.access(addr)
-                
-                # Get statistics
-                stats = sim.get_stats()
-                stats['Associativity'] = assoc
-                stats['Block Size'] = block_size
-                stats['Policy'] = policy.name
-                results.append(stats)
+    addresses = cached_trace('matrix_multiplication', n=32).addresses
     
-    return pd.DataFrame(results)
+    configs = expand_grid(cache_size=[16384],
+                          associativity=associativity_values,
+                          block_size=block_sizes,
+                          replacement_policy=policies)
+    if sampling is not None:
+        for config in configs:
+            config['sampling'] = sampling
+    return run_sweep(configs, addresses)
 
-def plot_results(df):
-    fig, axes = plt.subplots(2, 2, figsize=(12, 10))
-    
-    # Plot 1: Hit Rate vs Associativity
-    for assoc in df['Associativity'].unique():
-        data = df[df['Associativity'] == assoc]
-        axes[0, 0].plot(data['Block Size'], data['Hit Rate'], 
-                        marker='o', label=f'{assoc}-way')
-    axes[0, 0].set_xlabel('Block Size (bytes)')
-    axes[0, 0].set_ylabel('Hit Rate')
-    axes[0, 0].set_title('Hit Rate vs Cache Configuration')
-    axes[0, 0].legend()
-    axes[0, 0].grid(True)
-    
-    # Plot 2: AMAT Comparison
-    for policy in df['Policy'].unique():
-        data = df[df['Policy'] == policy]
-        axes[0, 1].plot(data['Associativity'], data['AMAT'], 
-                        marker='s', label=policy)
-    axes[0, 1].set_xlabel('Associativity')
-    axes[0, 1].set_ylabel('AMAT (cycles)')
-    axes[0, 1].set_title('AMAT for Different Policies')
-    axes[0, 1].legend()
-    axes[0, 1].grid(True)
-    
-    # Plot 3: Miss Classification
-    workloads = ['Sequential', 'Random', 'Strided']
-    miss_rates = []
-    for workload in [sequential_access(5000), random_access(5000), 
-                     strided_access(5000)]:
-        sim = CacheSimulator()
-        for addr in workload:
-            sim.access(addr)
-        miss_rates.append(sim.get_stats()['Miss Rate'])
-    
-    axes[1, 0].bar(workloads, miss_rates)
-    axes[1, 0].set_ylabel('Miss Rate')
-    axes[1, 0].set_title('Miss Rate for Different Workloads')
-    axes[1, 0].grid(True)
-    
-    # Plot 4: Memory Traffic
-    write_policies = ['Write-Through', 'Write-Back']
-    traffic = []
-    for policy in [WritePolicy.WRITE_THROUGH, WritePolicy.WRITE_BACK]:
-        sim = CacheSimulator(write_policy=policy)
-        for addr in matrix_multiplication(16):
-            sim.access(addr, is_write=(random.random() > 0.5))
-        traffic.append(sim.get_stats()['Memory Traffic'])
-    
-    axes[1, 1].bar(write_policies, traffic)
-    axes[1, 1].set_ylabel('Memory Traffic (blocks)')
-    axes[1, 1].set_title('Memory Traffic Comparison')
-    axes[1, 1].grid(True)
-    
-    plt.tight_layout()
-    plt.savefig('results/cache_analysis.png', dpi=300)
-    plt.show()
+def run_capacity_sweep(block_size=32):
+    """LRU hit rates over a wide cache size x associativity grid.
+
+    Points that share a set count are read off one stack-distance profile,
+    so this costs a handful of trace passes instead of one simulation per
+    point.
+    """
+    addresses = cached_trace('matrix_multiplication', n=32).addresses
+    cache_sizes = [1024 << i for i in range(10)]  # 1 KB .. 512 KB
+    return results_table(lru_sweep(addresses, cache_sizes, [block_size],
+                                  [1, 2, 4, 8, 16]))
 
 # Main execution
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cache configuration comparison")
+    add_sampling_arguments(parser)
+    args = parser.parse_args()
+    
     print("Running cache simulations...")
     
     # Run comparisons
-    results_df = run_comparison()
+    results_df = run_comparison(sampling_from_args(args))
     
     # Save results
     results_df.to_csv('results/simulation_results.csv', index=False)
+    run_capacity_sweep().to_csv('results/capacity_sweep.csv', index=False)
     
     # Generate plots
     plot_results(results_df)
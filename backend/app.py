@@ -1,10 +1,11 @@
 import sys
 import os
 import json
+import numpy as np
 
 # guard imports so missing packages give a useful message
 try:
-    from flask import Flask, request, jsonify, send_from_directory
+    from flask import Flask, Response, request, jsonify, send_from_directory
     from flask_cors import CORS
 except ImportError as imp_err:
     print("ERROR: unable to import Flask or flask_cors.\n" +
@@ -20,7 +21,13 @@ sys.path.append(os.path.abspath(os.path.join(base_dir, '..')))  # parent directo
 
 # Import your cache simulator modules (located in project root)
 from backend.cache_simulator import CacheSimulator, WritePolicy, ReplacementPolicy
+from backend.hierarchy import CacheHierarchy, Inclusion
 from backend.benchmark_programs import *
+from backend.jobs import FINISHED, JobManager, QueueFull
+from backend.result_cache import ResultCache, config_key
+from backend.sweep import expand_grid
+from backend.trace_cache import cached_trace, default_cache
+from backend.trace_io import open_trace
 from adaptive_policy import AdaptiveCache
 
 # Serve frontend files from the frontend directory
@@ -28,6 +35,34 @@ frontend_dir = os.path.abspath(os.path.join(base_dir, '..', 'frontend'))
 app = Flask(__name__, static_folder=frontend_dir, static_url_path='')
 CORS(app)  # Enable CORS for all routes
 
+# Timeline resolution: about TIMELINE_POINTS windows for generated
+# benchmarks, fixed-size windows for streamed traces of unknown length
+TIMELINE_POINTS = 20
+DEFAULT_TIMELINE_WINDOW = 10000
+
+# Accesses simulated between progress reports
+PROGRESS_CHUNK = 1 << 16
+
+# Default per-level hit times (cycles) for multi-level `levels` configs,
+# the last one is reused for deeper levels
+LEVEL_HIT_TIMES = (1, 10, 30)
+
+# Address region width of hot-spot profiles; the built-in benchmarks touch
+# only a few KiB, so regions are two 32-byte blocks wide
+PROFILE_REGION_SIZE = 64
+
+# Seed for randomized benchmarks and RANDOM replacement when a request
+# gives none, so identical requests give identical (cacheable) results
+DEFAULT_SEED = 0
+
+# Memoized results of /api/simulate and jobs, optionally persisted on disk
+result_cache = ResultCache(max_entries=int(os.environ.get('RESULT_CACHE_SIZE', 256)),
+                           directory=os.environ.get('RESULT_CACHE_DIR'))
+
+# Captured traces that /api/simulate may replay via the `tracePath` option
+TRACE_DIR = os.path.realpath(os.environ.get(
+    'TRACE_DIR', os.path.join(base_dir, '..', 'results', 'traces')))
+
 # Serve frontend
 @app.route('/')
 def serve_frontend():
@@ -44,84 +79,434 @@ def simulate():
         config = request.json
         print("Received config:", config)  # Debug print
         
-        # Run simulation based on config
-        results = run_cache_simulation(config)
+        # Run simulation based on config, or reuse an identical earlier run
+        key = config_key(normalize_config(config))
+        results = result_cache.get_or_compute(key, lambda: run_cache_simulation(config))
         
-        return jsonify(results)
+        return jsonify(dict(results, config=config))
     
     except Exception as e:
         print("Error:", str(e))  # Debug print
         return jsonify({'error': str(e)}), 500
 
-def run_cache_simulation(config):
-    """Run cache simulation with given configuration"""
+# Batch comparison of many configs, grouped by the workload they run on
+WORKLOAD_KEYS = ('benchmark', 'matrixSize', 'seed', 'tracePath', 'warmup')
+BATCH_MAX_CONFIGS = int(os.environ.get('BATCH_MAX_CONFIGS', 64))
+
+def expand_batch(body):
+    """Request configs of a batch: `configs`, or `base` merged with every
+    point of `grid`, each with the shared `workload` keys applied on top.
+    """
+    workload = {key: value for key, value in (body.get('workload') or {}).items()
+                if key in WORKLOAD_KEYS}
+    if body.get('grid'):
+        configs = [dict(body.get('base') or {}, **point) for point in expand_grid(**body['grid'])]
+    else:
+        configs = list(body.get('configs') or [])
+    if not configs:
+        raise ValueError("a batch needs a list of 'configs' or a 'grid'")
+    if len(configs) > BATCH_MAX_CONFIGS:
+        raise ValueError(f"a batch may hold at most {BATCH_MAX_CONFIGS} configs")
+    return [dict(config, **workload) for config in configs]
+
+def workload_identity(settings):
+    """The normalized settings that decide which trace a config runs on"""
+    return tuple(settings.get(key) for key in WORKLOAD_KEYS + ('traceStamp',))
+
+def run_batch(configs):
+    """Yield the events of a batch: cached results straight away, then one
+    lockstep pass per distinct workload, each over a single decode of its
+    trace, for every other config.
+    """
+    groups = {}  # Workload identity -> {result cache key: (settings, config, request indices)}
+    for index, config in enumerate(configs):
+        try:
+            settings = normalize_config(config)
+        except Exception as e:
+            yield {'index': index, 'error': str(e)}
+            continue
+        key = config_key(settings)
+        results = result_cache.get(key)
+        if results is not None:
+            yield {'index': index, 'result': dict(results, config=config)}
+            continue
+        pending = groups.setdefault(workload_identity(settings), {})
+        if key in pending:
+            pending[key][2].append(index)
+        else:
+            pending[key] = (settings, config, [index])
+    
+    for group, pending in enumerate(groups.values()):
+        # Every config of a group shares the workload keys, so any of them can load it
+        first = next(iter(pending.values()))[0]
+        workload, trace = load_workload(first)
+        runs = {}
+        try:
+            total = workload_length(workload)
+            for key, (settings, config, indices) in pending.items():
+                try:
+                    runs[key] = build_simulator(settings, workload)
+                except Exception as e:
+                    for index in indices:
+                        yield {'index': index, 'error': str(e)}
+            for done in step_simulators(list(runs.values()), workload, first.get('warmup', 0)):
+                yield {'progress': {'workload': group, 'done': done, 'total': total}}
+        finally:
+            if trace is not None:
+                trace.close()
+        
+        for key, (sim, adaptive) in runs.items():
+            settings, config, indices = pending[key]
+            results = build_results(sim, adaptive, settings, config)
+            result_cache.put(key, results)
+            for index in indices:
+                yield {'index': index, 'result': dict(results, config=configs[index])}
+
+@app.route('/api/batch', methods=['POST'])
+def simulate_batch():
+    """Simulate many configs on one workload, streamed back as NDJSON.
+
+    The body is {"workload": {...}, "configs": [...]} or {"workload": {...},
+    "base": {...}, "grid": {"associativity": [1, 2, 4, 8], ...}}. Each line
+    is {"index", "result"} or {"index", "error"} for one config, or
+    {"progress": {"workload", "done", "total"}} while the pass over each
+    distinct workload runs (configs may set their own workload keys).
+    """
+    try:
+        configs = expand_batch(request.json or {})
+    except (ValueError, TypeError, AttributeError) as e:
+        return jsonify({'error': str(e)}), 400
+    
+    def stream():
+        try:
+            for event in run_batch(configs):
+                yield json.dumps(event) + '\n'
+        except Exception as e:
+            yield json.dumps({'error': str(e)}) + '\n'
+    
+    return Response(stream(), mimetype='application/x-ndjson',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/profile', methods=['POST'])
+def profile_hotspots():
+    """Per-set and per-address-region hot spots of one configuration"""
+    try:
+        config = dict(request.json or {}, profile=True)
+        settings = normalize_config(config)
+        if 'levels' in settings:
+            raise ValueError("profiling applies to a single cache, not a hierarchy")
+        results = result_cache.get_or_compute(config_key(settings),
+                                              lambda: run_cache_simulation(config))
+        return jsonify({'profile': results['profile'], 'hitRate': results['hitRate'],
+                        'missRate': results['missRate'], 'config': config})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# Asynchronous simulation jobs
+def run_job(config, job):
+    key = config_key(normalize_config(config))
+    results = result_cache.get(key)
+    if results is None:
+        results = run_cache_simulation(config, progress=job.report)
+        result_cache.put(key, results)
+    return dict(results, config=config)
+
+jobs = JobManager(run_job,
+                  max_workers=int(os.environ.get('SIM_WORKERS', 2)),
+                  max_queued=int(os.environ.get('SIM_MAX_QUEUED', 8)))
+
+@app.route('/api/jobs', methods=['POST'])
+def submit_job():
+    try:
+        job = jobs.submit(request.json or {})
+    except QueueFull as e:
+        return jsonify({'error': f"Simulation queue is full ({e}), try again later"}), 429
+    return jsonify({'jobId': job.id, 'status': job.status}), 202
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/api/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    job = jobs.cancel(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    return jsonify({'jobId': job.id, 'status': job.status})
+
+@app.route('/api/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """Server-Sent Events stream of a job's progress until it finishes"""
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    
+    def stream():
+        version = None
+        while True:
+            new_version = job.wait(version, timeout=15)
+            if new_version == version:
+                yield ": keep-alive\n\n"
+                continue
+            version = new_version
+            state = job.to_dict()
+            event = state['status'] if state['status'] in FINISHED else 'progress'
+            yield f"event: {event}\ndata: {json.dumps(state)}\n\n"
+            if state['status'] in FINISHED:
+                return
+    
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/cache', methods=['GET'])
+def cache_info():
+    return jsonify(dict(result_cache.info(), traces=default_cache().info()))
+
+@app.route('/api/cache', methods=['DELETE'])
+def clear_cache():
+    result_cache.clear()
+    return jsonify(result_cache.info())
+
+def resolve_trace_path(name):
+    """Map a client-supplied trace name to a file inside TRACE_DIR."""
+    path = os.path.realpath(os.path.join(TRACE_DIR, name))
+    if os.path.commonpath([path, TRACE_DIR]) != TRACE_DIR or not os.path.isfile(path):
+        raise ValueError(f"Unknown trace file: {name}")
+    return path
+
+def resolve_policy(name):
+    """Built-in ReplacementPolicy member, or the name of a registered policy"""
+    if name in ReplacementPolicy.__members__:
+        return ReplacementPolicy[name]
+    return name
+
+def normalize_config(config):
+    """Parse a request config into the settings that determine its result.
+
+    Equal normalized configs always produce equal results, so they are
+    used as result cache keys. A replayed trace is identified by its path,
+    size and modification time.
+    """
+    settings = {
+        'cacheSize': int(config.get('cacheSize', 16384)),
+        'blockSize': int(config.get('blockSize', 32)),
+        'associativity': int(config.get('associativity', 2)),
+        'writePolicy': 'WRITE_BACK' if config.get('writePolicy') == 'WRITE_BACK' else 'WRITE_THROUGH',
+        'replacementPolicy': config.get('replacementPolicy', 'LRU'),
+        'enableAdaptive': bool(config.get('enableAdaptive', False)),
+        'timelineWindow': int(config.get('timelineWindow', 0)),
+        'seed': int(config.get('seed', DEFAULT_SEED))
+    }
+    
+    if config.get('levels'):
+        settings['levels'] = [{
+            'cacheSize': int(level.get('cacheSize', 16384)),
+            'blockSize': int(level.get('blockSize', 32)),
+            'associativity': int(level.get('associativity', 2)),
+            'writePolicy': 'WRITE_THROUGH' if level.get('writePolicy') == 'WRITE_THROUGH' else 'WRITE_BACK',
+            'replacementPolicy': level.get('replacementPolicy', 'LRU'),
+            'hitTime': int(level.get('hitTime', LEVEL_HIT_TIMES[min(k, len(LEVEL_HIT_TIMES) - 1)]))
+        } for k, level in enumerate(config['levels'])]
+        settings['inclusion'] = Inclusion[config.get('inclusion', 'NON_INCLUSIVE')].name
+        settings['memoryLatency'] = int(config.get('memoryLatency', 100))
+    
+    sampling = config.get('sampling')
+    if sampling:
+        if 'levels' in settings or settings['enableAdaptive']:
+            raise ValueError("sampling only applies to a single, non-adaptive cache")
+        settings['sampling'] = {
+            'setFraction': float(sampling.get('setFraction', 1.0)),
+            'period': int(sampling.get('period', 0)),
+            'window': int(sampling.get('window', 1000)),
+            'warmup': int(sampling.get('warmup', 1000))
+        }
     
-    # Extract configuration
-    cache_size = int(config.get('cacheSize', 16384))
-    block_size = int(config.get('blockSize', 32))
-    associativity = int(config.get('associativity', 2))
-    write_policy = WritePolicy.WRITE_BACK if config.get('writePolicy') == 'WRITE_BACK' else WritePolicy.WRITE_THROUGH
-    replacement_policy = {
-        'LRU': ReplacementPolicy.LRU,
-        'FIFO': ReplacementPolicy.FIFO,
-        'RANDOM': ReplacementPolicy.RANDOM
-    }.get(config.get('replacementPolicy', 'LRU'))
+    # Accesses that only warm the cache up; statistics start after them
+    warmup = int(config.get('warmup', 0))
+    if warmup > 0:
+        settings['warmup'] = warmup
+    
+    # Per-set / per-region hot-spot counters (single caches only)
+    if config.get('profile') and 'levels' not in settings:
+        settings['profile'] = True
+    
+    if config.get('tracePath'):
+        path = resolve_trace_path(config['tracePath'])
+        info = os.stat(path)
+        settings['tracePath'] = path
+        settings['traceStamp'] = [info.st_size, info.st_mtime_ns]
+        return settings
     
     benchmark = config.get('benchmark', 'matrix_multiplication')
-    enable_adaptive = config.get('enableAdaptive', False)
-    
-    # Create simulator
-    sim = CacheSimulator(
-        cache_size=cache_size,
-        block_size=block_size,
-        associativity=associativity,
-        write_policy=write_policy,
-        replacement_policy=replacement_policy
-    )
-    
-    # Get benchmark addresses
     if benchmark == 'matrix_multiplication':
-        matrix_size = int(config.get('matrixSize', 32))
-        addresses = matrix_multiplication(matrix_size)
+        settings['matrixSize'] = int(config.get('matrixSize', 32))
+    elif benchmark not in ('sequential', 'random', 'strided', 'linked_list'):
+        benchmark = 'matrix_multiplication'
+        settings['matrixSize'] = 32
+    settings['benchmark'] = benchmark
+    return settings
+
+def load_workload(settings):
+    """Return the (addresses, is_write) chunks to simulate for normalized
+    settings, and the pinned trace they view (None for a streamed trace).
+
+    A `tracePath` streams a captured trace from TRACE_DIR; otherwise the
+    named benchmark comes from the shared trace cache with 33% writes, as
+    read-only views that every server worker shares. Close the trace once
+    the simulation is done so the cache may evict it.
+    """
+    if 'tracePath' in settings:
+        return open_trace(settings['tracePath']), None
+    
+    benchmark = settings['benchmark']
+    seed = settings['seed']
+    
+    # Get benchmark addresses from the trace cache
+    if benchmark == 'matrix_multiplication':
+        trace = cached_trace('matrix_multiplication', n=settings['matrixSize'], write_every=3)
     elif benchmark == 'sequential':
-        addresses = sequential_access(5000)
+        trace = cached_trace('sequential_access', n=5000, write_every=3)
     elif benchmark == 'random':
-        addresses = random_access(5000)
+        trace = cached_trace('random_access', seed=seed, n=5000, write_every=3)
     elif benchmark == 'strided':
-        addresses = strided_access(5000, stride=64)
-    elif benchmark == 'linked_list':
-        addresses = linked_list_traversal(1000)
+        trace = cached_trace('strided_access', n=5000, stride=64, write_every=3)
     else:
-        addresses = matrix_multiplication(32)
+        trace = cached_trace('linked_list_traversal', seed=seed, n=1000, write_every=3)
     
-    # Run simulation
-    for i, addr in enumerate(addresses[:5000]):  # Limit for speed
-        is_write = (i % 3 == 0)  # 33% writes
-        sim.access(addr, is_write)
-        
-        # Apply adaptive policy if enabled
-        if enable_adaptive and i % 100 == 0:
-            # Simple adaptive logic
-            if sim.get_stats()['Miss Rate'] > 0.1:
-                # Increase associativity if miss rate too high
-                if associativity < 8:
-                    associativity *= 2
-                    sim = CacheSimulator(
-                        cache_size=cache_size,
-                        block_size=block_size,
-                        associativity=associativity,
-                        write_policy=write_policy,
-                        replacement_policy=replacement_policy
-                    )
+    return [(trace.addresses, trace.is_write)], trace
+
+def workload_length(workload):
+    """Total accesses of a loaded workload, None for a streamed trace"""
+    if isinstance(workload, list):
+        return sum(len(addresses) for addresses, _ in workload)
+    return None
+
+def build_simulator(settings, workload):
+    """Create the simulator and adaptive controller (or None) for normalized
+    settings; `workload` sets the timeline resolution and prepares OPT.
+    """
+    cache_size = settings['cacheSize']
+    block_size = settings['blockSize']
+    associativity = settings['associativity']
+    write_policy = WritePolicy[settings['writePolicy']]
+    replacement_policy = resolve_policy(settings['replacementPolicy'])
+    seed = settings['seed']
+    
+    enable_adaptive = settings['enableAdaptive']
     
+    # Aim for TIMELINE_POINTS windows when the trace length is known up front
+    timeline_window = settings['timelineWindow']
+    if not timeline_window:
+        total = workload_length(workload)
+        if total is not None:
+            total = max(1, total - settings.get('warmup', 0))  # Only measured accesses are charted
+            timeline_window = max(1, -(-total // TIMELINE_POINTS))
+        else:
+            timeline_window = DEFAULT_TIMELINE_WINDOW
+    
+    # Create simulator: a single cache, or a hierarchy when `levels` is given
+    if 'levels' in settings:
+        sim = build_hierarchy(settings, timeline_window)
+        enable_adaptive = False  # Adaptive resizing only applies to a single level
+    else:
+        sim = CacheSimulator(
+            cache_size=cache_size,
+            block_size=block_size,
+            associativity=associativity,
+            write_policy=write_policy,
+            replacement_policy=replacement_policy,
+            seed=seed,
+            timeline_window=timeline_window,
+            classify_misses=True,
+            sampling=build_sampling(settings),
+            profile={'region_size': PROFILE_REGION_SIZE} if settings.get('profile') else False
+        )
+    
+    # Adaptive mode: set dueling between the chosen policy and LRU/FIFO,
+    # plus in-place block size / associativity changes
+    adaptive = None
+    if enable_adaptive:
+        candidates = [ReplacementPolicy.LRU, ReplacementPolicy.FIFO]
+        if not sim.policy.offline and sim.policy_name not in ('LRU', 'FIFO'):
+            candidates.insert(0, replacement_policy)
+        adaptive = AdaptiveCache({'cache_size': cache_size, 'block_size': block_size,
+                                  'associativity': associativity}, candidates=candidates)
+        adaptive.attach(sim)
+    
+    # Offline policies (OPT) see the whole trace before simulating it
+    if 'levels' not in settings and sim.policy.offline:
+        if not isinstance(workload, list):
+            raise ValueError(f"{sim.policy_name} needs a generated benchmark, not a streamed trace")
+        sim.prepare(np.concatenate([addresses for addresses, _ in workload]))
+    
+    return sim, adaptive
+
+def step_simulators(runs, workload, warmup=0):
+    """Feed the workload to every (sim, adaptive) run, one chunk at a time.
+
+    Each chunk is converted once and simulated by every run while it is
+    still hot in the CPU cache. Statistics are reset after the first
+    `warmup` accesses. Yields the accesses done after each chunk.
+    """
+    done = 0
+    for addresses, is_write in workload:
+        start = 0
+        while start < len(addresses):
+            end = start + PROGRESS_CHUNK
+            if done < warmup:  # End a chunk exactly at the warm-up boundary
+                end = min(end, start + warmup - done)
+            chunk = np.asarray(addresses[start:end], dtype=np.int64)
+            writes = None
+            if is_write is not None:
+                writes = np.asarray(is_write[start:end], dtype=bool)
+            for sim, adaptive in runs:
+                if adaptive is not None:
+                    adaptive.access_batch(sim, chunk, writes)
+                else:
+                    sim.access_batch(chunk, writes)
+            done += len(chunk)
+            start += len(chunk)
+            if done == warmup:
+                for sim, _ in runs:
+                    sim.reset_stats()
+            yield done
+
+def run_cache_simulation(config, progress=None):
+    """Run cache simulation with given configuration
+
+    `progress(sim, done, total)` is called every PROGRESS_CHUNK accesses;
+    `total` is None for streamed traces of unknown length.
+    """
+    settings = normalize_config(config)
+    workload, trace = load_workload(settings)
+    try:
+        total = workload_length(workload)
+        sim, adaptive = build_simulator(settings, workload)
+        for done in step_simulators([(sim, adaptive)], workload, settings.get('warmup', 0)):
+            if progress is not None:
+                progress(sim, done, total)
+    finally:
+        if trace is not None:
+            trace.close()
+    return build_results(sim, adaptive, settings, config)
+
+def build_results(sim, adaptive, settings, config):
+    """Response payload of a finished simulation"""
     # Get statistics
     stats = sim.get_stats()
     
     # Generate timeline data for charts
-    timeline_data = generate_timeline_data()
+    timeline_data = build_timeline_data(sim)
     
-    # Generate miss classification
-    miss_data = generate_miss_data()
+    # Compulsory / capacity / conflict breakdown
+    miss_data = {
+        'compulsory': stats['Compulsory Misses'],
+        'capacity': stats['Capacity Misses'],
+        'conflict': stats['Conflict Misses']
+    }
     
     # Prepare results
     results = {
@@ -140,27 +525,81 @@ def run_cache_simulation(config):
         'config': config
     }
     
+    if adaptive is not None:
+        results['adaptive'] = {
+            'policy': adaptive.current_policy,
+            'blockSize': sim.block_size,
+            'associativity': sim.associativity,
+            'reconfigurations': adaptive.reconfigurations
+        }
+    
+    if 'sampling' in settings:
+        results['sampling'] = {
+            'sampledAccesses': stats['Sampled Accesses'],
+            'confidence': stats['Confidence'],
+            'missRateCI': stats['Miss Rate CI'],
+            'amatCI': stats['AMAT CI'],
+            'trafficCI': stats['Memory Traffic CI']
+        }
+    
+    if settings.get('profile'):
+        results['profile'] = sim.get_profile()
+    
+    if 'Levels' in stats:
+        results['inclusion'] = stats['Inclusion']
+        results['levels'] = [{
+            'level': level['Level'],
+            'accesses': level['Accesses'],
+            'hitRate': f"{level['Hit Rate']:.1%}",
+            'missRate': f"{level['Miss Rate']:.1%}",
+            'amat': f"{level['AMAT']:.2f} cycles",
+            'requests': level['Requests'],
+            'writebacks': level['Write-backs']
+        } for level in stats['Levels']]
+    
     return results
 
-def generate_timeline_data():
-    """Generate sample timeline data for charts"""
-    data = []
-    for i in range(20):
-        data.append({
-            'time': i * 100,
-            'hitRate': 90 + (i % 5) * 2,
-            'missRate': 10 - (i % 5)
-        })
-    return data
-
-def generate_miss_data():
-    """Generate miss classification data"""
-    import random
-    return {
-        'compulsory': random.randint(80, 150),
-        'capacity': random.randint(200, 350),
-        'conflict': random.randint(150, 250)
-    }
+def build_hierarchy(settings, timeline_window):
+    """CacheHierarchy for the normalized `levels` settings"""
+    levels = []
+    for k, level in enumerate(settings['levels']):
+        levels.append(CacheSimulator(
+            cache_size=level['cacheSize'],
+            block_size=level['blockSize'],
+            associativity=level['associativity'],
+            write_policy=WritePolicy[level['writePolicy']],
+            replacement_policy=resolve_policy(level['replacementPolicy']),
+            hit_time=level['hitTime'],
+            seed=settings['seed'] + k,
+            # Timeline and 3C breakdown describe the L1 access stream
+            timeline_window=timeline_window if k == 0 else None,
+            classify_misses=k == 0
+        ))
+    return CacheHierarchy(levels, inclusion=Inclusion[settings['inclusion']],
+                          memory_latency=settings['memoryLatency'])
+
+def build_sampling(settings):
+    """CacheSimulator `sampling` keyword for normalized settings, or None"""
+    sampling = settings.get('sampling')
+    if sampling is None:
+        return None
+    plan = {'set_fraction': sampling['setFraction'], 'seed': settings['seed']}
+    if sampling['period']:
+        plan.update(period=sampling['period'], window=sampling['window'],
+                    warmup=sampling['warmup'])
+    return plan
+
+def build_timeline_data(sim):
+    """Measured per-window hit/miss rates (percent) for the charts"""
+    return [{
+        'time': window['start'],
+        'hitRate': window['hit_rate'] * 100,
+        'missRate': window['miss_rate'] * 100,
+        'hits': window['hits'],
+        'misses': window['misses'],
+        'writebacks': window['writebacks'],
+        'traffic': window['traffic']
+    } for window in sim.get_timeline()]
 
 if __name__ == '__main__':
     port = int(os.environ.get("PORT", 10000))
@@ -1,38 +1,245 @@
-import random
+"""Synthetic memory-access workloads.
 
-def matrix_multiplication(n=64):
+Every generator returns a NumPy int64 address array built with index
+arithmetic and broadcasting. With `with_writes=True` it returns
+(addresses, is_write) instead, where the mask marks the stores of the
+modelled program (read-only patterns get an all-False mask). With
+`chunk_size` it returns an iterator of (addresses, is_write) chunks of at
+most that many accesses, so traces larger than memory can be streamed into
+CacheSimulator.run_trace(); the chunks concatenate to the same trace.
+
+The original five generators produce element indices; the scalable
+workloads below them produce byte addresses with a configurable element
+size and footprint. Randomized generators take a `seed` and draw from a
+NumPy Generator in fixed-size pieces, so a seed fixes the trace whatever
+the chunk size.
+"""
+import numpy as np
+
+# Accesses generated per step; bounds peak memory of chunked generation
+PIECE = 1 << 20
+
+
+def _finish(pieces, with_writes, chunk_size):
+    """Turn a stream of (addresses, is_write) pieces into a generator's result."""
+    if chunk_size:
+        return _rechunk(pieces, chunk_size)
+    pieces = list(pieces)
+    if pieces:
+        addresses = np.concatenate([a for a, _ in pieces])
+        is_write = np.concatenate([w for _, w in pieces])
+    else:
+        addresses = np.zeros(0, dtype=np.int64)
+        is_write = np.zeros(0, dtype=bool)
+    return (addresses, is_write) if with_writes else addresses
+
+
+def _rechunk(pieces, chunk_size):
+    for addresses, is_write in pieces:
+        for start in range(0, len(addresses), chunk_size):
+            yield addresses[start:start + chunk_size], is_write[start:start + chunk_size]
+
+
+def _reads(addresses):
+    return addresses, np.zeros(len(addresses), dtype=bool)
+
+
+def _spans(n):
+    """[start, end) ranges of PIECE accesses covering n."""
+    for start in range(0, n, PIECE):
+        yield start, min(start + PIECE, n)
+
+
+def _cycle(rng, nodes):
+    """Visiting order of a random circular list through every node, from node 0."""
+    return np.concatenate(([0], rng.permutation(np.arange(1, nodes, dtype=np.int64))))
+
+
+def matrix_multiplication(n=64, with_writes=False, chunk_size=None):
     """Matrix multiplication with good spatial locality"""
-    addresses = []
-    # Simulate matrix access pattern
-    for i in range(n):
-        for j in range(n):
-            for k in range(n):
-                addresses.append(i * n + k)  # Read A
-                addresses.append(k * n + j)  # Read B
-                addresses.append(i * n + j)  # Write C
-    return addresses
-
-def random_access(n=10000, max_addr=100000):
-    """Random access pattern"""
-    return [random.randint(0, max_addr) for _ in range(n)]
-
-def sequential_access(n=10000):
+    def pieces():
+        rows = max(1, PIECE // (3 * n * n)) if n else 1
+        j = np.arange(n, dtype=np.int64)[None, :, None]
+        k = np.arange(n, dtype=np.int64)[None, None, :]
+        for first in range(0, n, rows):
+            i = np.arange(first, min(first + rows, n), dtype=np.int64)[:, None, None]
+            out = np.empty((len(i), n, n, 3), dtype=np.int64)
+            out[..., 0] = i * n + k  # Read A
+            out[..., 1] = k * n + j  # Read B
+            out[..., 2] = i * n + j  # Write C
+            yield out.ravel(), np.tile([False, False, True], out.size // 3)
+    return _finish(pieces(), with_writes, chunk_size)
+
+
+def random_access(n=10000, max_addr=100000, seed=None, with_writes=False, chunk_size=None):
+    """Random access pattern (uniform over 0..max_addr inclusive)"""
+    def pieces():
+        rng = np.random.default_rng(seed)
+        for start, end in _spans(n):
+            yield _reads(rng.integers(0, max_addr, end - start, dtype=np.int64, endpoint=True))
+    return _finish(pieces(), with_writes, chunk_size)
+
+
+def sequential_access(n=10000, with_writes=False, chunk_size=None):
     """Sequential access pattern"""
-    return list(range(n))
+    def pieces():
+        for start, end in _spans(n):
+            yield _reads(np.arange(start, end, dtype=np.int64))
+    return _finish(pieces(), with_writes, chunk_size)
+
 
-def strided_access(n=10000, stride=64):
+def strided_access(n=10000, stride=64, with_writes=False, chunk_size=None):
     """Strided access pattern"""
-    return [i * stride % n for i in range(n // stride)]
-
-def linked_list_traversal(n=1000):
-    """Simulate linked list with random pointers"""
-    next_ptr = list(range(1, n))
-    next_ptr.append(0)  # Make it circular
-    random.shuffle(next_ptr)
-    
-    addresses = []
-    current = 0
-    for _ in range(n * 10):  # Multiple traversals
-        addresses.append(current)
-        current = next_ptr[current]
-    return addresses
\ No newline at end of file
+    def pieces():
+        for start, end in _spans(n // stride):
+            yield _reads(np.arange(start, end, dtype=np.int64) * stride % n)
+    return _finish(pieces(), with_writes, chunk_size)
+
+
+def linked_list_traversal(n=1000, seed=None, with_writes=False, chunk_size=None):
+    """Ten traversals of a circular linked list of n nodes in random order"""
+    def pieces():
+        order = _cycle(np.random.default_rng(seed), n)
+        for start, end in _spans(n * 10):
+            yield _reads(order[np.arange(start, end) % n])
+    return _finish(pieces(), with_writes, chunk_size)
+
+
+def tiled_matrix_multiplication(n=256, tile=32, element_size=8, with_writes=False,
+                                chunk_size=None):
+    """Blocked C += A * B: tile loops (ii, jj, kk) around the i, j, k loops.
+
+    A, B and C are row-major n x n arrays placed back to back. Each inner
+    step reads A[i][k] and B[k][j] and writes C[i][j]; `n` must be a
+    multiple of `tile`.
+    """
+    if tile <= 0 or n % tile:
+        raise ValueError("matrix size must be a multiple of the tile size")
+    matrix = n * n
+
+    def pieces():
+        t = np.arange(tile, dtype=np.int64)
+        kk = np.arange(0, n, tile, dtype=np.int64)[:, None, None, None]
+        i = t[None, :, None, None]
+        j = t[None, None, :, None]
+        k = kk + t[None, None, None, :]
+        for ii in range(0, n, tile):
+            for jj in range(0, n, tile):
+                out = np.empty((n // tile, tile, tile, tile, 3), dtype=np.int64)
+                out[..., 0] = (ii + i) * n + k
+                out[..., 1] = matrix + k * n + (jj + j)
+                out[..., 2] = 2 * matrix + (ii + i) * n + (jj + j)
+                yield out.ravel() * element_size, np.tile([False, False, True], out.size // 3)
+    return _finish(pieces(), with_writes, chunk_size)
+
+
+def _stencil(n, dims, iterations, element_size, with_writes, chunk_size):
+    """Jacobi sweeps over an n^dims grid: read the centre and its 2*dims
+    face neighbours, write the centre of the other buffer, then swap."""
+    if n < 3:
+        raise ValueError("stencil grids need at least 3 points per dimension")
+    cells = n ** dims
+    strides = n ** np.arange(dims - 1, -1, -1, dtype=np.int64)
+    offsets = np.concatenate(([0], np.stack([-strides, strides], axis=1).ravel()))
+    # Flat indices of the interior cells inside one outermost plane
+    inner = np.zeros(1, dtype=np.int64)
+    for stride in strides[1:]:
+        inner = (inner[:, None] + np.arange(1, n - 1, dtype=np.int64) * stride).ravel()
+    planes = max(1, PIECE // (len(inner) * len(offsets)))
+    width = len(offsets) + 1
+    mask = np.zeros(width, dtype=bool)
+    mask[-1] = True
+
+    def pieces():
+        for sweep in range(iterations):
+            source = (sweep % 2) * cells
+            target = cells - source
+            for first in range(1, n - 1, planes):
+                outer = np.arange(first, min(first + planes, n - 1), dtype=np.int64) * strides[0]
+                centre = (outer[:, None] + inner).ravel()
+                out = np.empty((len(centre), width), dtype=np.int64)
+                out[:, :-1] = source + centre[:, None] + offsets
+                out[:, -1] = target + centre
+                yield out.ravel() * element_size, np.tile(mask, len(centre))
+    return _finish(pieces(), with_writes, chunk_size)
+
+
+def stencil_2d(n=512, iterations=1, element_size=8, with_writes=False, chunk_size=None):
+    """5-point Jacobi stencil over an n x n grid (two buffers)"""
+    return _stencil(n, 2, iterations, element_size, with_writes, chunk_size)
+
+
+def stencil_3d(n=64, iterations=1, element_size=8, with_writes=False, chunk_size=None):
+    """7-point Jacobi stencil over an n x n x n grid (two buffers)"""
+    return _stencil(n, 3, iterations, element_size, with_writes, chunk_size)
+
+
+def zipf_kv_lookup(n=100000, keys=100000, alpha=0.99, value_size=64, write_fraction=0.0,
+                   seed=None, with_writes=False, chunk_size=None):
+    """Key-value lookups with Zipf(alpha) key popularity.
+
+    Values of `value_size` bytes are stored contiguously (footprint
+    keys * value_size); popularity ranks are shuffled over the keys so hot
+    values are scattered. `write_fraction` of the lookups are updates.
+    Any alpha >= 0 is accepted (0 is uniform).
+    """
+    if keys <= 0:
+        raise ValueError("zipf_kv_lookup needs at least one key")
+
+    def pieces():
+        rng = np.random.default_rng(seed)
+        cdf = np.cumsum(np.arange(1, keys + 1, dtype=np.float64) ** -alpha)
+        cdf /= cdf[-1]
+        key_of_rank = rng.permutation(keys).astype(np.int64)
+        for start, end in _spans(n):
+            ranks = np.minimum(np.searchsorted(cdf, rng.random(end - start), side='right'), keys - 1)
+            addresses = key_of_rank[ranks] * value_size
+            if write_fraction:
+                yield addresses, rng.random(end - start) < write_fraction
+            else:
+                yield _reads(addresses)
+    return _finish(pieces(), with_writes, chunk_size)
+
+
+def hash_probe(n=100000, table_size=1 << 16, load_factor=0.5, entry_size=16,
+               insert_fraction=0.0, seed=None, with_writes=False, chunk_size=None):
+    """Lookups in an open-addressing hash table with linear probing.
+
+    Each of the n lookups hashes to a uniform slot and probes consecutive
+    slots (wrapping around); the probe count is geometric with mean
+    1 / (1 - load_factor), as under uniform hashing. The table occupies
+    table_size * entry_size bytes. `insert_fraction` of the lookups are
+    inserts, which write the last slot they probe.
+    """
+    if not 0 <= load_factor < 1:
+        raise ValueError("load_factor must be in [0, 1)")
+
+    def pieces():
+        rng = np.random.default_rng(seed)
+        for start, end in _spans(n):
+            count = end - start
+            slots = rng.integers(0, table_size, count, dtype=np.int64)
+            probes = np.minimum(rng.geometric(1 - load_factor, count), table_size)
+            ends = np.cumsum(probes)
+            step = np.arange(ends[-1], dtype=np.int64) - np.repeat(ends - probes, probes)
+            addresses = (np.repeat(slots, probes) + step) % table_size * entry_size
+            is_write = np.zeros(len(addresses), dtype=bool)
+            if insert_fraction:
+                is_write[ends[rng.random(count) < insert_fraction] - 1] = True
+            yield addresses, is_write
+    return _finish(pieces(), with_writes, chunk_size)
+
+
+def pointer_chase(steps=100000, footprint=1 << 20, node_size=64, seed=None,
+                  with_writes=False, chunk_size=None):
+    """Dependent loads around a random circular list of footprint // node_size
+    nodes of `node_size` bytes, starting from node 0"""
+    nodes = footprint // node_size
+    if nodes <= 0:
+        raise ValueError("footprint must hold at least one node")
+
+    def pieces():
+        order = _cycle(np.random.default_rng(seed), nodes) * node_size
+        for start, end in _spans(steps):
+            yield _reads(order[np.arange(start, end) % nodes])
+    return _finish(pieces(), with_writes, chunk_size)
@@ -1,75 +1,140 @@
+"""Core cache simulation engine.
+
+Importing this module (and the rest of the core: cache_state, replacement,
+miss_classification, adaptive_policy) only loads the standard library, so
+scalar access() simulation needs no third-party packages. NumPy is
+imported on first use by the array APIs (access_batch, prepare) and by the
+optional timeline, sampling and profiling layers.
+"""
+import os
+import pickle
 import random
-import matplotlib.pyplot as plt
-import numpy as np
+import zlib
 from enum import Enum
-import pandas as pd
+from backend.cache_state import CacheState
+from backend.replacement import Policy, make_policy
 
 class WritePolicy(Enum):
     WRITE_THROUGH = 1
     WRITE_BACK = 2
 
 class ReplacementPolicy(Enum):
+    """Built-in policies (see backend.replacement); CacheSimulator also
+    accepts the name of any policy registered there."""
     LRU = 1
     FIFO = 2
     RANDOM = 3
+    PLRU = 4
+    LFU = 5
+    SRRIP = 6
+    BRRIP = 7
+    ARC = 8
+    OPT = 9  # Offline: call prepare() with the whole trace first
 
-class CacheLine:
-    def __init__(self, block_size):
-        self.valid = False
-        self.tag = None
-        self.data = [0] * block_size
-        self.last_access = 0
-        self.load_time = 0
-
-class CacheSet:
-    def __init__(self, associativity, block_size, replacement_policy):
-        self.lines = [CacheLine(block_size) for _ in range(associativity)]
-        self.replacement_policy = replacement_policy
-        self.access_counter = 0
-        self.fifo_queue = list(range(associativity))  # For FIFO
-        
-    def find_line(self, tag):
-        for i, line in enumerate(self.lines):
-            if line.valid and line.tag == tag:
-                if self.replacement_policy == ReplacementPolicy.LRU:
-                    line.last_access = self.access_counter
-                return i, line
-        return None, None
-    
-    def get_evict_candidate(self):
-        if self.replacement_policy == ReplacementPolicy.RANDOM:
-            return random.randint(0, len(self.lines) - 1)
-        elif self.replacement_policy == ReplacementPolicy.FIFO:
-            candidate = self.fifo_queue[0]
-            self.fifo_queue = self.fifo_queue[1:] + [candidate]
-            return candidate
-        else:  # LRU
-            lru_index = 0
-            lru_time = self.lines[0].last_access
-            for i, line in enumerate(self.lines):
-                if line.last_access < lru_time:
-                    lru_time = line.last_access
-                    lru_index = i
-            return lru_index
+# Outcomes reported by CacheSimulator._lookup
+HIT = 0
+MISS = 1
+MISS_EVICT = 2
+
+# Bump when the simulator's attributes change so old snapshots are refused
+SNAPSHOT_VERSION = 3
+
+def dump_snapshot(obj):
+    """Serialize a simulator (or hierarchy) and everything it references
+    into a compressed blob."""
+    return zlib.compress(pickle.dumps((SNAPSHOT_VERSION, type(obj).__name__, obj),
+                                      protocol=pickle.HIGHEST_PROTOCOL), 1)
+
+def load_snapshot(blob, cls):
+    """Rebuild an object of type `cls` from dump_snapshot().
+
+    Snapshots are pickles: only load blobs this program created.
+    """
+    version, name, obj = pickle.loads(zlib.decompress(blob))
+    if version != SNAPSHOT_VERSION:
+        raise ValueError(f"snapshot version {version} is not supported (expected {SNAPSHOT_VERSION})")
+    if not isinstance(obj, cls):
+        raise ValueError(f"snapshot holds a {name}, not a {cls.__name__}")
+    return obj
+
+def run_starts(blocks):
+    """Indices where a new run of consecutive equal blocks begins."""
+    import numpy as np
+    
+    if len(blocks) == 0:
+        return np.zeros(0, dtype=np.int64)
+    return np.flatnonzero(np.concatenate(([True], blocks[1:] != blocks[:-1])))
+
+def encode_runs(addresses, block_size, is_write=None):
+    """Collapse runs of consecutive accesses to the same block.
+
+    Returns (blocks, counts, write_counts) arrays with one record per run,
+    for CacheSimulator.access_runs(). Sequential and strided traces shrink
+    by up to the block size divided by the stride.
+    """
+    import numpy as np
+    
+    blocks = np.asarray(addresses, dtype=np.int64) // block_size
+    starts = run_starts(blocks)
+    counts = np.diff(np.append(starts, len(blocks)))
+    if is_write is None or len(starts) == 0:
+        write_counts = np.zeros(len(starts), dtype=np.int64)
+    else:
+        write_counts = np.add.reduceat(np.asarray(is_write, dtype=np.int64), starts)
+    return blocks[starts], counts, write_counts
+
+def summarize_stats(accesses, hits, misses, cycles, memory_traffic,
+                    hit_time, miss_penalty, amat=None):
+    """Build the get_stats() dictionary from raw counters.
+
+    `amat` overrides the flat hit_time + miss_rate * miss_penalty model,
+    e.g. with the composite AMAT of a multi-level hierarchy.
+    """
+    hit_rate = hits / accesses if accesses > 0 else 0
+    miss_rate = misses / accesses if accesses > 0 else 0
+    if amat is None:
+        amat = hit_time + miss_rate * miss_penalty
+    
+    # compute Cache Efficiency Score (CES)
+    # use hit rate as percentage to mirror the examples: CES = HitRate% / (AMAT * MemoryTraffic)
+    if amat > 0 and memory_traffic > 0:
+        ces = (hit_rate * 100) / (amat * memory_traffic)
+    else:
+        ces = 0
+    
+    return {
+        'Accesses': accesses,
+        'Hits': hits,
+        'Misses': misses,
+        'Hit Rate': hit_rate,
+        'Miss Rate': miss_rate,
+        'AMAT': amat,
+        'Cycles': cycles,
+        'Memory Traffic': memory_traffic,
+        'CES': ces
+    }
 
 class CacheSimulator:
     def __init__(self, cache_size=16384, block_size=32, associativity=2,
                  write_policy=WritePolicy.WRITE_BACK,
                  replacement_policy=ReplacementPolicy.LRU,
-                 hit_time=1, miss_penalty=10):
+                 hit_time=1, miss_penalty=10, seed=None,
+                 timeline_window=None, timeline_capacity=1024,
+                 classify_misses=False, sampling=None, profile=False):
         
         self.cache_size = cache_size
         self.block_size = block_size
         self.associativity = associativity
         self.write_policy = write_policy
-        self.replacement_policy = replacement_policy
         self.hit_time = hit_time
         self.miss_penalty = miss_penalty
+        self.seed = seed
+        self.rng = random.Random(seed)  # For RANDOM replacement
         
         # Calculate number of sets
         self.num_sets = cache_size // (block_size * associativity)
-        self.sets = [CacheSet(associativity, block_size, replacement_policy) 
-                    for _ in range(self.num_sets)]
+        self.state = CacheState(self.num_sets, associativity)
+        self.replacement_policy = replacement_policy
         
         # Statistics
         self.accesses = 0
@@ -79,6 +144,40 @@ class CacheSimulator:
         self.write_accesses = 0
         self.memory_traffic = 0
         self.cycles = 0
+        self.writebacks = 0
+        
+        # When set to a list, _lookup appends (block, dirty) for every
+        # evicted line (used by backend.hierarchy to pass victims down)
+        self.victims = None
+        
+        # Optional per-window instrumentation (see backend.instrumentation)
+        self.timeline = None
+        if timeline_window:
+            from backend.instrumentation import TimelineRecorder
+            self.timeline = TimelineRecorder(timeline_window, timeline_capacity)
+        
+        # Optional set / time sampling (see backend.sampling): only part of
+        # the trace is simulated and get_stats() returns estimates
+        self.sampler = None
+        if sampling is not None:
+            from backend.sampling import Sampler
+            self.sampler = Sampler(**sampling) if isinstance(sampling, dict) else sampling
+            self.sampler.bind(self)
+        
+        # Optional 3C miss classification (see backend.miss_classification);
+        # under set sampling the shadow cache matches the sampled sets
+        self.classifier = None
+        if classify_misses:
+            from backend.miss_classification import MissClassifier
+            sets = self.num_sets if self.sampler is None else self.sampler.sampled_sets
+            self.classifier = MissClassifier(sets * associativity)
+        
+        # Optional per-set / per-region hot-spot counters (see backend.profiler)
+        self.profiler = None
+        if profile:
+            from backend.profiler import SetProfiler
+            self.profiler = SetProfiler(self.num_sets, block_size,
+                                        **(profile if isinstance(profile, dict) else {}))
         
     def get_set_index(self, address):
         return (address // self.block_size) % self.num_sets
@@ -86,23 +185,242 @@ class CacheSimulator:
     def get_tag(self, address):
         return address // (self.block_size * self.num_sets)
     
+    @property
+    def replacement_policy(self):
+        return self._replacement_policy
+    
+    @replacement_policy.setter
+    def replacement_policy(self, policy):
+        """Switch policies; the new one is warmed with the resident lines."""
+        self.policy = make_policy(policy, self.num_sets, self.associativity, self.rng)
+        self._replacement_policy = self.policy if isinstance(policy, Policy) else policy
+        self.policy.warm(self.state.resident)
+        self._on_hit = self.policy.on_hit if self.policy.tracks_hits else None
+    
+    def prepare(self, addresses):
+        """Show an offline policy (OPT) the whole trace before simulating it.
+
+        The addresses passed to access()/access_batch() afterwards must be
+        exactly this sequence. A no-op for online policies.
+        """
+        if self.policy.offline:
+            import numpy as np
+            
+            addresses = np.asarray(addresses, dtype=np.int64)
+            if self.sampler is not None:  # Only the sampled accesses reach the policy
+                addresses = self.sampler.select(self, addresses)
+            self.policy.prepare(addresses // self.block_size)
+    
+    @property
+    def policy_name(self):
+        return self.policy.name
+    
+    def reset(self):
+        """Empty the cache, zero all statistics and re-seed the RNG."""
+        self.state.reset()
+        self.policy.reset()
+        self.rng.seed(self.seed)
+        self.accesses = 0
+        self.hits = 0
+        self.misses = 0
+        self.read_accesses = 0
+        self.write_accesses = 0
+        self.memory_traffic = 0
+        self.cycles = 0
+        self.writebacks = 0
+        if self.timeline is not None:
+            self.timeline.reset()
+        if self.classifier is not None:
+            self.classifier.reset()
+        if self.sampler is not None:
+            self.sampler.reset()
+        if self.profiler is not None:
+            self.profiler.reset()
+    
+    def reset_stats(self):
+        """Zero the statistics but keep the cache warm, e.g. after a warm-up
+        prefix. Contents, replacement state, the 3C history and the RNG
+        carry on; the timeline and sampled measurements start over while the
+        sampling phase continues."""
+        self.accesses = 0
+        self.hits = 0
+        self.misses = 0
+        self.read_accesses = 0
+        self.write_accesses = 0
+        self.memory_traffic = 0
+        self.cycles = 0
+        self.writebacks = 0
+        if self.timeline is not None:
+            self.timeline.reset()
+        if self.classifier is not None:
+            self.classifier.reset_counts()
+        if self.sampler is not None:
+            self.sampler.reset_stats()
+        if self.profiler is not None:
+            self.profiler.reset()
+    
+    def snapshot(self):
+        """The complete simulator state as a compact bytes blob: contents,
+        replacement metadata, counters, RNG state and the optional layers."""
+        return dump_snapshot(self)
+    
+    @classmethod
+    def restore(cls, blob):
+        """A new simulator from snapshot(); it continues exactly where the
+        snapshotted one was."""
+        return load_snapshot(blob, cls)
+    
+    def fork(self, write_policy=None, replacement_policy=None):
+        """An independent copy of this simulator in its current state.
+
+        Optionally switch the copy's write policy, or its replacement
+        policy (warmed with the resident lines), for what-if continuations.
+        """
+        sim = pickle.loads(pickle.dumps(self, protocol=pickle.HIGHEST_PROTOCOL))
+        if write_policy is not None:
+            sim.write_policy = write_policy
+        if replacement_policy is not None:
+            sim.replacement_policy = replacement_policy
+        return sim
+    
+    def reconfigure(self, cache_size=None, block_size=None, associativity=None,
+                    replacement_policy=None):
+        """Change geometry and/or policy mid-run without going cold.
+
+        Statistics keep accumulating. Resident blocks are carried over in
+        fill order (re-split or merged if the block size changes); when a
+        set of the new geometry overflows, its oldest blocks are dropped and
+        count as evictions (write-backs under WRITE_BACK, as in access()).
+        The policy, new or current, is rebuilt for the new geometry and
+        warmed with the surviving lines. Returns the number of lines dropped.
+        """
+        if self.sampler is not None:
+            raise ValueError("a sampled simulator cannot be reconfigured")
+        old_block_size = self.block_size
+        old_state = self.state
+        entries = [(block, old_state.dirty[line])
+                   for block, line in old_state.resident.items()]
+        
+        self.cache_size = cache_size or self.cache_size
+        self.block_size = block_size or self.block_size
+        self.associativity = associativity or self.associativity
+        self.num_sets = self.cache_size // (self.block_size * self.associativity)
+        if self.num_sets < 1:
+            raise ValueError("cache too small for this block size and associativity")
+        
+        # Carried-over blocks in fill order, oldest first
+        carried = {}
+        for block, dirty in entries:
+            first = block * old_block_size // self.block_size
+            last = ((block + 1) * old_block_size - 1) // self.block_size
+            for new_block in range(first, last + 1):
+                carried[new_block] = carried.pop(new_block, 0) | dirty
+        
+        # Each set keeps its newest `associativity` blocks
+        per_set = {}
+        survivors = set()
+        for block in reversed(carried):
+            set_index = block % self.num_sets
+            if per_set.get(set_index, 0) < self.associativity:
+                per_set[set_index] = per_set.get(set_index, 0) + 1
+                survivors.add(block)
+        dropped = len(carried) - len(survivors)
+        
+        state = self.state = CacheState(self.num_sets, self.associativity)
+        next_way = {}
+        for block, dirty in carried.items():
+            if block not in survivors:
+                continue
+            set_index = block % self.num_sets
+            way = next_way.get(set_index, 0)
+            next_way[set_index] = way + 1
+            line = set_index * self.associativity + way
+            state.valid[line] = 1
+            state.dirty[line] = dirty
+            state.tags[line] = block // self.num_sets
+            state.resident[block] = line
+        
+        if self.write_policy == WritePolicy.WRITE_BACK:
+            self.writebacks += dropped
+            self.memory_traffic += dropped
+        
+        self.replacement_policy = replacement_policy or self._replacement_policy
+        if self.classifier is not None:
+            self.classifier.resize(self.num_sets * self.associativity,
+                                   reset_blocks=self.block_size != old_block_size)
+        if self.profiler is not None:
+            self.profiler.resize(self.num_sets, self.block_size)
+        return dropped
+    
+    def _lookup(self, block, set_index, is_write):
+        """Look up one block and load it on a miss.
+
+        Returns HIT, MISS (filled an empty line) or MISS_EVICT (replaced a
+        valid line). Only touches cache state, never the counters.
+        """
+        state = self.state
+        dirty = is_write and self.write_policy == WritePolicy.WRITE_BACK
+        
+        line = state.resident.get(block)
+        if line is not None:
+            if self._on_hit is not None:
+                self._on_hit(set_index, line)
+            if dirty:
+                state.dirty[line] = 1
+            return HIT
+        
+        # Find eviction candidate and load new block
+        policy = self.policy
+        line = policy.victim(set_index, block)
+        if state.valid[line]:
+            outcome = MISS_EVICT
+            victim = state.tags[line] * self.num_sets + set_index
+            del state.resident[victim]
+            if self.victims is not None:
+                self.victims.append((victim, state.dirty[line]))
+        else:
+            outcome = MISS
+            state.valid[line] = 1
+        state.tags[line] = block // self.num_sets
+        state.dirty[line] = dirty
+        state.resident[block] = line
+        policy.on_fill(set_index, line, block)
+        return outcome
+    
+    def invalidate(self, block):
+        """Drop `block` from the cache without touching the counters.
+
+        Returns None if it was not resident, otherwise whether its line was
+        dirty. Policies that fill empty lines first reuse the freed line next.
+        """
+        state = self.state
+        line = state.resident.pop(block, None)
+        if line is None:
+            return None
+        was_dirty = bool(state.dirty[line])
+        state.valid[line] = 0
+        state.dirty[line] = 0
+        self.policy.on_invalidate(block % self.num_sets, line)
+        return was_dirty
+    
     def access(self, address, is_write=False):
+        if self.sampler is not None:
+            import numpy as np
+            
+            self.sampler.access_batch(self, np.array([address], dtype=np.int64),
+                                      np.array([is_write], dtype=bool))
+            return
+        
         self.accesses += 1
         if is_write:
             self.write_accesses += 1
         else:
             self.read_accesses += 1
             
-        set_index = self.get_set_index(address)
-        tag = self.get_tag(address)
-        
-        cache_set = self.sets[set_index]
-        cache_set.access_counter += 1
-        
-        # Check if tag exists in set
-        line_index, line = cache_set.find_line(tag)
+        block = address // self.block_size
+        outcome = self._lookup(block, block % self.num_sets, is_write)
         
-        if line is not None:  # Cache HIT
+        if outcome == HIT:  # Cache HIT
             self.hits += 1
             self.cycles += self.hit_time
             
@@ -113,43 +431,230 @@ class CacheSimulator:
             self.misses += 1
             self.cycles += self.miss_penalty
             
-            # Find eviction candidate
-            evict_index = cache_set.get_evict_candidate()
-            
             # Handle write-back if needed
-            if self.write_policy == WritePolicy.WRITE_BACK and cache_set.lines[evict_index].valid:
+            if self.write_policy == WritePolicy.WRITE_BACK and outcome == MISS_EVICT:
+                self.writebacks += 1
                 self.memory_traffic += 1  # Write back to memory
             
-            # Load new block
-            cache_set.lines[evict_index].valid = True
-            cache_set.lines[evict_index].tag = tag
-            cache_set.lines[evict_index].last_access = cache_set.access_counter
-            cache_set.lines[evict_index].load_time = cache_set.access_counter
             self.memory_traffic += 1  # Read from memory
             
             if is_write and self.write_policy == WritePolicy.WRITE_THROUGH:
                 self.memory_traffic += 1  # Additional write to memory
+        
+        if self.classifier is not None:
+            self.classifier.observe(block, outcome == HIT)
+        if self.profiler is not None:
+            self.profiler.record(address, block % self.num_sets, outcome)
+        if self.timeline is not None:
+            self.timeline.tick(self)
     
-    def get_stats(self):
-        hit_rate = self.hits / self.accesses if self.accesses > 0 else 0
-        miss_rate = self.misses / self.accesses if self.accesses > 0 else 0
-        amat = self.hit_time + miss_rate * self.miss_penalty
-        
-        # compute Cache Efficiency Score (CES)
-        # use hit rate as percentage to mirror the examples: CES = HitRate% / (AMAT * MemoryTraffic)
-        if amat > 0 and self.memory_traffic > 0:
-            ces = (hit_rate * 100) / (amat * self.memory_traffic)
+    def access_batch(self, addresses, is_write=None):
+        """Simulate a whole trace at once.
+
+        `addresses` is any integer array-like and `is_write` an optional
+        boolean mask of the same length. The result is the same as calling
+        access() for every element in order: set/tag decomposition and the
+        counter updates are done on whole arrays, and only the per-set
+        replacement state is walked sequentially.
+        
+        Returns the per-access outcome codes, or None for a sampled
+        simulator, which only simulates part of the batch.
+        """
+        import numpy as np
+        
+        addresses = np.asarray(addresses, dtype=np.int64)
+        if is_write is None:
+            is_write = np.zeros(len(addresses), dtype=bool)
+        else:
+            is_write = np.asarray(is_write, dtype=bool)
+        if is_write.shape != addresses.shape:
+            raise ValueError("is_write mask must match the address array")
+        if self.sampler is not None:
+            return self.sampler.access_batch(self, addresses, is_write)
+        return self._simulate_batch(addresses, is_write)
+    
+    def access_parallel(self, addresses, is_write=None, processes=None, partitions=None):
+        """access_batch() for a whole trace on an empty cache, split by set
+        index across worker processes (see backend.partition)."""
+        from backend.partition import access_partitioned
+        
+        return access_partitioned(self, addresses, is_write, processes, partitions)
+    
+    def _simulate_batch(self, addresses, is_write, positions=None):
+        """access_batch() on validated arrays, bypassing sampling; the
+        timeline labels windows with `positions` (trace positions) if given."""
+        import numpy as np
+        
+        blocks = addresses // self.block_size
+        set_indices = blocks % self.num_sets
+        n = len(blocks)
+        
+        timeline = self.timeline
+        if timeline is not None:
+            before = timeline.counters(self)
+        
+        # Only the first access of a run of accesses to one block can miss;
+        # the rest are hits accounted in bulk (see access_runs). A run costs
+        # about two lookups, so this only pays off for long runs.
+        starts = run_starts(blocks)
+        if len(starts) * 2 <= n:
+            counts = np.diff(np.append(starts, n))
+            run_writes = np.logical_or.reduceat(is_write, starts)
+            run_blocks = blocks[starts]
+            run_outcomes = np.fromiter(
+                map(self._lookup_run, run_blocks.tolist(), set_indices[starts].tolist(),
+                    run_writes.tolist(), counts.tolist()),
+                dtype=np.int8, count=len(starts))
+            outcomes = np.full(n, HIT, dtype=np.int8)
+            outcomes[starts] = run_outcomes
+            if self.classifier is not None:  # Repeats leave the shadow cache as it is
+                self.classifier.observe_batch(run_blocks.tolist(), (run_outcomes == HIT).tolist())
         else:
-            ces = 0
-        
-        return {
-            'Accesses': self.accesses,
-            'Hits': self.hits,
-            'Misses': self.misses,
-            'Hit Rate': hit_rate,
-            'Miss Rate': miss_rate,
-            'AMAT': amat,
-            'Cycles': self.cycles,
-            'Memory Traffic': self.memory_traffic,
-            'CES': ces
-        }
\ No newline at end of file
+            block_list = blocks.tolist()
+            outcomes = np.fromiter(
+                map(self._lookup, block_list, set_indices.tolist(), is_write.tolist()),
+                dtype=np.int8, count=n)
+            if self.classifier is not None:
+                self.classifier.observe_batch(block_list, (outcomes == HIT).tolist())
+        if self.profiler is not None:
+            self.profiler.record_batch(addresses, set_indices, outcomes)
+        
+        self._add_counts(n, int(np.count_nonzero(outcomes == HIT)),
+                         int(np.count_nonzero(is_write)),
+                         int(np.count_nonzero(outcomes == MISS_EVICT)))
+        
+        if timeline is not None:
+            timeline.record_batch(before, outcomes, is_write,
+                                  self.write_policy == WritePolicy.WRITE_BACK, positions)
+        return outcomes
+    
+    def _lookup_run(self, block, set_index, is_write, count):
+        """_lookup() for `count` consecutive accesses to one block, any of
+        them a write; all but the first are hits."""
+        outcome = self._lookup(block, set_index, is_write)
+        if count > 1 and self._on_hit is not None:
+            self.policy.on_hits(set_index, self.state.resident[block], count - 1)
+        return outcome
+    
+    def _add_counts(self, accesses, hits, writes, evictions):
+        """Add a batch's totals to the counters, as access() would one by one."""
+        misses = accesses - hits
+        self.accesses += accesses
+        self.write_accesses += writes
+        self.read_accesses += accesses - writes
+        self.hits += hits
+        self.misses += misses
+        self.cycles += hits * self.hit_time + misses * self.miss_penalty
+        self.memory_traffic += misses  # Read from memory
+        if self.write_policy == WritePolicy.WRITE_THROUGH:
+            self.memory_traffic += writes  # Every write goes to memory
+        else:
+            self.writebacks += evictions
+            self.memory_traffic += evictions
+    
+    def access_runs(self, blocks, counts, write_counts=None):
+        """Simulate a trace pre-encoded with encode_runs() for this block size.
+
+        Each record stands for `counts` consecutive accesses to one block,
+        `write_counts` of them writes; only the first access of a record is
+        looked up, the rest are bulk-accounted hits. Counters, cache and
+        replacement state and the 3C breakdown are the same as replaying
+        the original trace. Since the order of reads and writes inside a
+        record is not kept, the timeline and profile place a record's
+        writes at its start (which only matters for write-through traffic
+        in a window boundary) and regions are counted by block address.
+        
+        Returns the outcome code of every record's first access.
+        """
+        import numpy as np
+        
+        if self.sampler is not None:
+            raise ValueError("sampled simulators take raw traces (access_batch)")
+        blocks = np.asarray(blocks, dtype=np.int64)
+        counts = np.asarray(counts, dtype=np.int64)
+        if write_counts is None:
+            write_counts = np.zeros(len(blocks), dtype=np.int64)
+        write_counts = np.asarray(write_counts, dtype=np.int64)
+        if not blocks.shape == counts.shape == write_counts.shape:
+            raise ValueError("blocks, counts and write_counts must have the same length")
+        set_indices = blocks % self.num_sets
+        
+        timeline = self.timeline
+        if timeline is not None:
+            before = timeline.counters(self)
+        
+        outcomes = np.fromiter(
+            map(self._lookup_run, blocks.tolist(), set_indices.tolist(),
+                (write_counts > 0).tolist(), counts.tolist()),
+            dtype=np.int8, count=len(blocks))
+        if self.classifier is not None:
+            self.classifier.observe_batch(blocks.tolist(), (outcomes == HIT).tolist())
+        
+        n = int(counts.sum())
+        misses = int(np.count_nonzero(outcomes != HIT))
+        self._add_counts(n, n - misses, int(write_counts.sum()),
+                         int(np.count_nonzero(outcomes == MISS_EVICT)))
+        
+        if timeline is not None or self.profiler is not None:
+            # Per-access view: first access of each record, then its repeats
+            starts = np.cumsum(counts) - counts
+            full = np.full(n, HIT, dtype=np.int8)
+            full[starts] = outcomes
+            offsets = np.arange(n) - np.repeat(starts, counts)
+            writes = offsets < np.repeat(write_counts, counts)
+            if self.profiler is not None:
+                self.profiler.record_batch(np.repeat(blocks * self.block_size, counts),
+                                           np.repeat(set_indices, counts), full)
+            if timeline is not None:
+                timeline.record_batch(before, full, writes,
+                                      self.write_policy == WritePolicy.WRITE_BACK)
+        return outcomes
+    
+    def _warm_batch(self, addresses, is_write):
+        """Apply accesses to the cache state only, leaving every counter alone."""
+        blocks = (addresses // self.block_size).tolist()
+        sets = (addresses // self.block_size % self.num_sets).tolist()
+        for _ in map(self._lookup, blocks, sets, is_write.tolist()):
+            pass
+        if self.classifier is not None:
+            self.classifier.warm(blocks)
+    
+    def run_trace(self, trace, chunk_size=None):
+        """Stream a trace through access_batch() chunk by chunk.
+
+        `trace` is a trace file path (see backend.trace_io) or any iterable
+        of (addresses, is_write) chunks, so memory use is bounded by the
+        chunk size rather than the trace length.
+        """
+        if isinstance(trace, (str, bytes, os.PathLike)):
+            from backend.trace_io import DEFAULT_CHUNK_SIZE, open_trace
+            trace = open_trace(trace, chunk_size=chunk_size or DEFAULT_CHUNK_SIZE)
+        for addresses, is_write in trace:
+            self.access_batch(addresses, is_write)
+        return self.get_stats()
+    
+    def get_timeline(self):
+        """Per-window counters recorded so far, including the open window.
+
+        Returns an empty list when the simulator was built without
+        `timeline_window`.
+        """
+        if self.timeline is None:
+            return []
+        return self.timeline.records(self.timeline.counters(self))
+    
+    def get_stats(self):
+        if self.sampler is not None:
+            return self.sampler.estimate(self)
+        stats = summarize_stats(self.accesses, self.hits, self.misses,
+                                self.cycles, self.memory_traffic,
+                                self.hit_time, self.miss_penalty)
+        if self.classifier is not None:
+            stats.update(self.classifier.counts())
+        return stats
+    
+    def get_profile(self, top=16):
+        """Hot-spot report of an enabled profiler (see SetProfiler.report)."""
+        if self.profiler is None:
+            return None
+        return self.profiler.report(top)
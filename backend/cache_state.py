@@ -0,0 +1,51 @@
+from array import array
+
+
+class CacheState:
+    """Cache metadata kept in flat, preallocated arrays.
+
+    Every per-line field is one contiguous array of num_sets * associativity
+    entries, indexed by line = set_index * associativity + way, so the state
+    has the logical shape (num_sets, associativity) without any per-line
+    Python objects; only the `resident` lookup map grows with occupancy.
+    Allocating or clearing it is a handful of C-level buffer fills, which
+    keeps construction cheap even for multi-megabyte caches. Replacement
+    metadata lives in the simulator's Policy object (see
+    backend.replacement): LRU, FIFO, RANDOM and PLRU also keep it in flat
+    arrays, while LFU, SRRIP/BRRIP and ARC use per-set dictionaries.
+    """
+
+    def __init__(self, num_sets, associativity):
+        self.num_sets = num_sets
+        self.associativity = associativity
+        self.num_lines = num_sets * associativity
+        self.reset()
+
+    def reset(self):
+        """Invalidate every line."""
+        n = self.num_lines
+        self.tags = array('Q', bytes(8 * n))
+        self.valid = bytearray(n)
+        self.dirty = bytearray(n)
+        # Resident blocks (block number -> line index) for O(1) lookups.
+        # Only holds valid lines, so it grows with occupancy, not capacity.
+        self.resident = {}
+
+    def line_index(self, set_index, way):
+        return set_index * self.associativity + way
+
+    @property
+    def nbytes(self):
+        """Bytes used by the per-line metadata arrays."""
+        return self.tags.itemsize * len(self.tags) + len(self.valid) + len(self.dirty)
+
+    def as_arrays(self):
+        """Zero-copy NumPy views of the metadata, shaped (num_sets, associativity)."""
+        import numpy as np
+
+        shape = (self.num_sets, self.associativity)
+        return {
+            'tags': np.frombuffer(self.tags, dtype=np.uint64).reshape(shape),
+            'valid': np.frombuffer(self.valid, dtype=np.bool_).reshape(shape),
+            'dirty': np.frombuffer(self.dirty, dtype=np.bool_).reshape(shape),
+        }
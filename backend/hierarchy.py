@@ -0,0 +1,350 @@
+"""Multi-level cache hierarchies built from CacheSimulator levels.
+
+Each level below L1 only sees what the level above sends it: demand fills
+for its misses, write-backs of dirty victims and write-through writes.
+These streams are built with array operations and passed down one batch
+at a time, so lower levels do work proportional to upper-level misses
+rather than to the trace length.
+
+Inclusion modes:
+
+- NON_INCLUSIVE: levels fill independently on a miss; nothing is enforced.
+- INCLUSIVE: a line evicted from a lower level is back-invalidated from
+  every level above it before the next access. Accesses cascade through
+  the levels one at a time, so this mode is exact but slower than the
+  array-based ones.
+- EXCLUSIVE: a block lives in at most one level. Lower levels act as
+  victim caches: L1 misses probe them and move the block up, and every
+  evicted line moves down one level. Requires write-back levels with one
+  block size.
+"""
+import os
+from enum import Enum
+
+import numpy as np
+
+from backend.cache_simulator import (HIT, MISS_EVICT, WritePolicy, dump_snapshot,
+                                     load_snapshot, summarize_stats)
+
+
+class Inclusion(Enum):
+    NON_INCLUSIVE = 1
+    INCLUSIVE = 2
+    EXCLUSIVE = 3
+
+
+# Accesses per batch; results do not depend on it
+DEFAULT_BATCH_SIZE = 1 << 16
+
+
+class LevelCounters:
+    """Per-level counters kept by the hierarchy.
+
+    Demand counters only cover requests a core is waiting on (L1 accesses
+    and the fills they cause); `requests` also includes write-backs and
+    write-through writes from above.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.accesses = 0    # Demand requests
+        self.hits = 0
+        self.misses = 0
+        self.requests = 0    # All requests received
+        self.writebacks = 0  # Dirty lines sent down
+        self.traffic = 0     # Requests sent to the level below
+
+
+class CacheHierarchy:
+    def __init__(self, levels, inclusion=Inclusion.NON_INCLUSIVE,
+                 memory_latency=100, batch_size=None):
+        if not levels:
+            raise ValueError("a hierarchy needs at least one level")
+        self.levels = list(levels)
+        self.inclusion = inclusion
+        self.memory_latency = memory_latency
+        self.batch_size = batch_size or DEFAULT_BATCH_SIZE
+
+        if any(sim.sampler is not None for sim in self.levels):
+            raise ValueError("hierarchy levels cannot use sampling")
+        block_sizes = [sim.block_size for sim in self.levels]
+        if inclusion == Inclusion.EXCLUSIVE:
+            if len(set(block_sizes)) > 1:
+                raise ValueError("exclusive hierarchies need one block size")
+            if any(sim.write_policy != WritePolicy.WRITE_BACK for sim in self.levels):
+                raise ValueError("exclusive hierarchies need write-back levels")
+        elif inclusion == Inclusion.INCLUSIVE and block_sizes != sorted(block_sizes):
+            raise ValueError("inclusive hierarchies need non-decreasing block sizes")
+
+        for sim in self.levels:
+            sim.victims = []
+        self.counters = [LevelCounters() for _ in self.levels]
+        self.back_invalidations = 0
+
+    def reset(self):
+        for sim, counters in zip(self.levels, self.counters):
+            sim.reset()
+            sim.victims = []
+            counters.reset()
+        self.back_invalidations = 0
+
+    def reset_stats(self):
+        """Zero every level's statistics but keep the caches warm."""
+        for sim, counters in zip(self.levels, self.counters):
+            sim.reset_stats()
+            counters.reset()
+        self.back_invalidations = 0
+
+    def snapshot(self):
+        """Every level's complete state as one blob (see CacheSimulator.snapshot)."""
+        return dump_snapshot(self)
+
+    @classmethod
+    def restore(cls, blob):
+        return load_snapshot(blob, cls)
+
+    def fork(self):
+        """An independent copy of the hierarchy in its current state."""
+        return load_snapshot(dump_snapshot(self), type(self))
+
+    def access(self, address, is_write=False):
+        self.access_batch(np.array([address]), np.array([is_write]))
+
+    def access_batch(self, addresses, is_write=None):
+        """Send a chunk of accesses to L1 and cascade its misses downwards."""
+        addresses = np.asarray(addresses, dtype=np.int64)
+        if is_write is None:
+            is_write = np.zeros(len(addresses), dtype=bool)
+        else:
+            is_write = np.asarray(is_write, dtype=bool)
+        if is_write.shape != addresses.shape:
+            raise ValueError("is_write mask must match the address array")
+
+        for start in range(0, len(addresses), self.batch_size):
+            end = start + self.batch_size
+            if self.inclusion == Inclusion.EXCLUSIVE:
+                self._exclusive_batch(addresses[start:end], is_write[start:end])
+            elif self.inclusion == Inclusion.INCLUSIVE:
+                self._inclusive_batch(addresses[start:end], is_write[start:end])
+            else:
+                self._batch(addresses[start:end], is_write[start:end])
+
+    def run_trace(self, trace, chunk_size=None):
+        """Stream a trace file or (addresses, is_write) chunks through the hierarchy."""
+        if isinstance(trace, (str, bytes, os.PathLike)):
+            from backend.trace_io import DEFAULT_CHUNK_SIZE, open_trace
+            trace = open_trace(trace, chunk_size=chunk_size or DEFAULT_CHUNK_SIZE)
+        for addresses, is_write in trace:
+            self.access_batch(addresses, is_write)
+        return self.get_stats()
+
+    def _batch(self, addresses, is_write):
+        """One batch through a non-inclusive hierarchy."""
+        demand = np.ones(len(addresses), dtype=bool)
+        for sim, counters in zip(self.levels, self.counters):
+            if len(addresses) == 0:
+                break
+            outcomes = sim.access_batch(addresses, is_write)
+            victims = np.array(sim.victims, dtype=np.int64).reshape(-1, 2)
+            sim.victims.clear()
+            victim_dirty = victims[:, 1].astype(bool)
+
+            misses = outcomes != HIT
+            counters.requests += len(addresses)
+            counters.accesses += int(np.count_nonzero(demand))
+            counters.misses += int(np.count_nonzero(misses & demand))
+            counters.hits = counters.accesses - counters.misses
+            counters.writebacks += int(np.count_nonzero(victim_dirty))
+
+            # Requests for the level below, ordered by the access that caused
+            # them: victim write-back, then the fill, then a write-through
+            block_size = sim.block_size
+            blocks = addresses // block_size
+            evicted = np.flatnonzero(outcomes == MISS_EVICT)
+            fills = np.flatnonzero(misses & demand)
+            if sim.write_policy == WritePolicy.WRITE_THROUGH:
+                written = np.flatnonzero(is_write)
+            else:
+                written = np.zeros(0, dtype=np.int64)
+            keys = np.concatenate((evicted[victim_dirty] * 3, fills * 3 + 1, written * 3 + 2))
+            down = np.concatenate((victims[victim_dirty, 0], blocks[fills],
+                                   blocks[written])) * block_size
+            down_writes = np.concatenate((np.ones(np.count_nonzero(victim_dirty), dtype=bool),
+                                          np.zeros(len(fills), dtype=bool),
+                                          np.ones(len(written), dtype=bool)))
+            order = np.argsort(keys, kind='stable')
+            addresses = down[order]
+            is_write = down_writes[order]
+            demand = ~is_write
+            counters.traffic += len(addresses)
+
+    def _inclusive_batch(self, addresses, is_write):
+        """One batch through an inclusive hierarchy, one access at a time."""
+        request = self._inclusive_request
+        for address, write in zip(addresses.tolist(), is_write.tolist()):
+            request(0, address, write, True)
+
+    def _inclusive_request(self, k, address, is_write, demand):
+        """Send one request to level k and cascade what it sends below.
+
+        The requests for the level below are the same, in the same order,
+        as in _batch(); a lower-level victim is back-invalidated from the
+        levels above before anything else happens.
+        """
+        sim = self.levels[k]
+        counters = self.counters[k]
+        hits = sim.hits
+        sim.access(address, is_write)
+        missed = sim.hits == hits
+        counters.requests += 1
+        if demand:
+            counters.accesses += 1
+            counters.misses += missed
+            counters.hits = counters.accesses - counters.misses
+
+        block = address // sim.block_size
+        down = []
+        if sim.victims:
+            victim, dirty = sim.victims.pop()
+            dirty = bool(dirty)
+            if k > 0:
+                dirty |= self._back_invalidate(k, victim)
+            if dirty:
+                counters.writebacks += 1
+                down.append((victim * sim.block_size, True))
+        if missed and demand:
+            down.append((block * sim.block_size, False))
+        if is_write and sim.write_policy == WritePolicy.WRITE_THROUGH:
+            down.append((block * sim.block_size, True))
+        counters.traffic += len(down)
+        if k + 1 < len(self.levels):
+            for lower_address, lower_write in down:
+                self._inclusive_request(k + 1, lower_address, lower_write, not lower_write)
+
+    def _back_invalidate(self, k, victim):
+        """Remove a level-k victim from every level above it. Returns
+        whether an upper copy was dirty, so the dirty data goes down with
+        the victim."""
+        sim = self.levels[k]
+        dirty = False
+        start = victim * sim.block_size
+        end = start + sim.block_size
+        for upper in self.levels[:k]:
+            for upper_block in range(start // upper.block_size, end // upper.block_size):
+                was_dirty = upper.invalidate(upper_block)
+                if was_dirty is not None:
+                    self.back_invalidations += 1
+                    dirty |= was_dirty
+        return dirty
+
+    def _exclusive_batch(self, addresses, is_write):
+        """One batch through an exclusive hierarchy.
+
+        L1 runs the whole batch at once; its misses are then replayed in
+        order through the lower levels as a probe for the missing block
+        followed by the insertion of the line it evicted.
+        """
+        l1 = self.levels[0]
+        counters = self.counters[0]
+        outcomes = l1.access_batch(addresses, is_write)
+        victims = iter(l1.victims)
+        l1.victims = []
+
+        misses = np.flatnonzero(outcomes != HIT)
+        counters.requests += len(addresses)
+        counters.accesses += len(addresses)
+        counters.misses += len(misses)
+        counters.hits = counters.accesses - counters.misses
+
+        blocks = (addresses // l1.block_size).tolist()
+        evicted = outcomes == MISS_EVICT
+        is_last = len(self.levels) == 1
+        moved_dirty = set()  # Dirty blocks that moved up into L1
+        for i in misses.tolist():
+            counters.traffic += 1
+            self._exclusive_op(1, False, blocks[i], False, moved_dirty)
+            if evicted[i]:
+                victim, dirty = next(victims)
+                if victim in moved_dirty:
+                    moved_dirty.discard(victim)
+                    dirty = True
+                if dirty:
+                    counters.writebacks += 1
+                if dirty or not is_last:
+                    counters.traffic += 1
+                    self._exclusive_op(1, True, victim, bool(dirty), moved_dirty)
+
+        # Blocks still in L1 keep the dirty bit they had below
+        for block in moved_dirty:
+            line = l1.state.resident.get(block)
+            if line is not None:
+                l1.state.dirty[line] = 1
+
+    def _exclusive_op(self, k, insert, block, dirty, moved_dirty):
+        """Probe level k for a block (moving it up on a hit) or insert a victim."""
+        if k == len(self.levels):  # Memory
+            return
+        sim = self.levels[k]
+        counters = self.counters[k]
+        counters.requests += 1
+        if insert:
+            victims = sim.victims
+            sim._lookup(block, block % sim.num_sets, dirty)
+            if victims:
+                victim, victim_dirty = victims.pop()
+                if victim_dirty:
+                    counters.writebacks += 1
+                if victim_dirty or k < len(self.levels) - 1:
+                    counters.traffic += 1
+                    self._exclusive_op(k + 1, True, victim, bool(victim_dirty), moved_dirty)
+            return
+
+        counters.accesses += 1
+        if block in sim.state.resident:
+            counters.hits += 1
+            if sim.invalidate(block):
+                moved_dirty.add(block)
+        else:
+            counters.misses += 1
+            counters.traffic += 1
+            self._exclusive_op(k + 1, False, block, False, moved_dirty)
+
+    def get_timeline(self):
+        """L1's per-window counters (see CacheSimulator.get_timeline)."""
+        return self.levels[0].get_timeline()
+
+    def get_stats(self):
+        """Composite statistics plus a 'Levels' list of per-level stats.
+
+        A level's miss penalty is the AMAT of the level below it (memory
+        latency for the last level), so L1's AMAT is the composite AMAT.
+        Composite misses are demand accesses that reach memory.
+        """
+        levels = []
+        penalty = self.memory_latency
+        for k in reversed(range(len(self.levels))):
+            sim = self.levels[k]
+            counters = self.counters[k]
+            stats = summarize_stats(counters.accesses, counters.hits, counters.misses,
+                                    counters.hits * sim.hit_time + counters.misses * penalty,
+                                    counters.traffic, sim.hit_time, penalty)
+            stats['Level'] = f"L{k + 1}"
+            stats['Requests'] = counters.requests
+            stats['Write-backs'] = counters.writebacks
+            levels.insert(0, stats)
+            penalty = stats['AMAT']
+
+        top = self.counters[0]
+        memory_reads = self.counters[-1].misses
+        stats = summarize_stats(top.accesses, top.accesses - memory_reads, memory_reads,
+                                levels[0]['Cycles'], self.counters[-1].traffic,
+                                self.levels[0].hit_time, self.memory_latency,
+                                amat=levels[0]['AMAT'])
+        if self.levels[0].classifier is not None:
+            stats.update(self.levels[0].classifier.counts())
+        stats['Inclusion'] = self.inclusion.name
+        stats['Back-Invalidations'] = self.back_invalidations
+        stats['Levels'] = levels
+        return stats
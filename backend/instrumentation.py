@@ -0,0 +1,122 @@
+"""Windowed time-series instrumentation for CacheSimulator.
+
+A TimelineRecorder splits the access stream into fixed-size windows and
+keeps per-window hits, misses, write-backs and memory traffic in a
+preallocated ring buffer. It only ever reads the simulator's cumulative
+counters at window boundaries, so the per-access cost is a counter
+increment and batched accesses are split into windows with array math.
+
+Windows are labelled with the trace position of their first access. That
+is the window index times the window size, unless the caller passes the
+positions of the recorded accesses (a sampled simulator only records the
+accesses it measures).
+"""
+import numpy as np
+
+from backend.cache_simulator import HIT, MISS_EVICT
+
+# Columns of the ring buffer
+FIELDS = ('accesses', 'hits', 'misses', 'writebacks', 'traffic')
+
+
+class TimelineRecorder:
+    def __init__(self, window_size, capacity=1024):
+        if window_size <= 0:
+            raise ValueError("window_size must be positive")
+        self.window_size = window_size
+        self.capacity = capacity
+        self.reset()
+
+    def reset(self):
+        self.windows = np.zeros((self.capacity, len(FIELDS)), dtype=np.int64)
+        self.completed = 0  # Windows closed so far (may exceed capacity)
+        self.position = 0   # Accesses in the open window
+        self.base = np.zeros(len(FIELDS), dtype=np.int64)  # Counters at its start
+        # Trace position of each window's first access, once positions are given
+        self.starts = None
+        self.open_start = 0
+
+    @staticmethod
+    def counters(sim):
+        return np.array([sim.accesses, sim.hits, sim.misses, sim.writebacks,
+                         sim.memory_traffic], dtype=np.int64)
+
+    def _close(self, totals, starts=None):
+        """Close windows ending at the given cumulative counter rows (and
+        starting at the given trace positions)."""
+        totals = np.atleast_2d(totals)
+        deltas = np.diff(np.vstack((self.base, totals)), axis=0)
+        count = len(deltas)
+        if count > self.capacity:  # Only the newest windows survive
+            deltas = deltas[-self.capacity:]
+        slots = (self.completed + count - len(deltas) + np.arange(len(deltas))) % self.capacity
+        self.windows[slots] = deltas
+        if starts is not None:
+            if self.starts is None:
+                self.starts = np.zeros(self.capacity, dtype=np.int64)
+            self.starts[slots] = starts[-len(deltas):]
+        self.completed += count
+        self.base = totals[-1]
+
+    def tick(self, sim):
+        """Account for one access already applied to `sim`."""
+        self.position += 1
+        if self.position == self.window_size:
+            self._close(self.counters(sim))
+            self.position = 0
+
+    def record_batch(self, before, outcomes, is_write, write_back, positions=None):
+        """Account for a batch of accesses already applied to the simulator.
+
+        `before` are the cumulative counters before the batch and
+        `outcomes` the per-access codes returned by _lookup; `positions`
+        optionally gives each access's trace position. Per-access
+        increments are only materialized when the batch closes a window.
+        """
+        n = len(outcomes)
+        if positions is not None and n and not self.position:
+            self.open_start = int(positions[0])
+        first = self.window_size - self.position - 1
+        if first >= n:
+            self.position += n
+            return
+        ends = np.arange(first, n, self.window_size)
+        starts = None
+        if positions is not None:
+            starts = np.concatenate(([self.open_start], positions[ends[:-1] + 1]))
+            if ends[-1] + 1 < n:
+                self.open_start = int(positions[ends[-1] + 1])
+
+        hits = outcomes == HIT
+        misses = ~hits
+        evictions = outcomes == MISS_EVICT
+        writebacks = evictions if write_back else np.zeros(n, dtype=bool)
+        traffic = misses.astype(np.int64) + (writebacks if write_back else is_write)
+        increments = np.column_stack((np.ones(n, dtype=np.int64), hits, misses,
+                                      writebacks, traffic))
+        self._close(np.cumsum(increments, axis=0)[ends] + before, starts)
+        self.position = n - 1 - ends[-1]
+
+    def records(self, current=None):
+        """Chronological list of window dicts, oldest first.
+
+        Passing the simulator's current counters appends the partially
+        filled window, if any.
+        """
+        kept = min(self.completed, self.capacity)
+        first = self.completed - kept
+        order = (first + np.arange(kept)) % self.capacity
+        rows = [((first + i) * self.window_size if self.starts is None else self.starts[slot],
+                 self.windows[slot]) for i, slot in enumerate(order)]
+        if current is not None and self.position:
+            start = self.completed * self.window_size if self.starts is None else self.open_start
+            rows.append((start, current - self.base))
+        result = []
+        for start, row in rows:
+            record = dict(zip(FIELDS, (int(v) for v in row)))
+            record['start'] = int(start)
+            accesses = record['accesses']
+            record['hit_rate'] = record['hits'] / accesses if accesses else 0
+            record['miss_rate'] = record['misses'] / accesses if accesses else 0
+            result.append(record)
+        return result
@@ -0,0 +1,144 @@
+"""Background simulation jobs for the web backend.
+
+Long simulations run on a bounded thread pool instead of the request
+thread. Each Job publishes its progress through a condition variable so
+status requests and Server-Sent Events streams can follow it, and a job can
+be cancelled between chunks of work.
+"""
+import itertools
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+class JobCancelled(Exception):
+    """Raised inside a job's runner once the job has been cancelled."""
+
+
+class QueueFull(Exception):
+    """Raised by JobManager.submit when too many jobs are waiting."""
+
+
+class Job:
+    def __init__(self, config):
+        self.id = uuid.uuid4().hex
+        self.config = config
+        self.status = QUEUED
+        self.done = 0        # Accesses simulated so far
+        self.total = None    # Trace length, when known up front
+        self.stats = None    # Latest get_stats() snapshot
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.version = 0     # Bumped on every change, for waiters
+        self._cancel = threading.Event()
+        self._changed = threading.Condition()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def _update(self, **fields):
+        with self._changed:
+            for name, value in fields.items():
+                setattr(self, name, value)
+            self.version += 1
+            self._changed.notify_all()
+
+    def report(self, sim, done, total=None):
+        """Progress callback for the runner; raises JobCancelled when cancelled."""
+        if self.cancelled:
+            raise JobCancelled()
+        self._update(done=done, total=total, stats=sim.get_stats())
+
+    def wait(self, version, timeout=None):
+        """Block until the job changes past `version`; returns the new version."""
+        with self._changed:
+            self._changed.wait_for(lambda: self.version != version, timeout)
+            return self.version
+
+    def to_dict(self):
+        with self._changed:
+            fraction = self.done / self.total if self.total else None
+            if self.status == DONE:
+                fraction = 1.0
+            return {
+                'jobId': self.id,
+                'status': self.status,
+                'progress': {'done': self.done, 'total': self.total,
+                             'fraction': fraction},
+                'stats': self.stats,
+                'result': self.result,
+                'error': self.error
+            }
+
+
+class JobManager:
+    """Runs jobs on `max_workers` threads with at most `max_queued` waiting.
+
+    `runner(config, job)` does the work and reports progress through
+    job.report(). Finished jobs are kept (up to `history`) so clients can
+    still fetch their results.
+    """
+
+    def __init__(self, runner, max_workers=2, max_queued=8, history=100):
+        self.runner = runner
+        self.max_queued = max_queued
+        self.history = history
+        self.jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix='sim-job')
+
+    def submit(self, config):
+        with self._lock:
+            queued = sum(1 for job in self.jobs.values() if job.status == QUEUED)
+            if queued >= self.max_queued:
+                raise QueueFull(f"{queued} jobs already waiting")
+            job = Job(config)
+            self.jobs[job.id] = job
+            self._prune()
+        self._executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """Request cancellation; a queued job never starts, a running one stops
+        at its next progress report."""
+        job = self.get(job_id)
+        if job is None:
+            return None
+        job._cancel.set()
+        if job.status == QUEUED:
+            job._update(status=CANCELLED)
+        return job
+
+    def _run(self, job):
+        if job.cancelled:
+            return
+        job._update(status=RUNNING)
+        try:
+            result = self.runner(job.config, job)
+        except JobCancelled:
+            job._update(status=CANCELLED)
+        except Exception as e:
+            job._update(status=FAILED, error=str(e))
+        else:
+            job._update(status=DONE, result=result)
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.status in FINISHED]
+        for job_id in itertools.islice(finished, max(0, len(finished) - self.history)):
+            del self.jobs[job_id]
@@ -1,9 +1,14 @@
+import argparse
 import os
+import random
 from backend.cache_simulator import CacheSimulator, WritePolicy, ReplacementPolicy
 from backend.benchmark_programs import *
+from backend.reporting import format_table
+from backend.sampling import add_sampling_arguments, sampling_from_args
+from backend.sweep import expand_grid, run_sweep
+from backend.trace_cache import cached_trace
+from backend.trace_io import DEFAULT_CHUNK_SIZE, open_trace
 from adaptive_policy import AdaptiveCache
-import pandas as pd
-import matplotlib.pyplot as plt
 
 # ensure output directory exists for any results
 os.makedirs('results', exist_ok=True)
@@ -22,19 +27,14 @@ def main():
         {"name": "Fully Associative", "associativity": 8}
     ]
     
-    addresses = matrix_multiplication(32)
+    addresses = cached_trace('matrix_multiplication', n=32).addresses
     org_results = []
     
-    for org in organizations:
-        sim = CacheSimulator(
-            cache_size=16384,
-            associativity=org["associativity"]
-        )
-        
-        for addr in addresses[:3000]:
-            sim.access(addr)
-        
-        stats = sim.get_stats()
+    org_stats = run_sweep(
+        [{"cache_size": 16384, "associativity": org["associativity"]} for org in organizations],
+        addresses[:3000])
+    
+    for org, (_, stats) in zip(organizations, org_stats.iterrows()):
         org_results.append({
             "Organization": org["name"],
             "Hit Rate": f"{stats['Hit Rate']:.2%}",
@@ -46,42 +46,36 @@ def main():
         })
     
     # Display results
-    df_org = pd.DataFrame(org_results)
     print("\nCache Organization Comparison:")
-    print(df_org.to_string(index=False))
+    print(format_table(org_results))
     # highlight best CES for demonstration
-    try:
-        best_idx = df_org['CES'].astype(float).idxmax()
-        print(f"\nBest overall CES: {df_org.loc[best_idx, 'Organization']} ({df_org.loc[best_idx, 'CES']})")
-    except Exception:
-        pass
+    best = max(org_results, key=lambda row: float(row['CES']))
+    print(f"\nBest overall CES: {best['Organization']} ({best['CES']})")
     
     # Part 2: Block Size Impact
     print("\n[2] Analyzing Block Size Impact...")
     block_sizes = [16, 32, 64, 128]
     block_results = []
     
-    for bs in block_sizes:
-        sim = CacheSimulator(block_size=bs)
-        for addr in strided_access(2000, stride=64):
-            sim.access(addr)
-        stats = sim.get_stats()
+    block_stats = run_sweep(expand_grid(block_size=block_sizes),
+                            strided_access(2000, stride=64))
+    for _, stats in block_stats.iterrows():
         block_results.append({
-            "Block Size": f"{bs} bytes",
+            "Block Size": f"{stats['Block Size']} bytes",
             "Hit Rate": f"{stats['Hit Rate']:.2%}",
             "Miss Rate": f"{stats['Miss Rate']:.2%}",
             "Memory Traffic": stats['Memory Traffic']
         })
     
-    df_block = pd.DataFrame(block_results)
-    print(df_block.to_string(index=False))
+    print(format_table(block_results))
     
     # Part 3: Replacement Policy Comparison
     print("\n[3] Comparing Replacement Policies...")
     policies = [
         ("LRU", ReplacementPolicy.LRU),
         ("FIFO", ReplacementPolicy.FIFO),
-        ("Random", ReplacementPolicy.RANDOM)
+        ("Random", ReplacementPolicy.RANDOM),
+        ("OPT", ReplacementPolicy.OPT)
     ]
     
     # Test with different access patterns
@@ -93,11 +87,10 @@ def main():
     
     for pattern_name, pattern_addrs in patterns.items():
         print(f"\n  Workload: {pattern_name}")
-        for policy_name, policy in policies:
-            sim = CacheSimulator(replacement_policy=policy)
-            for addr in pattern_addrs:
-                sim.access(addr)
-            stats = sim.get_stats()
+        policy_stats = run_sweep(
+            expand_grid(replacement_policy=[policy for _, policy in policies]),
+            pattern_addrs)
+        for (policy_name, _), (_, stats) in zip(policies, policy_stats.iterrows()):
             print(f"    {policy_name:8} | Hit Rate: {stats['Hit Rate']:.2%} | AMAT: {stats['AMAT']:.2f}")
     
     # Part 4: Write Policy Comparison
@@ -107,13 +100,12 @@ def main():
         ("Write-Back", WritePolicy.WRITE_BACK)
     ]
     
-    for wp_name, wp in write_policies:
-        sim = CacheSimulator(write_policy=wp)
-        for addr in matrix_multiplication(16):
-            # Mix reads and writes
-            is_write = random.random() > 0.7  # 30% writes
-            sim.access(addr, is_write)
-        stats = sim.get_stats()
+    workload = matrix_multiplication(16)
+    # Mix reads and writes
+    writes = [random.random() > 0.7 for _ in workload]  # 30% writes
+    wp_stats = run_sweep(expand_grid(write_policy=[wp for _, wp in write_policies]),
+                         workload, writes)
+    for (wp_name, _), (_, stats) in zip(write_policies, wp_stats.iterrows()):
         print(f"  {wp_name:13} | Memory Traffic: {stats['Memory Traffic']} blocks | Cycles: {stats['Cycles']}")
     
     # Part 5: Unique Feature - Adaptive Cache
@@ -133,17 +125,80 @@ def main():
     workload.extend(strided_access(2000, 32))      # Strided
     
     sim = CacheSimulator(**config)
-    for addr in workload:
-        sim.access(addr)
-        adaptive.adapt(sim)
+    adaptive.access_batch(sim, workload)
     
     stats = sim.get_stats()
     print(f"  Final Hit Rate: {stats['Hit Rate']:.2%}")
     print(f"  AMAT: {stats['AMAT']:.2f} cycles")
+    print(f"  Policy: {adaptive.current_policy} | Block Size: {sim.block_size} | "
+          f"Associativity: {sim.associativity} | Reconfigurations: {adaptive.reconfigurations}")
     
     print("\n" + "=" * 60)
     print("Analysis Complete! Check results/cache_analysis.png for visualizations")
     print("=" * 60)
 
+def analyze_trace(path, chunk_size=DEFAULT_CHUNK_SIZE, sampling=None, warmup=0):
+    """Compare organizations and policies on a captured trace file.
+
+    Every simulator consumes the same streamed chunk before the next one is
+    read, so the trace is decoded once and never held in memory whole.
+    With `sampling` (see backend.sampling) the results are estimates and a
+    95% confidence interval of the miss rate is shown. The first `warmup`
+    accesses only fill the caches and are left out of the statistics.
+    """
+    print("=" * 60)
+    print(f"CACHE ANALYSIS OF TRACE: {path}")
+    print("=" * 60)
+    
+    simulators = {}
+    for assoc in [1, 2, 4, 8]:
+        for policy in ReplacementPolicy:
+            if policy == ReplacementPolicy.OPT:
+                continue  # Needs the whole trace up front, not a stream
+            simulators[(assoc, policy.name)] = CacheSimulator(
+                cache_size=16384, associativity=assoc, replacement_policy=policy,
+                sampling=sampling)
+    
+    done = 0
+    for addresses, is_write in open_trace(path, chunk_size=chunk_size):
+        split = min(max(warmup - done, 0), len(addresses))
+        for sim in simulators.values():
+            if split:
+                sim.access_batch(addresses[:split], None if is_write is None else is_write[:split])
+                if done + split == warmup:
+                    sim.reset_stats()
+            sim.access_batch(addresses[split:], None if is_write is None else is_write[split:])
+        done += len(addresses)
+    
+    rows = []
+    for (assoc, policy_name), sim in simulators.items():
+        stats = sim.get_stats()
+        row = {
+            "Associativity": assoc,
+            "Policy": policy_name,
+            "Accesses": stats['Accesses'],
+            "Hit Rate": f"{stats['Hit Rate']:.2%}",
+            "AMAT": f"{stats['AMAT']:.2f} cycles",
+            "Memory Traffic": stats['Memory Traffic']
+        }
+        if sampling is not None:
+            interval = stats['Miss Rate CI']
+            row["Miss Rate CI"] = f"{interval[0]:.2%} - {interval[1]:.2%}" if interval else "n/a"
+        rows.append(row)
+    print(format_table(rows))
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Cache organization and policy analysis")
+    parser.add_argument("--trace", help="analyze a trace file (.din, .csv or .bin) "
+                                        "instead of the built-in benchmarks")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="accesses read per chunk when streaming a trace")
+    parser.add_argument("--warmup", type=int, default=0,
+                        help="leading accesses that only warm the caches (not counted)")
+    add_sampling_arguments(parser)
+    args = parser.parse_args()
+    
+    if args.trace:
+        analyze_trace(args.trace, args.chunk_size, sampling_from_args(args), args.warmup)
+    else:
+        main()
\ No newline at end of file
@@ -0,0 +1,101 @@
+"""Compulsory / capacity / conflict (3C) miss classification.
+
+A miss is compulsory if its block was never referenced before. Otherwise
+it is a capacity miss if a fully-associative LRU cache with the same
+number of lines would also have missed, and a conflict miss if that shadow
+cache would have hit. The shadow cache is an OrderedDict used as an LRU
+list, so every access costs O(1) regardless of cache size.
+"""
+from collections import OrderedDict
+
+
+class MissClassifier:
+    def __init__(self, num_lines):
+        self.num_lines = num_lines
+        self.reset()
+
+    def reset(self):
+        self.seen = set()
+        self.shadow = OrderedDict()
+        self.reset_counts()
+
+    def reset_counts(self):
+        """Zero the counts but keep the access history."""
+        self.compulsory = 0
+        self.capacity = 0
+        self.conflict = 0
+
+    def resize(self, num_lines, reset_blocks=False):
+        """Track a cache that now has `num_lines` lines.
+
+        With reset_blocks (the block size changed, so old block numbers mean
+        nothing) the history is forgotten; the counts so far are kept.
+        """
+        self.num_lines = num_lines
+        if reset_blocks:
+            self.seen = set()
+            self.shadow = OrderedDict()
+        while len(self.shadow) > num_lines:
+            self.shadow.popitem(last=False)
+
+    def observe(self, block, hit):
+        """Update the shadow cache with one access and classify it if it missed."""
+        shadow = self.shadow
+        in_shadow = block in shadow
+        if in_shadow:
+            shadow.move_to_end(block)
+        else:
+            shadow[block] = None
+            if len(shadow) > self.num_lines:
+                shadow.popitem(last=False)
+
+        if not hit:
+            if block not in self.seen:
+                self.seen.add(block)
+                self.compulsory += 1
+            elif in_shadow:
+                self.conflict += 1
+            else:
+                self.capacity += 1
+
+    def observe_batch(self, blocks, hits):
+        """observe() for parallel sequences of blocks and hit flags."""
+        shadow = self.shadow
+        seen = self.seen
+        num_lines = self.num_lines
+        for block, hit in zip(blocks, hits):
+            in_shadow = block in shadow
+            if in_shadow:
+                shadow.move_to_end(block)
+            else:
+                shadow[block] = None
+                if len(shadow) > num_lines:
+                    shadow.popitem(last=False)
+            if not hit:
+                if block not in seen:
+                    seen.add(block)
+                    self.compulsory += 1
+                elif in_shadow:
+                    self.conflict += 1
+                else:
+                    self.capacity += 1
+
+    def warm(self, blocks):
+        """Update the history with accesses that are not classified."""
+        shadow = self.shadow
+        num_lines = self.num_lines
+        for block in blocks:
+            if block in shadow:
+                shadow.move_to_end(block)
+            else:
+                shadow[block] = None
+                if len(shadow) > num_lines:
+                    shadow.popitem(last=False)
+        self.seen.update(blocks)
+
+    def counts(self):
+        return {
+            'Compulsory Misses': self.compulsory,
+            'Capacity Misses': self.capacity,
+            'Conflict Misses': self.conflict
+        }
@@ -0,0 +1,170 @@
+"""Parallel single-configuration runs, partitioned by cache set.
+
+A block only ever touches the set it maps to, so a trace can be split by
+set index: partition k owns a contiguous range of sets and simulates the
+accesses that map there, in trace order, on its own CacheSimulator. The
+trace and the positions of each partition's accesses (grouped once by the
+parent) live in shared memory, each worker writes the outcome codes of its
+accesses into a shared outcome array, and the parent merges the counters
+and copies each partition's lines back into its own cache state.
+
+For policies whose decisions depend only on a set's own history (LRU,
+FIFO, PLRU, LFU, SRRIP, ARC, OPT, ...) the result is identical to the
+serial engine. Policies drawing from the shared RNG (RANDOM, BRRIP) give
+each partition its own RNG, seeded from the simulator's seed and the
+partition index, so results are reproducible for a given partition count
+but differ from a serial run. Policies with cross-set state (set dueling)
+cannot be partitioned.
+"""
+import hashlib
+import os
+from multiprocessing import get_context, shared_memory
+
+import numpy as np
+
+from backend.cache_simulator import HIT, CacheSimulator, WritePolicy
+from backend.replacement import POLICIES
+
+COUNTERS = ('accesses', 'hits', 'misses', 'read_accesses', 'write_accesses',
+            'memory_traffic', 'cycles', 'writebacks')
+
+
+def partition_seed(seed, index, partitions):
+    """Deterministic RNG seed of one partition (None stays unseeded)."""
+    if seed is None:
+        return None
+    digest = hashlib.sha256(f"{seed}:{index}:{partitions}".encode()).digest()
+    return int.from_bytes(digest[:8], 'little')
+
+
+def partition_bounds(num_sets, partitions):
+    """[start, end) set ranges of `partitions` near-equal partitions."""
+    edges = [num_sets * k // partitions for k in range(partitions + 1)]
+    return list(zip(edges[:-1], edges[1:]))
+
+
+def _index_offset(length):
+    """Byte offset of the grouped access positions in the shared block (8-aligned)."""
+    return -(-length * 10 // 8) * 8
+
+
+def _run_partition(task):
+    config, index, partitions, first_set, end_set, shm_name, length, has_writes, span = task
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        addresses = np.ndarray(length, dtype=np.int64, buffer=shm.buf)
+        outcomes = np.ndarray(length, dtype=np.int8, buffer=shm.buf, offset=length * 8)
+        is_write = None
+        if has_writes:
+            is_write = np.ndarray(length, dtype=bool, buffer=shm.buf, offset=length * 9)
+        # Positions of this partition's accesses, grouped by the parent
+        mine = np.ndarray(span[1] - span[0], dtype=np.int64, buffer=shm.buf,
+                          offset=_index_offset(length) + span[0] * 8)
+
+        sim = CacheSimulator(seed=partition_seed(config.pop('seed'), index, partitions), **config)
+        own = addresses[mine]
+        sim.prepare(own)  # Offline policies see exactly this partition's accesses
+        outcomes[mine] = sim.access_batch(own, None if is_write is None else is_write[mine])
+        del addresses, outcomes, is_write, mine
+
+        first_line = first_set * sim.associativity
+        end_line = end_set * sim.associativity
+        state = sim.state
+        return (index, {name: getattr(sim, name) for name in COUNTERS},
+                state.tags[first_line:end_line], bytes(state.valid[first_line:end_line]),
+                bytes(state.dirty[first_line:end_line]), list(state.resident.items()))
+    finally:
+        shm.close()
+
+
+def access_partitioned(sim, addresses, is_write=None, processes=None, partitions=None):
+    """Simulate a whole trace on an empty `sim` with set-partitioned workers.
+
+    Counters, per-access outcomes (returned), timeline, 3C breakdown,
+    profile and the final cache contents match access_batch() (see the
+    module docstring for randomized policies). Replacement metadata is rebuilt
+    from the resident lines afterwards, so accesses made after this call
+    may decide differently from a serial run.
+    """
+    addresses = np.asarray(addresses, dtype=np.int64)
+    if is_write is not None:
+        is_write = np.asarray(is_write, dtype=bool)
+        if is_write.shape != addresses.shape:
+            raise ValueError("is_write mask must match the address array")
+    if sim.sampler is not None:
+        raise ValueError("sampled simulators cannot be partitioned")
+    if not sim.policy.partitionable:
+        raise ValueError(f"{sim.policy_name} shares state across sets and cannot be partitioned")
+    if POLICIES.get(sim.policy_name) is not type(sim.policy):
+        raise ValueError(f"{type(sim.policy).__name__} is not registered under its name; workers "
+                         f"rebuild the policy by name, so register it with @register_policy")
+    if sim.accesses or sim.state.resident:
+        raise ValueError("partitioned runs start from an empty cache; call reset() first")
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if partitions is None:
+        partitions = processes
+    partitions = max(1, min(partitions, sim.num_sets))
+    processes = max(1, min(processes, partitions))
+
+    config = {'cache_size': sim.cache_size, 'block_size': sim.block_size,
+              'associativity': sim.associativity, 'write_policy': sim.write_policy,
+              'replacement_policy': sim.policy_name, 'hit_time': sim.hit_time,
+              'miss_penalty': sim.miss_penalty, 'seed': sim.seed}
+    length = len(addresses)
+    bounds = partition_bounds(sim.num_sets, partitions)
+    # Group access positions by partition once, so each worker only touches its own
+    edges = np.array([end for _, end in bounds[:-1]], dtype=np.int64)
+    owner = np.searchsorted(edges, addresses // sim.block_size % sim.num_sets, side='right')
+    grouped = np.argsort(owner.astype(np.int16 if partitions <= 1 << 15 else np.int32),
+                         kind='stable')
+    starts = np.concatenate(([0], np.cumsum(np.bincount(owner, minlength=partitions))))
+    del owner
+    shm = shared_memory.SharedMemory(create=True, size=max(_index_offset(length) + length * 8, 1))
+    try:
+        np.ndarray(length, dtype=np.int64, buffer=shm.buf)[:] = addresses
+        if is_write is not None:
+            np.ndarray(length, dtype=bool, buffer=shm.buf, offset=length * 9)[:] = is_write
+        np.ndarray(length, dtype=np.int64, buffer=shm.buf, offset=_index_offset(length))[:] = grouped
+        del grouped
+        tasks = [(dict(config), index, partitions, first_set, end_set,
+                  shm.name, length, is_write is not None,
+                  (int(starts[index]), int(starts[index + 1])))
+                 for index, (first_set, end_set) in enumerate(bounds)]
+        if processes == 1:
+            results = [_run_partition(task) for task in tasks]
+        else:
+            with get_context().Pool(processes) as pool:
+                results = pool.map(_run_partition, tasks)
+        outcomes = np.ndarray(length, dtype=np.int8, buffer=shm.buf, offset=length * 8).copy()
+    finally:
+        shm.close()
+        shm.unlink()
+
+    if sim.timeline is not None:
+        before = sim.timeline.counters(sim)
+    state = sim.state
+    for index, counters, tags, valid, dirty, resident in results:
+        for name, value in counters.items():
+            setattr(sim, name, getattr(sim, name) + value)
+        first_line = tasks[index][3] * sim.associativity
+        end_line = tasks[index][4] * sim.associativity
+        state.tags[first_line:end_line] = tags
+        state.valid[first_line:end_line] = valid
+        state.dirty[first_line:end_line] = dirty
+        state.resident.update(resident)
+
+    if not sim.policy.offline:
+        sim.policy.reset()
+        sim.policy.warm(state.resident)
+    if sim.profiler is not None:
+        sim.profiler.record_batch(addresses, addresses // sim.block_size % sim.num_sets, outcomes)
+    if sim.classifier is not None:
+        sim.classifier.observe_batch((addresses // sim.block_size).tolist(),
+                                     (outcomes == HIT).tolist())
+    if sim.timeline is not None:
+        if is_write is None:
+            is_write = np.zeros(length, dtype=bool)
+        sim.timeline.record_batch(before, outcomes, is_write,
+                                  sim.write_policy == WritePolicy.WRITE_BACK)
+    return outcomes
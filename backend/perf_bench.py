@@ -0,0 +1,364 @@
+"""Throughput benchmarks for the simulator engines.
+
+Every generator in backend.benchmark_programs is run across a grid of
+cache sizes, associativities and replacement policies. Each case reports
+simulated accesses per second, CacheSimulator construction time and the
+peak resident set size of the process that ran it. Results are written as
+JSON and can be compared with a stored baseline:
+
+    python -m backend.perf_bench                  # run and compare
+    python -m backend.perf_bench --save-baseline  # accept as the new baseline
+    python -m backend.perf_bench --quick --policies LRU ARC --threshold 0.2
+
+Every case runs in its own freshly spawned worker process (which loads its
+trace from the trace cache), so peak RSS describes that case alone rather
+than including memory inherited from a forked parent. Import times of the
+core modules are measured in fresh interpreters and checked against
+IMPORT_BUDGETS. The exit status is 1 when any case regressed by more than
+the threshold or an import went over budget.
+"""
+import argparse
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from backend.cache_simulator import CacheSimulator
+from backend.trace_cache import GENERATORS, cached_trace
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'results')
+DEFAULT_OUTPUT = os.path.join(RESULTS_DIR, 'perf_results.json')
+DEFAULT_BASELINE = os.path.join(RESULTS_DIR, 'perf_baseline.json')
+
+# Parameters of each trace generator (full and --quick runs)
+WORKLOADS = {
+    'matrix_multiplication': {'n': 48},
+    'random_access': {'n': 200000, 'max_addr': 1 << 22, 'seed': 0},
+    'sequential_access': {'n': 200000},
+    'strided_access': {'n': 200000 * 64, 'stride': 64},
+    'linked_list_traversal': {'n': 20000, 'seed': 0},
+    'tiled_matrix_multiplication': {'n': 48, 'tile': 16},
+    'stencil_2d': {'n': 256},
+    'stencil_3d': {'n': 40},
+    'zipf_kv_lookup': {'n': 200000, 'keys': 1 << 16, 'seed': 0},
+    'hash_probe': {'n': 100000, 'table_size': 1 << 16, 'seed': 0},
+    'pointer_chase': {'steps': 200000, 'footprint': 1 << 22, 'seed': 0},
+}
+QUICK_WORKLOADS = {
+    'matrix_multiplication': {'n': 24},
+    'random_access': {'n': 20000, 'max_addr': 1 << 22, 'seed': 0},
+    'sequential_access': {'n': 20000},
+    'strided_access': {'n': 20000 * 64, 'stride': 64},
+    'linked_list_traversal': {'n': 2000, 'seed': 0},
+    'tiled_matrix_multiplication': {'n': 24, 'tile': 8},
+    'stencil_2d': {'n': 80},
+    'stencil_3d': {'n': 20},
+    'zipf_kv_lookup': {'n': 20000, 'keys': 1 << 16, 'seed': 0},
+    'hash_probe': {'n': 10000, 'table_size': 1 << 16, 'seed': 0},
+    'pointer_chase': {'steps': 20000, 'footprint': 1 << 22, 'seed': 0},
+}
+
+CACHE_SIZES = (4096, 65536)
+ASSOCIATIVITIES = (1, 8)
+POLICIES = ('LRU', 'FIFO', 'RANDOM', 'PLRU', 'SRRIP', 'ARC')
+
+DEFAULT_THRESHOLD = 0.10
+# Differences below these are noise, whatever the relative change
+CONSTRUCT_FLOOR = 1e-3      # seconds
+RSS_FLOOR = 1 << 20         # bytes
+
+# Import-time budgets (seconds, in a fresh interpreter) and the heavy
+# packages each module must not load
+HEAVY = ('numpy', 'pandas', 'matplotlib')
+IMPORT_BUDGETS = {
+    'backend.cache_simulator': (0.05, HEAVY),
+    'backend.adaptive_policy': (0.05, HEAVY),
+    'backend.sweep': (0.25, ('pandas', 'matplotlib')),
+    'backend.analysis': (0.25, ('pandas', 'matplotlib')),
+}
+
+
+def _run_batch(sim, addresses, is_write):
+    sim.access_batch(addresses, is_write)
+
+
+def _run_scalar(sim, addresses, is_write):
+    access = sim.access
+    for address, write in zip(addresses.tolist(), is_write.tolist()):
+        access(address, write)
+
+
+# Ways of driving a simulator through a trace, selectable with --engines
+ENGINES = {
+    'batch': _run_batch,
+    'scalar': _run_scalar,
+}
+
+
+def case_key(case):
+    return '/'.join(str(case[name]) for name in
+                    ('engine', 'workload', 'cache_size', 'associativity', 'policy'))
+
+
+def expand_cases(workloads, cache_sizes, associativities, policies, engines):
+    return [{'engine': engine, 'workload': workload, 'params': params,
+             'cache_size': cache_size, 'associativity': associativity, 'policy': policy}
+            for engine in engines
+            for workload, params in workloads.items()
+            for cache_size in cache_sizes
+            for associativity in associativities
+            for policy in policies]
+
+
+def _peak_rss():
+    """Peak resident set size of this process in bytes, if known."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _load_workload(workload, params):
+    params = dict(params)
+    addresses = np.asarray(cached_trace(workload, **params).addresses, dtype=np.int64)
+    is_write = np.arange(len(addresses)) % 3 == 0  # 33% writes
+    return addresses, is_write
+
+
+def run_case(case, repeat=3):
+    """Time one case; meant to run in a fresh worker process."""
+    addresses, is_write = _load_workload(case['workload'], case['params'])
+    config = {'cache_size': case['cache_size'], 'block_size': 32,
+              'associativity': case['associativity'], 'replacement_policy': case['policy'],
+              'seed': 0}
+    run = ENGINES[case['engine']]
+
+    construct = []
+    elapsed = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        sim = CacheSimulator(**config)
+        construct.append(time.perf_counter() - start)
+        sim.prepare(addresses)  # Offline policies (OPT) see the trace first
+        start = time.perf_counter()
+        run(sim, addresses, is_write)
+        elapsed.append(time.perf_counter() - start)
+
+    best = min(elapsed)
+    result = {name: case[name] for name in
+              ('engine', 'workload', 'cache_size', 'associativity', 'policy')}
+    result.update({
+        'accesses': len(addresses),
+        'seconds': best,
+        'accesses_per_sec': len(addresses) / best if best > 0 else None,
+        'construct_seconds': min(construct),
+        'peak_rss_bytes': _peak_rss(),
+        'miss_rate': sim.get_stats()['Miss Rate'],
+    })
+    return result
+
+
+def _prime_trace(item):
+    workload, params = item
+    cached_trace(workload, **dict(params))
+
+
+def run_suite(cases, repeat=3, progress=None):
+    """Run every case in its own worker process and return the result rows."""
+    # Spawned, not forked: ru_maxrss of a forked child counts the parent's pages
+    context = multiprocessing.get_context('spawn')
+    # Generate traces outside this process so it stays small
+    workloads = {(case['workload'], tuple(sorted(case['params'].items()))) for case in cases}
+    with context.Pool(1, maxtasksperchild=1) as pool:
+        pool.map(_prime_trace, [(workload, dict(params)) for workload, params in workloads])
+
+    rows = []
+    with context.Pool(1, maxtasksperchild=1) as pool:
+        pending = [pool.apply_async(run_case, (case, repeat)) for case in cases]
+        for case, task in zip(cases, pending):
+            row = task.get()
+            rows.append(row)
+            if progress is not None:
+                progress(row)
+    return rows
+
+
+_IMPORT_PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed, 'modules': sorted(sys.modules)}}))
+'''
+
+
+def measure_import(module, repeat=5):
+    """Best-of-`repeat` import time of `module` in a fresh interpreter, and
+    the top-level packages it loaded."""
+    root = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+    best = None
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', _IMPORT_PROBE.format(module=module)],
+                                capture_output=True, text=True, check=True, cwd=root).stdout
+        probe = json.loads(output)
+        best = probe['seconds'] if best is None else min(best, probe['seconds'])
+    packages = {name.split('.')[0] for name in probe['modules']}
+    return best, packages
+
+
+def check_imports(budgets=IMPORT_BUDGETS):
+    """Measure every budgeted module; returns one row per module."""
+    rows = []
+    for module, (budget, forbidden) in budgets.items():
+        seconds, packages = measure_import(module)
+        loaded = sorted(packages.intersection(forbidden))
+        rows.append({'module': module, 'seconds': seconds, 'budget': budget,
+                     'forbidden_loaded': loaded,
+                     'ok': seconds <= budget and not loaded})
+    return rows
+
+
+def environment():
+    """Where and on what the results were measured."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ''
+    return {
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'commit': commit or None,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def compare(rows, baseline_rows, threshold=DEFAULT_THRESHOLD):
+    """Cases that got worse than the baseline by more than `threshold`.
+
+    Throughput regresses when it drops, construction time and peak RSS when
+    they grow. Returns one dict per regressed metric.
+    """
+    baseline = {case_key(row): row for row in baseline_rows}
+    regressions = []
+    for row in rows:
+        old = baseline.get(case_key(row))
+        if old is None:
+            continue
+        checks = (
+            ('accesses_per_sec', -1, 0),
+            ('construct_seconds', 1, CONSTRUCT_FLOOR),
+            ('peak_rss_bytes', 1, RSS_FLOOR),
+        )
+        for metric, worse, floor in checks:
+            before, after = old.get(metric), row.get(metric)
+            if not before or after is None or abs(after - before) < floor:
+                continue
+            change = (after - before) / before
+            if change * worse > threshold:
+                regressions.append({'case': case_key(row), 'metric': metric,
+                                    'baseline': before, 'current': after, 'change': change})
+    return regressions
+
+
+def write_results(path, rows, imports=None, threshold=None, regressions=None):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    document = {'environment': environment(), 'cases': rows}
+    if imports is not None:
+        document['imports'] = imports
+    if regressions is not None:
+        document['threshold'] = threshold
+        document['regressions'] = regressions
+    with open(path, 'w') as f:
+        json.dump(document, f, indent=2)
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)['cases']
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulator throughput benchmarks")
+    parser.add_argument("--quick", action="store_true", help="short traces, for smoke tests")
+    parser.add_argument("--workloads", nargs='+', choices=sorted(GENERATORS),
+                        default=list(WORKLOADS))
+    parser.add_argument("--cache-sizes", nargs='+', type=int, default=list(CACHE_SIZES))
+    parser.add_argument("--associativities", nargs='+', type=int, default=list(ASSOCIATIVITIES))
+    parser.add_argument("--policies", nargs='+', default=list(POLICIES))
+    parser.add_argument("--engines", nargs='+', choices=sorted(ENGINES), default=['batch'])
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per case (best is kept)")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="relative change that counts as a regression (default 0.10)")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="store these results as the baseline instead of comparing")
+    parser.add_argument("--imports-only", action="store_true",
+                        help="only check the import-time budgets")
+    args = parser.parse_args(argv)
+
+    print("Import times (fresh interpreter, best of 5):")
+    imports = check_imports()
+    for row in imports:
+        extra = f"  loaded {', '.join(row['forbidden_loaded'])}" if row['forbidden_loaded'] else ""
+        print(f"  {row['module']:28} {row['seconds'] * 1e3:7.1f} ms"
+              f"  (budget {row['budget'] * 1e3:.0f} ms){'' if row['ok'] else '  OVER BUDGET'}{extra}")
+    imports_ok = all(row['ok'] for row in imports)
+    if args.imports_only:
+        return 0 if imports_ok else 1
+
+    table = QUICK_WORKLOADS if args.quick else WORKLOADS
+    cases = expand_cases({name: table[name] for name in args.workloads}, args.cache_sizes,
+                         args.associativities, args.policies, args.engines)
+
+    def report(row):
+        rss = row['peak_rss_bytes']
+        rss = f"  peak RSS {rss / (1 << 20):7.1f} MiB" if rss else ""
+        print(f"  {case_key(row):55} {row['accesses_per_sec'] / 1e6:7.3f} M acc/s"
+              f"  construct {row['construct_seconds'] * 1e6:8.1f} us{rss}")
+
+    print(f"Running {len(cases)} benchmark cases...")
+    rows = run_suite(cases, repeat=args.repeat, progress=report)
+
+    if args.save_baseline:
+        write_results(args.output, rows, imports)
+        write_results(args.baseline, rows, imports)
+        print(f"Baseline saved to {args.baseline}")
+        return 0 if imports_ok else 1
+
+    if not os.path.exists(args.baseline):
+        write_results(args.output, rows, imports)
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0 if imports_ok else 1
+
+    regressions = compare(rows, load_results(args.baseline), args.threshold)
+    write_results(args.output, rows, imports, args.threshold, regressions)
+    print(f"Results written to {args.output}")
+    if not regressions:
+        print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}")
+        return 0 if imports_ok else 1
+    print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+    for regression in regressions:
+        print(f"  {regression['case']:55} {regression['metric']:18} "
+              f"{regression['baseline']:.4g} -> {regression['current']:.4g} "
+              f"({regression['change']:+.1%})")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""Per-set and per-address-region hot-spot profiling for CacheSimulator.
+
+Enabled with CacheSimulator(profile=True) (or a dict of SetProfiler
+keywords). Each set has access, miss and eviction counters in NumPy
+arrays, and two bucketed histograms count accesses and misses per address
+region (`region_size` bytes) and per tag bucket (`tag_bucket` consecutive
+tags). A set with many misses and several tags competing for it is a
+conflict hot spot; the regions show which data structures cause it.
+
+A disabled profiler costs one None check per access or batch. When
+enabled, batches are aggregated with array operations.
+"""
+import numpy as np
+
+from backend.cache_simulator import HIT, MISS_EVICT
+
+
+def _add_histogram(histogram, keys, misses):
+    """Add per-access keys and miss flags to a {bucket: [accesses, misses]} dict."""
+    if len(keys) == 0:
+        return
+    buckets, inverse = np.unique(keys, return_inverse=True)
+    accesses = np.bincount(inverse)
+    missed = np.bincount(inverse, weights=misses).astype(np.int64)
+    for bucket, count, miss_count in zip(buckets.tolist(), accesses.tolist(), missed.tolist()):
+        entry = histogram.get(bucket)
+        if entry is None:
+            histogram[bucket] = [count, miss_count]
+        else:
+            entry[0] += count
+            entry[1] += miss_count
+
+
+def _top(histogram, top, width, key_name):
+    rows = sorted(histogram.items(), key=lambda item: (-item[1][1], -item[1][0], item[0]))[:top]
+    return [{key_name: bucket * width, 'accesses': accesses, 'misses': misses,
+             'missRate': misses / accesses if accesses else 0}
+            for bucket, (accesses, misses) in rows]
+
+
+class SetProfiler:
+    def __init__(self, num_sets, block_size, region_size=4096, tag_bucket=1):
+        self.region_size = region_size
+        self.tag_bucket = tag_bucket
+        self.resize(num_sets, block_size)
+        self.regions = {}
+
+    def resize(self, num_sets, block_size):
+        """Track a new geometry; per-set and tag counts start over."""
+        self.num_sets = num_sets
+        self.block_size = block_size
+        self.accesses = np.zeros(num_sets, dtype=np.int64)
+        self.misses = np.zeros(num_sets, dtype=np.int64)
+        self.evictions = np.zeros(num_sets, dtype=np.int64)
+        self.tags = {}
+
+    def reset(self):
+        self.resize(self.num_sets, self.block_size)
+        self.regions = {}
+
+    def record(self, address, set_index, outcome):
+        """Account for one access and its _lookup outcome."""
+        self.accesses[set_index] += 1
+        missed = outcome != HIT
+        if missed:
+            self.misses[set_index] += 1
+            if outcome == MISS_EVICT:
+                self.evictions[set_index] += 1
+        for histogram, bucket in ((self.regions, address // self.region_size),
+                                  (self.tags, address // self.block_size // self.num_sets
+                                   // self.tag_bucket)):
+            entry = histogram.setdefault(bucket, [0, 0])
+            entry[0] += 1
+            entry[1] += missed
+
+    def record_batch(self, addresses, set_indices, outcomes):
+        """Account for a batch of accesses (int64 arrays) and their outcomes."""
+        misses = outcomes != HIT
+        self.accesses += np.bincount(set_indices, minlength=self.num_sets)
+        self.misses += np.bincount(set_indices[misses], minlength=self.num_sets)
+        self.evictions += np.bincount(set_indices[outcomes == MISS_EVICT], minlength=self.num_sets)
+        _add_histogram(self.regions, addresses // self.region_size, misses)
+        _add_histogram(self.tags, addresses // self.block_size // self.num_sets // self.tag_bucket,
+                       misses)
+
+    def report(self, top=16, max_cells=4096):
+        """JSON-ready summary: the hottest sets, regions and tag buckets, and
+        per-set counts for a heatmap (consecutive sets summed into at most
+        `max_cells` cells)."""
+        width = -(-self.num_sets // max_cells)
+        cells = -(-self.num_sets // width)
+
+        def binned(counts):
+            padded = np.zeros(cells * width, dtype=np.int64)
+            padded[:self.num_sets] = counts
+            return padded.reshape(cells, width).sum(axis=1).tolist()
+
+        order = np.lexsort((-self.accesses, -self.misses))[:top]
+        hot_sets = [{'set': int(s), 'accesses': int(self.accesses[s]),
+                     'misses': int(self.misses[s]), 'evictions': int(self.evictions[s]),
+                     'missRate': float(self.misses[s] / self.accesses[s]) if self.accesses[s] else 0}
+                    for s in order if self.accesses[s]]
+
+        active = int(np.count_nonzero(self.accesses))
+        total_misses = int(self.misses.sum())
+        return {
+            'numSets': self.num_sets,
+            'activeSets': active,
+            # Misses in the busiest set relative to an even spread over the active sets
+            'missImbalance': float(self.misses.max() * active / total_misses) if total_misses else 0,
+            'setsPerCell': width,
+            'sets': {'accesses': binned(self.accesses), 'misses': binned(self.misses),
+                     'evictions': binned(self.evictions)},
+            'hotSets': hot_sets,
+            'regionSize': self.region_size,
+            'hotRegions': _top(self.regions, top, self.region_size, 'address'),
+            'tagBucket': self.tag_bucket,
+            'hotTags': _top(self.tags, top, self.tag_bucket, 'tag'),
+        }
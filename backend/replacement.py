@@ -0,0 +1,778 @@
+"""Pluggable replacement policies for CacheSimulator.
+
+A Policy instance keeps the replacement state of every set of one cache.
+Lines are numbered set_index * associativity + way, like CacheState. The
+simulator calls:
+
+- victim(set_index, block) on a miss, to pick the line `block` will fill;
+- on_fill(set_index, line, block) once that line has been refilled;
+- on_hit(set_index, line) on every hit, unless `tracks_hits` is False;
+- on_hits(set_index, line, count) for `count` consecutive hits on one line
+  (runs of accesses to one block); policies with `stable_hits`, where
+  repeated hits change nothing after the first, only see one on_hit();
+- on_invalidate(set_index, line) when a line is dropped (see
+  CacheSimulator.invalidate).
+
+A policy composed with others (DuelingPolicy) is told about fills it did
+not choose through sync_fill(), which by default claims the line and calls
+on_fill().
+
+Offline policies (`offline = True`, e.g. OPT) also get the whole block
+sequence through prepare(blocks) before the simulation starts.
+
+Every built-in policy does O(1) or O(log associativity) work per call, so
+highly- and fully-associative caches cost about the same per access as
+direct-mapped ones. Per-set structures are created on first use, so
+construction stays cheap for caches with many sets.
+
+New policies subclass Policy and are registered by name:
+
+    @register_policy
+    class MRU(Policy):
+        name = 'MRU'
+        ...
+
+after which CacheSimulator(replacement_policy='MRU') uses them.
+"""
+import heapq
+from array import array
+from collections import OrderedDict
+
+POLICIES = {}
+
+
+def register_policy(cls):
+    """Class decorator that makes a Policy available under `cls.name`."""
+    if not cls.name:
+        raise ValueError(f"{cls.__name__} needs a name to be registered")
+    POLICIES[cls.name] = cls
+    return cls
+
+
+def make_policy(policy, num_sets, associativity, rng):
+    """Instantiate a policy given as a ReplacementPolicy member, name, class
+    or an existing Policy (cloned if it was built for another geometry)."""
+    if isinstance(policy, Policy):
+        if (policy.num_sets, policy.associativity) == (num_sets, associativity):
+            return policy
+        return policy.clone(num_sets, associativity, rng)
+    if isinstance(policy, type) and issubclass(policy, Policy):
+        cls = policy
+    else:
+        name = getattr(policy, 'name', policy)
+        if name not in POLICIES:
+            raise ValueError(f"Unknown replacement policy: {name} "
+                             f"(registered: {', '.join(sorted(POLICIES))})")
+        cls = POLICIES[name]
+    return cls(num_sets, associativity, rng)
+
+
+class Policy:
+    name = None
+    tracks_hits = True  # False skips on_hit calls entirely
+    offline = False     # True if prepare() must see the trace first
+    stable_hits = False  # True if hits after the first of a run change nothing
+    partitionable = True  # False if decisions depend on other sets' state
+
+    def __init__(self, num_sets, associativity, rng):
+        self.num_sets = num_sets
+        self.associativity = associativity
+        self.rng = rng
+        self.reset()
+
+    def reset(self):
+        """Forget all replacement state (the cache is empty again)."""
+        # Free lines: ways are handed out in order on a cold set, then
+        # reused as lines are invalidated
+        self.filled = array('q', bytes(8 * self.num_sets))
+        self.freed = {}
+
+    def _take_free(self, set_index):
+        """An empty line of the set, or None when the set is full."""
+        freed = self.freed.get(set_index)
+        if freed:
+            return freed.pop()
+        way = self.filled[set_index]
+        if way < self.associativity:
+            self.filled[set_index] = way + 1
+            return set_index * self.associativity + way
+        return None
+
+    def _claim(self, set_index, line):
+        """Mark a line filled by someone else as no longer free."""
+        freed = self.freed.get(set_index)
+        if freed and line in freed:
+            freed.remove(line)
+        way = line - set_index * self.associativity
+        if self.filled[set_index] <= way:
+            self.filled[set_index] = way + 1
+
+    def clone(self, num_sets, associativity, rng):
+        """A fresh, empty policy of the same kind for another geometry."""
+        return type(self)(num_sets, associativity, rng)
+
+    def prepare(self, blocks):
+        """Receive the block numbers of the whole trace (offline policies)."""
+
+    def victim(self, set_index, block):
+        raise NotImplementedError
+
+    def on_fill(self, set_index, line, block):
+        pass
+
+    def on_hit(self, set_index, line):
+        pass
+
+    def on_hits(self, set_index, line, count):
+        for _ in range(1 if self.stable_hits else count):
+            self.on_hit(set_index, line)
+
+    def on_invalidate(self, set_index, line):
+        self.freed.setdefault(set_index, []).append(line)
+
+    def sync_fill(self, set_index, line, block):
+        """on_fill() for a line another policy chose as the victim."""
+        self._claim(set_index, line)
+        self.on_fill(set_index, line, block)
+
+    def warm(self, resident):
+        """Seed the policy from a cache's resident blocks (block -> line),
+        oldest first, e.g. when switching policies mid-run."""
+        for block, line in resident.items():
+            set_index = line // self.associativity
+            self._claim(set_index, line)
+            self.on_fill(set_index, line, block)
+
+
+@register_policy
+class LRUPolicy(Policy):
+    """Least recently used, as one doubly linked recency list per set.
+
+    The links live in flat arrays (`older`/`newer` per line, `oldest`/
+    `newest` per set, holding line + 1 so 0 means none), so the metadata is
+    a fixed 16 bytes per line and 16 per set with no per-line objects.
+    """
+    name = 'LRU'
+    stable_hits = True
+
+    def reset(self):
+        super().reset()
+        lines = self.num_sets * self.associativity
+        self.older = array('q', bytes(8 * lines))
+        self.newer = array('q', bytes(8 * lines))
+        self.oldest = array('q', bytes(8 * self.num_sets))
+        self.newest = array('q', bytes(8 * self.num_sets))
+
+    def victim(self, set_index, block):
+        line = self._take_free(set_index)
+        if line is None:
+            line = self.oldest[set_index] - 1
+        return line
+
+    def on_hit(self, set_index, line):
+        key = line + 1
+        newest = self.newest
+        last = newest[set_index]
+        if last == key:
+            return
+        older = self.older
+        newer = self.newer
+        # Unlink the line if it is in the list; it is not the newest, so
+        # it has a newer neighbour
+        before = older[line]
+        if before:
+            after = newer[line]
+            newer[before - 1] = after
+            older[after - 1] = before
+        elif self.oldest[set_index] == key:
+            after = newer[line]
+            self.oldest[set_index] = after
+            older[after - 1] = 0
+        elif not last:
+            self.oldest[set_index] = key
+        # Append it as the newest
+        older[line] = last
+        newer[line] = 0
+        if last:
+            newer[last - 1] = key
+        newest[set_index] = key
+
+    def on_fill(self, set_index, line, block):
+        self.on_hit(set_index, line)
+
+    def on_invalidate(self, set_index, line):
+        before = self.older[line]
+        after = self.newer[line]
+        if before:
+            self.newer[before - 1] = after
+        else:
+            self.oldest[set_index] = after
+        if after:
+            self.older[after - 1] = before
+        else:
+            self.newest[set_index] = before
+        self.older[line] = self.newer[line] = 0
+        super().on_invalidate(set_index, line)
+
+
+@register_policy
+class FIFOPolicy(Policy):
+    """First in, first out as a per-set round-robin pointer."""
+    name = 'FIFO'
+    tracks_hits = False
+
+    def reset(self):
+        super().reset()
+        self.next_way = array('q', bytes(8 * self.num_sets))
+
+    def victim(self, set_index, block):
+        # Refill an invalidated line first; the round robin is left alone
+        freed = self.freed.get(set_index)
+        if freed:
+            return freed.pop()
+        way = self.next_way[set_index]
+        self.next_way[set_index] = (way + 1) % self.associativity
+        return set_index * self.associativity + way
+
+    def sync_fill(self, set_index, line, block):
+        self._claim(set_index, line)
+        # Continue the round robin after the line that was just filled
+        self.next_way[set_index] = (line - set_index * self.associativity + 1) % self.associativity
+
+
+@register_policy
+class RandomPolicy(Policy):
+    """Uniformly random way, drawn from the simulator's seeded RNG."""
+    name = 'RANDOM'
+    tracks_hits = False
+
+    def victim(self, set_index, block):
+        return set_index * self.associativity + self.rng.randint(0, self.associativity - 1)
+
+
+@register_policy
+class TreePLRUPolicy(Policy):
+    """Tree pseudo-LRU: associativity - 1 direction bits per set.
+
+    Finding a victim follows the bits from the root; touching a line flips
+    the bits on its path to point away from it. Both are O(log
+    associativity). Requires a power-of-two associativity.
+    """
+    name = 'PLRU'
+    stable_hits = True
+
+    def __init__(self, num_sets, associativity, rng):
+        if associativity & (associativity - 1):
+            raise ValueError("tree-PLRU needs a power-of-two associativity")
+        # For every way, the (node, bit) pairs that point away from it
+        self.paths = []
+        for way in range(associativity):
+            path = []
+            node, low, size = 0, 0, associativity
+            while size > 1:
+                size //= 2
+                left = way < low + size
+                path.append((node, 1 if left else 0))
+                if not left:
+                    low += size
+                node = 2 * node + (1 if left else 2)
+            self.paths.append(path)
+        super().__init__(num_sets, associativity, rng)
+
+    def reset(self):
+        super().reset()
+        self.bits = bytearray(self.num_sets * max(self.associativity - 1, 1))
+
+    def victim(self, set_index, block):
+        line = self._take_free(set_index)
+        if line is not None:
+            return line
+        nodes = self.associativity - 1
+        base = set_index * nodes
+        node = 0
+        while node < nodes:
+            node = 2 * node + 1 + self.bits[base + node]
+        return set_index * self.associativity + node - nodes
+
+    def on_hit(self, set_index, line):
+        bits = self.bits
+        base = set_index * (self.associativity - 1)
+        for node, bit in self.paths[line % self.associativity]:
+            bits[base + node] = bit
+
+    def on_fill(self, set_index, line, block):
+        self.on_hit(set_index, line)
+
+
+@register_policy
+class LFUPolicy(Policy):
+    """Least frequently used, ties broken by least recent use.
+
+    Each set keeps its lines in per-frequency OrderedDict buckets and
+    tracks the minimum frequency, so every operation is O(1).
+    """
+    name = 'LFU'
+
+    def reset(self):
+        super().reset()
+        self.freq = array('q', bytes(8 * self.num_sets * self.associativity))
+        self.buckets = {}   # set_index -> {frequency: OrderedDict of lines}
+        self.min_freq = {}
+
+    def _remove(self, set_index, line):
+        freq = self.freq[line]
+        buckets = self.buckets[set_index]
+        bucket = buckets[freq]
+        del bucket[line]
+        if not bucket:
+            del buckets[freq]
+            if self.min_freq[set_index] == freq:
+                self.min_freq[set_index] = min(buckets) if buckets else 0
+        self.freq[line] = 0
+
+    def _add(self, set_index, line, freq):
+        buckets = self.buckets.setdefault(set_index, {})
+        bucket = buckets.get(freq)
+        if bucket is None:
+            bucket = buckets[freq] = OrderedDict()
+        bucket[line] = None
+        self.freq[line] = freq
+        if not self.min_freq.get(set_index) or freq < self.min_freq[set_index]:
+            self.min_freq[set_index] = freq
+
+    def victim(self, set_index, block):
+        line = self._take_free(set_index)
+        if line is None:
+            bucket = self.buckets[set_index][self.min_freq[set_index]]
+            line = next(iter(bucket))
+        return line
+
+    def on_fill(self, set_index, line, block):
+        if self.freq[line]:
+            self._remove(set_index, line)
+        self._add(set_index, line, 1)
+
+    def on_hit(self, set_index, line):
+        freq = self.freq[line]
+        buckets = self.buckets[set_index]
+        bucket = buckets[freq]
+        del bucket[line]
+        if not bucket:
+            del buckets[freq]
+            if self.min_freq[set_index] == freq:
+                self.min_freq[set_index] = freq + 1
+        self._add(set_index, line, freq + 1)
+
+    def on_hits(self, set_index, line, count):
+        freq = self.freq[line]
+        self._remove(set_index, line)
+        self._add(set_index, line, freq + count)
+
+    def on_invalidate(self, set_index, line):
+        self._remove(set_index, line)
+        super().on_invalidate(set_index, line)
+
+
+@register_policy
+class SRRIPPolicy(Policy):
+    """Static re-reference interval prediction (hit-priority variant).
+
+    Lines carry a 2-bit re-reference prediction value (RRPV): fills insert
+    at MAX_RRPV - 1, hits reset to 0 and the victim is a line at
+    MAX_RRPV. Rather than aging every line when none is at MAX_RRPV, each
+    set stores RRPVs relative to an age offset and keeps one bucket per
+    value, so finding a victim looks at no more than MAX_RRPV + 1 buckets.
+    """
+    name = 'SRRIP'
+    stable_hits = True
+    MAX_RRPV = 3
+
+    def reset(self):
+        super().reset()
+        self.stored = {}   # line -> RRPV minus its set's age at insertion
+        self.sets = {}     # set_index -> [age, {stored value: OrderedDict}]
+
+    def _set(self, set_index):
+        entry = self.sets.get(set_index)
+        if entry is None:
+            entry = self.sets[set_index] = [0, {}]
+        return entry
+
+    def _place(self, set_index, line, rrpv):
+        entry = self._set(set_index)
+        old = self.stored.get(line)
+        if old is not None:
+            bucket = entry[1][old]
+            del bucket[line]
+            if not bucket:
+                del entry[1][old]
+        value = rrpv - entry[0]
+        self.stored[line] = value
+        bucket = entry[1].get(value)
+        if bucket is None:
+            bucket = entry[1][value] = OrderedDict()
+        bucket[line] = None
+
+    def insertion_rrpv(self):
+        return self.MAX_RRPV - 1
+
+    def victim(self, set_index, block):
+        line = self._take_free(set_index)
+        if line is not None:
+            return line
+        entry = self.sets[set_index]
+        age, buckets = entry
+        for rrpv in range(self.MAX_RRPV, -1, -1):
+            bucket = buckets.get(rrpv - age)
+            if bucket:
+                entry[0] = age + self.MAX_RRPV - rrpv  # Age the whole set
+                return next(iter(bucket))
+        raise RuntimeError("RRIP set has no lines")
+
+    def on_fill(self, set_index, line, block):
+        self._place(set_index, line, self.insertion_rrpv())
+
+    def on_hit(self, set_index, line):
+        self._place(set_index, line, 0)
+
+    def on_invalidate(self, set_index, line):
+        entry = self.sets[set_index]
+        old = self.stored.pop(line)
+        bucket = entry[1][old]
+        del bucket[line]
+        if not bucket:
+            del entry[1][old]
+        super().on_invalidate(set_index, line)
+
+
+@register_policy
+class BRRIPPolicy(SRRIPPolicy):
+    """Bimodal RRIP: inserts at MAX_RRPV, and at MAX_RRPV - 1 with
+    probability 1/32, which keeps thrashing working sets from flushing the
+    cache."""
+    name = 'BRRIP'
+    LONG_INSERT_PROBABILITY = 1 / 32
+
+    def insertion_rrpv(self):
+        if self.rng.random() < self.LONG_INSERT_PROBABILITY:
+            return self.MAX_RRPV - 1
+        return self.MAX_RRPV
+
+
+class _ARCSet:
+    def __init__(self):
+        self.t1 = OrderedDict()  # Resident, seen once: line -> block
+        self.t2 = OrderedDict()  # Resident, seen at least twice
+        self.b1 = OrderedDict()  # Ghost blocks evicted from t1
+        self.b2 = OrderedDict()  # Ghost blocks evicted from t2
+        self.p = 0               # Target size of t1
+        self.target = None       # List the block being filled will join
+
+
+@register_policy
+class ARCPolicy(Policy):
+    """Adaptive replacement cache (Megiddo and Modha), applied per set.
+
+    Recently-seen and frequently-seen lines live in separate LRU lists, and
+    ghost lists of recently evicted blocks steer how much of the set each
+    may use. All list operations are O(1).
+    """
+    name = 'ARC'
+    stable_hits = True  # The first hit moves a line to T2, later ones keep it at the MRU end
+
+    def reset(self):
+        super().reset()
+        self.sets = {}
+
+    def _set(self, set_index):
+        arc = self.sets.get(set_index)
+        if arc is None:
+            arc = self.sets[set_index] = _ARCSet()
+        return arc
+
+    def _replace(self, arc, in_b2):
+        t1 = arc.t1
+        if t1 and (len(t1) > arc.p or (in_b2 and len(t1) == arc.p)):
+            line, block = t1.popitem(last=False)
+            arc.b1[block] = None
+        else:
+            line, block = arc.t2.popitem(last=False)
+            arc.b2[block] = None
+        return line
+
+    def victim(self, set_index, block):
+        arc = self._set(set_index)
+        size = self.associativity
+        line = self._take_free(set_index)
+        if block in arc.b1:
+            arc.p = min(size, arc.p + max(len(arc.b2) // len(arc.b1), 1))
+            del arc.b1[block]
+            arc.target = arc.t2
+            return line if line is not None else self._replace(arc, False)
+        if block in arc.b2:
+            arc.p = max(0, arc.p - max(len(arc.b1) // len(arc.b2), 1))
+            del arc.b2[block]
+            arc.target = arc.t2
+            return line if line is not None else self._replace(arc, True)
+
+        arc.target = arc.t1
+        if len(arc.t1) + len(arc.b1) >= size:
+            if len(arc.t1) < size:
+                arc.b1.popitem(last=False)
+            elif line is None:  # t1 fills the set: drop its LRU without a ghost
+                return arc.t1.popitem(last=False)[0]
+        elif len(arc.t1) + len(arc.t2) + len(arc.b1) + len(arc.b2) >= 2 * size:
+            arc.b2.popitem(last=False)
+        return line if line is not None else self._replace(arc, False)
+
+    def on_fill(self, set_index, line, block):
+        arc = self._set(set_index)
+        target = arc.target if arc.target is not None else arc.t1
+        target[line] = block
+        arc.target = None
+
+    def sync_fill(self, set_index, line, block):
+        # The line's old block leaves as if this policy had replaced it,
+        # then the new block is admitted with the usual ghost-list adaptation
+        arc = self._set(set_index)
+        size = self.associativity
+        old = arc.t1.pop(line, None)
+        if old is not None:
+            arc.b1[old] = None
+        else:
+            old = arc.t2.pop(line, None)
+            if old is not None:
+                arc.b2[old] = None
+        if block in arc.b1:
+            arc.p = min(size, arc.p + max(len(arc.b2) // len(arc.b1), 1))
+            del arc.b1[block]
+            arc.t2[line] = block
+        elif block in arc.b2:
+            arc.p = max(0, arc.p - max(len(arc.b1) // max(len(arc.b2), 1), 1))
+            del arc.b2[block]
+            arc.t2[line] = block
+        else:
+            arc.t1[line] = block
+        for ghosts in (arc.b1, arc.b2):
+            while len(ghosts) > size:
+                ghosts.popitem(last=False)
+        self._claim(set_index, line)
+
+    def on_hit(self, set_index, line):
+        arc = self.sets[set_index]
+        block = arc.t1.pop(line, None)
+        if block is None:
+            arc.t2.move_to_end(line)
+        else:
+            arc.t2[line] = block
+
+    def on_invalidate(self, set_index, line):
+        arc = self.sets[set_index]
+        if arc.t1.pop(line, None) is None:
+            arc.t2.pop(line, None)
+        super().on_invalidate(set_index, line)
+
+
+def next_use_index(blocks):
+    """For every access, the position of the next access to the same block.
+
+    Blocks that are never accessed again get len(blocks). Computed with one
+    stable sort instead of a Python-level reverse scan, so it stays fast for
+    multi-million-access traces.
+    """
+    import numpy as np
+
+    blocks = np.asarray(blocks, dtype=np.int64)
+    n = len(blocks)
+    next_use = np.full(n, n, dtype=np.int64)
+    order = np.argsort(blocks, kind='stable')
+    same = blocks[order[1:]] == blocks[order[:-1]]
+    next_use[order[:-1][same]] = order[1:][same]
+    return next_use
+
+
+@register_policy
+class OPTPolicy(Policy):
+    """Belady's optimal (MIN) policy: evict the line reused farthest ahead.
+
+    Needs the trace in advance (CacheSimulator.prepare). Every line's next
+    use comes from next_use_index(), and each set keeps a max-heap of
+    (next use, line) entries. Hits push a fresh entry and leave the old one
+    to be skipped lazily; heaps are rebuilt once stale entries outnumber
+    the lines, so victims cost O(log associativity) amortized.
+    """
+    name = 'OPT'
+    offline = True
+
+    def __init__(self, num_sets, associativity, rng):
+        self.next_use = None
+        super().__init__(num_sets, associativity, rng)
+
+    def reset(self):
+        super().reset()
+        self.position = 0
+        self.line_next = array('q', [-1]) * (self.num_sets * self.associativity)
+        self.heaps = {}
+
+    def prepare(self, blocks):
+        self.next_use = array('q', next_use_index(blocks).tobytes())
+        self.position = 0
+
+    def warm(self, resident):
+        if resident:
+            raise ValueError("OPT cannot take over a warm cache mid-trace")
+
+    def _advance(self):
+        position = self.position
+        if self.next_use is None or position >= len(self.next_use):
+            raise RuntimeError("OPT needs the trace in advance: call "
+                               "CacheSimulator.prepare() with the whole trace first")
+        self.position = position + 1
+        return self.next_use[position]
+
+    def _push(self, set_index, line, next_use):
+        self.line_next[line] = next_use
+        heap = self.heaps.get(set_index)
+        if heap is None:
+            heap = self.heaps[set_index] = []
+        heapq.heappush(heap, (-next_use, line))
+        if len(heap) > 4 * self.associativity + 16:
+            base = set_index * self.associativity
+            line_next = self.line_next
+            heap[:] = [(-line_next[l], l) for l in range(base, base + self.associativity)
+                       if line_next[l] >= 0]
+            heapq.heapify(heap)
+
+    def victim(self, set_index, block):
+        line = self._take_free(set_index)
+        if line is not None:
+            return line
+        heap = self.heaps[set_index]
+        line_next = self.line_next
+        while True:
+            next_use, line = heapq.heappop(heap)
+            if line_next[line] == -next_use:
+                return line
+
+    def on_fill(self, set_index, line, block):
+        self._push(set_index, line, self._advance())
+
+    def on_hit(self, set_index, line):
+        self._push(set_index, line, self._advance())
+
+    def on_hits(self, set_index, line, count):
+        # Only the next use after the last hit matters
+        self.position += count - 1
+        self.on_hit(set_index, line)
+
+    def on_invalidate(self, set_index, line):
+        self.line_next[line] = -1
+        super().on_invalidate(set_index, line)
+
+
+class DuelingPolicy(Policy):
+    """Set dueling between candidate policies (Qureshi et al., DIP).
+
+    A few leader sets are dedicated to each candidate; all other (follower)
+    sets use the candidate whose leaders currently miss least. Each
+    candidate has a saturating selector counter (PSEL) that counts its
+    leader misses and all counters are halved when one saturates, so the
+    choice tracks recent behaviour. Every candidate sees every hit and fill,
+    so followers switch between warm policies at no extra cost. Duelling
+    needs at least two sets per candidate; with fewer, every set follows the
+    first candidate.
+    """
+    name = 'DUEL'
+    partitionable = False  # PSEL counters are shared by all sets
+
+    def __init__(self, num_sets, associativity, rng, candidates=('LRU', 'FIFO'),
+                 leader_sets=32, psel_bits=10):
+        if len(candidates) < 2:
+            raise ValueError("set dueling needs at least two candidate policies")
+        self.candidate_specs = tuple(candidates)
+        self.leader_sets = leader_sets
+        self.psel_max = (1 << psel_bits) - 1
+        self.candidates = [make_policy(c, num_sets, associativity, rng) for c in candidates]
+        self.tracks_hits = any(c.tracks_hits for c in self.candidates)
+        self.offline = any(c.offline for c in self.candidates)
+        self._hit_handlers = [c.on_hit for c in self.candidates if c.tracks_hits]
+
+        # leader[s] is the candidate set s leads, or -1 for a follower
+        count = len(self.candidates)
+        per_candidate = min(leader_sets, num_sets // (2 * count))
+        self.leader = array('b', [-1]) * num_sets
+        if per_candidate:
+            stride = num_sets // per_candidate
+            for start in range(0, per_candidate * stride, stride):
+                for i in range(count):
+                    self.leader[start + i * stride // count] = i
+        super().__init__(num_sets, associativity, rng)
+
+    def clone(self, num_sets, associativity, rng):
+        # The selector state carries over; the sets start afresh
+        policy = DuelingPolicy(num_sets, associativity, rng, self.candidate_specs,
+                               self.leader_sets, self.psel_max.bit_length())
+        policy.psel = list(self.psel)
+        policy.winner = self.winner
+        return policy
+
+    def reset(self):
+        super().reset()
+        for candidate in self.candidates:
+            candidate.reset()
+        self.psel = [0] * len(self.candidates)
+        self.winner = 0
+        self._chooser = None
+
+    @property
+    def winner_name(self):
+        return self.candidates[self.winner].name
+
+    def prepare(self, blocks):
+        for candidate in self.candidates:
+            candidate.prepare(blocks)
+
+    def victim(self, set_index, block):
+        line = self._take_free(set_index)
+        leader = self.leader[set_index]
+        if leader >= 0:
+            psel = self.psel
+            psel[leader] += 1
+            if psel[leader] >= self.psel_max:
+                self.psel = psel = [count // 2 for count in psel]
+            self.winner = psel.index(min(psel))
+        if line is not None:
+            self._chooser = None
+            return line
+        chooser = leader if leader >= 0 else self.winner
+        self._chooser = chooser
+        return self.candidates[chooser].victim(set_index, block)
+
+    def on_fill(self, set_index, line, block):
+        chooser = self._chooser
+        for i, candidate in enumerate(self.candidates):
+            if i == chooser:
+                candidate.on_fill(set_index, line, block)
+            else:
+                candidate.sync_fill(set_index, line, block)
+        self._chooser = None
+
+    def on_hit(self, set_index, line):
+        for on_hit in self._hit_handlers:
+            on_hit(set_index, line)
+
+    def on_hits(self, set_index, line, count):
+        for candidate in self.candidates:
+            if candidate.tracks_hits:
+                candidate.on_hits(set_index, line, count)
+
+    def on_invalidate(self, set_index, line):
+        for candidate in self.candidates:
+            candidate.on_invalidate(set_index, line)
+        super().on_invalidate(set_index, line)
+
+    def warm(self, resident):
+        for block, line in resident.items():
+            self._claim(line // self.associativity, line)
+        for candidate in self.candidates:
+            candidate.warm(resident)
@@ -0,0 +1,80 @@
+"""Optional reporting layer: tables and plots.
+
+pandas and matplotlib are imported inside the functions that need them, so
+importing this module (or the simulator core) stays cheap and code that
+never reports never loads them.
+"""
+import random
+from backend.benchmark_programs import (matrix_multiplication, random_access,
+                                        sequential_access, strided_access)
+from backend.cache_simulator import CacheSimulator, WritePolicy
+from backend.sweep import expand_grid, run_sweep
+
+def results_table(rows):
+    """pandas DataFrame of a list of result dicts"""
+    import pandas as pd
+    
+    return pd.DataFrame(rows)
+
+def format_table(rows):
+    """Result dicts as an aligned text table, one row per dict"""
+    return results_table(rows).to_string(index=False)
+
+def plot_results(df, path='results/cache_analysis.png'):
+    """Four-panel summary of a run_comparison() DataFrame, saved to `path`."""
+    import matplotlib.pyplot as plt
+    
+    fig, axes = plt.subplots(2, 2, figsize=(12, 10))
+    
+    # Plot 1: Hit Rate vs Associativity
+    for assoc in df['Associativity'].unique():
+        data = df[df['Associativity'] == assoc]
+        axes[0, 0].plot(data['Block Size'], data['Hit Rate'], 
+                        marker='o', label=f'{assoc}-way')
+    axes[0, 0].set_xlabel('Block Size (bytes)')
+    axes[0, 0].set_ylabel('Hit Rate')
+    axes[0, 0].set_title('Hit Rate vs Cache Configuration')
+    axes[0, 0].legend()
+    axes[0, 0].grid(True)
+    
+    # Plot 2: AMAT Comparison
+    for policy in df['Policy'].unique():
+        data = df[df['Policy'] == policy]
+        axes[0, 1].plot(data['Associativity'], data['AMAT'], 
+                        marker='s', label=policy)
+    axes[0, 1].set_xlabel('Associativity')
+    axes[0, 1].set_ylabel('AMAT (cycles)')
+    axes[0, 1].set_title('AMAT for Different Policies')
+    axes[0, 1].legend()
+    axes[0, 1].grid(True)
+    
+    # Plot 3: Miss Classification
+    workloads = ['Sequential', 'Random', 'Strided']
+    miss_rates = []
+    for workload in [sequential_access(5000), random_access(5000), 
+                     strided_access(5000)]:
+        sim = CacheSimulator()
+        sim.access_batch(workload)
+        miss_rates.append(sim.get_stats()['Miss Rate'])
+    
+    axes[1, 0].bar(workloads, miss_rates)
+    axes[1, 0].set_ylabel('Miss Rate')
+    axes[1, 0].set_title('Miss Rate for Different Workloads')
+    axes[1, 0].grid(True)
+    
+    # Plot 4: Memory Traffic
+    write_policies = ['Write-Through', 'Write-Back']
+    workload = matrix_multiplication(16)
+    writes = [random.random() > 0.5 for _ in workload]
+    traffic = run_sweep(
+        expand_grid(write_policy=[WritePolicy.WRITE_THROUGH, WritePolicy.WRITE_BACK]),
+        workload, writes)['Memory Traffic'].tolist()
+    
+    axes[1, 1].bar(write_policies, traffic)
+    axes[1, 1].set_ylabel('Memory Traffic (blocks)')
+    axes[1, 1].set_title('Memory Traffic Comparison')
+    axes[1, 1].grid(True)
+    
+    plt.tight_layout()
+    plt.savefig(path, dpi=300)
+    plt.show()
@@ -0,0 +1,150 @@
+"""Memoized simulation results for the web backend.
+
+Results are keyed on a normalized configuration and kept in a bounded LRU
+dict, optionally backed by one JSON file per result on disk. Concurrent
+requests for the same key are coalesced: the first caller computes the
+result and the others wait for it instead of simulating again.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+# Bump when simulator output changes so stale disk entries are not reused
+RESULT_VERSION = 2
+
+
+def config_key(config):
+    """Stable hash of a normalized (JSON-serializable) configuration."""
+    spec = {'config': config, 'version': RESULT_VERSION}
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()
+
+
+class _Flight:
+    """A computation in progress that other callers can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class ResultCache:
+    def __init__(self, max_entries=256, directory=None):
+        self.max_entries = max_entries
+        self.directory = os.path.abspath(directory) if directory else None
+        self.entries = OrderedDict()
+        self.flights = {}
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _load(self, key):
+        if self.directory is None:
+            return None
+        try:
+            with open(self._path(key)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _store(self, key, result):
+        if self.directory is None:
+            return
+        # Write to a temporary file and rename so readers never see a
+        # partial entry
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(result, f)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def _remember(self, key, result):
+        """Insert into the memory tier; caller holds the lock."""
+        self.entries[key] = result
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def get(self, key):
+        """Cached result for `key` from memory or disk, or None."""
+        with self._lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+        result = self._load(key)
+        with self._lock:
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._remember(key, result)
+        return result
+
+    def put(self, key, result):
+        with self._lock:
+            self._remember(key, result)
+        self._store(key, result)
+
+    def get_or_compute(self, key, compute):
+        """Return the cached result for `key`, calling compute() at most once.
+
+        Callers arriving while the result is being computed wait for it; if
+        the computation raises, every waiting caller sees the same error and
+        nothing is cached.
+        """
+        result = self.get(key)
+        if result is not None:
+            return result
+
+        with self._lock:
+            if key in self.entries:  # Finished while we checked the disk
+                return self.entries[key]
+            flight = self.flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.flights[key] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = compute()
+            self.put(key, flight.result)
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self.flights[key]
+            flight.done.set()
+        return flight.result
+
+    def clear(self):
+        """Drop every entry from memory and disk."""
+        with self._lock:
+            self.entries.clear()
+        if self.directory is None or not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if name.endswith('.json'):
+                os.unlink(os.path.join(self.directory, name))
+
+    def info(self):
+        with self._lock:
+            return {'entries': len(self.entries), 'maxEntries': self.max_entries,
+                    'hits': self.hits, 'misses': self.misses,
+                    'inFlight': len(self.flights), 'directory': self.directory}
@@ -0,0 +1,172 @@
+"""Single-pass LRU stack-distance (reuse-distance) profiling.
+
+For a fixed block size and set count, one pass over a trace gives the LRU
+stack distance of every access: the number of distinct other blocks of the
+same set touched since the previous access to the block. An access hits in
+an A-way LRU cache exactly when its distance is below A, so the histogram
+answers every associativity (and therefore every cache size) with that set
+count at once, instead of one CacheSimulator run per configuration.
+"""
+import numpy as np
+
+from backend.cache_simulator import WritePolicy, summarize_stats
+
+
+class ReuseProfile:
+    """Stack-distance histogram of one trace for one (block size, set count).
+
+    distance_hist[d] counts reuses at stack distance d. cold_hist[k] counts
+    first-touch misses that happened while their set already held k distinct
+    blocks; it tells whether that miss had to evict a valid line.
+    """
+
+    def __init__(self, block_size, num_sets, accesses, writes,
+                 distance_hist, cold_hist):
+        self.block_size = block_size
+        self.num_sets = num_sets
+        self.accesses = accesses
+        self.writes = writes
+        self.distance_hist = distance_hist
+        self.cold_hist = cold_hist
+        # Cumulative sums make every per-associativity query O(1)
+        self._hits_below = np.concatenate(([0], np.cumsum(distance_hist)))
+        self._cold_below = np.concatenate(([0], np.cumsum(cold_hist)))
+
+    @property
+    def cold_misses(self):
+        return int(self._cold_below[-1])
+
+    def hits(self, associativity):
+        d = min(associativity, len(self.distance_hist))
+        return int(self._hits_below[d])
+
+    def misses(self, associativity):
+        return self.accesses - self.hits(associativity)
+
+    def evictions(self, associativity):
+        """Misses that replace a valid line in an LRU cache of this associativity."""
+        reuse_misses = int(self._hits_below[-1]) - self.hits(associativity)
+        k = min(associativity, len(self.cold_hist))
+        return reuse_misses + self.cold_misses - int(self._cold_below[k])
+
+    def cache_size(self, associativity):
+        return self.num_sets * associativity * self.block_size
+
+    def stats(self, associativity, write_policy=WritePolicy.WRITE_BACK,
+              hit_time=1, miss_penalty=10):
+        """Return CacheSimulator.get_stats() for an LRU cache of this associativity."""
+        hits = self.hits(associativity)
+        misses = self.accesses - hits
+        traffic = misses  # Read from memory
+        if write_policy == WritePolicy.WRITE_THROUGH:
+            traffic += self.writes
+        else:
+            traffic += self.evictions(associativity)
+        cycles = hits * hit_time + misses * miss_penalty
+        return summarize_stats(self.accesses, hits, misses, cycles, traffic,
+                               hit_time, miss_penalty)
+
+
+def profile_trace(addresses, block_size, num_sets=1, is_write=None):
+    """Build the ReuseProfile of a trace in one pass.
+
+    The trace is laid out set by set (time order kept within a set), so
+    every stack distance becomes a range query over that layout; see
+    _stack_distances.
+    """
+    addresses = np.asarray(addresses, dtype=np.int64)
+    n = len(addresses)
+    writes = 0 if is_write is None else int(np.count_nonzero(is_write))
+    blocks = addresses // block_size
+    sets = blocks % num_sets
+
+    # Slot of every access when the trace is grouped by set (time order kept)
+    by_set = np.argsort(sets, kind='stable')
+    pos = np.empty(n, dtype=np.int64)
+    pos[by_set] = np.arange(n)
+
+    # Slot of the previous access to the same block, or -1 on first touch
+    by_block = np.argsort(blocks, kind='stable')
+    same = blocks[by_block[1:]] == blocks[by_block[:-1]]
+    prev_pos = np.full(n, -1, dtype=np.int64)
+    prev_pos[by_block[1:][same]] = pos[by_block[:-1][same]]
+
+    # Distinct blocks already seen in the set at each first touch
+    first = (prev_pos < 0)[by_set]
+    sets_grouped = sets[by_set]
+    seen = np.cumsum(first) - first
+    set_start = np.searchsorted(sets_grouped, np.arange(num_sets))
+    cold_distinct = seen - seen[set_start[sets_grouped]]
+    cold_hist = np.bincount(cold_distinct[first], minlength=1)
+
+    distance_hist = np.bincount(_stack_distances(pos, prev_pos), minlength=1)
+
+    return ReuseProfile(block_size, num_sets, n, writes, distance_hist, cold_hist)
+
+
+def _stack_distances(pos, prev_pos):
+    """Stack distance of every reuse, in trace order.
+
+    The distance of a reuse at slot p whose previous access is at slot q is
+    the number of slots j in (q, p) whose block is not touched again before
+    p, i.e. (p - q - 1) minus the number of reuse intervals [j, next[j]]
+    nested inside (q, p). Those intervals are counted for all reuses at once
+    with a merge-sort tree: one sorted array per power-of-two node size,
+    queried with vectorized searchsorted, so the work is O(n log n) in NumPy
+    rather than a per-access Python loop.
+    """
+    n = len(pos)
+    reuse = prev_pos >= 0
+    p = pos[reuse]
+    q = prev_pos[reuse]
+    next_pos = np.full(n, n, dtype=np.int64)
+    next_pos[q] = p
+
+    # nested = count{j > q : next[j] < p} = count{next < p} - count{j <= q : next[j] < p}
+    nested = np.searchsorted(np.sort(next_pos), p)
+    prefix_end = q + 1
+    slots = np.arange(n, dtype=np.int64)
+    stride = n + 1
+    level = 0
+    while (1 << level) <= n:
+        # Node k of this level covers slots [k << level, (k + 1) << level)
+        in_prefix = (prefix_end >> level) & 1 == 1
+        if in_prefix.any():
+            keys = np.sort((slots >> level) * stride + next_pos)
+            node = (prefix_end[in_prefix] >> level) - 1
+            nested[in_prefix] -= (np.searchsorted(keys, node * stride + p[in_prefix])
+                                  - (node << level))
+        level += 1
+    return (p - q - 1) - nested
+
+
+def lru_sweep(addresses, cache_sizes, block_sizes, associativities,
+              is_write=None, write_policy=WritePolicy.WRITE_BACK,
+              hit_time=1, miss_penalty=10):
+    """LRU stats for every cache size x block size x associativity point.
+
+    One profile is built per distinct (block size, set count) pair and all
+    associativities sharing it are read off the same histogram. Rows have
+    the get_stats() keys plus the configuration columns used in
+    results/simulation_results.csv.
+    """
+    profiles = {}
+    rows = []
+    for cache_size in cache_sizes:
+        for block_size in block_sizes:
+            for assoc in associativities:
+                num_sets = cache_size // (block_size * assoc)
+                if num_sets == 0:
+                    continue
+                key = (block_size, num_sets)
+                if key not in profiles:
+                    profiles[key] = profile_trace(addresses, block_size,
+                                                  num_sets, is_write)
+                stats = profiles[key].stats(assoc, write_policy,
+                                            hit_time, miss_penalty)
+                stats['Associativity'] = assoc
+                stats['Block Size'] = block_size
+                stats['Policy'] = 'LRU'
+                stats['Cache Size'] = cache_size
+                rows.append(stats)
+    return rows
@@ -0,0 +1,222 @@
+"""Statistical set and time sampling for CacheSimulator.
+
+Set sampling simulates only a random subset of the cache sets. Time
+sampling (SMARTS-style) simulates a measured window of `window` accesses
+once every `period` accesses, preceded by `warmup` accesses that update the
+cache without being counted; the rest of the trace is skipped. Both can be
+combined, and the work done shrinks with the sampled fraction.
+
+get_stats() on a sampled simulator extrapolates hits, misses, traffic and
+AMAT to the whole trace with ratio estimators and adds normal-approximation
+confidence intervals. Counters are kept per (window, set); the variance
+between sets and, under time sampling, between windows both contribute to
+the interval. The intervals cover sampling error only: a warm-up that is
+too short for the cache biases the estimate.
+"""
+import math
+from statistics import NormalDist
+
+import numpy as np
+
+from backend.cache_simulator import HIT, MISS_EVICT, WritePolicy, summarize_stats
+
+# Kind of each access under a sampling plan
+SKIPPED = 0
+WARMUP = 1
+MEASURED = 2
+
+
+class Sampler:
+    def __init__(self, set_fraction=1.0, period=0, window=0, warmup=0,
+                 seed=0, confidence=0.95):
+        if not 0 < set_fraction <= 1:
+            raise ValueError("set_fraction must be in (0, 1]")
+        if period:
+            if window <= 0 or warmup < 0 or window + warmup > period:
+                raise ValueError("time sampling needs 0 < window and window + warmup <= period")
+        elif set_fraction == 1:
+            raise ValueError("sampling needs set_fraction < 1 or a period")
+        if not 0 < confidence < 1:
+            raise ValueError("confidence must be in (0, 1)")
+        self.set_fraction = set_fraction
+        self.period = period
+        self.window = window
+        self.warmup = warmup
+        self.seed = seed
+        self.confidence = confidence
+        self.set_mask = None
+        self.reset()
+
+    def bind(self, sim):
+        """Pick the sampled sets of `sim` (at least one)."""
+        count = max(1, round(sim.num_sets * self.set_fraction))
+        chosen = np.random.default_rng(self.seed).choice(sim.num_sets, count, replace=False)
+        self.set_mask = np.zeros(sim.num_sets, dtype=bool)
+        self.set_mask[chosen] = True
+        self.reset()
+
+    def reset(self):
+        self.position = 0  # Accesses seen, simulated or not
+        self.start = 0     # Position the statistics were last reset at
+        self.units = {}    # (window, set) -> [accesses, misses, traffic]
+
+    def reset_stats(self):
+        """Forget the measurements but keep the position, so the sampling
+        phase (and an offline policy's view of the trace) carries on."""
+        self.start = self.position
+        self.units = {}
+
+    @property
+    def sampled_sets(self):
+        return int(np.count_nonzero(self.set_mask))
+
+    def _kinds(self, sim, addresses):
+        """SKIPPED / WARMUP / MEASURED for accesses starting at self.position."""
+        if self.period:
+            phase = (self.position + np.arange(len(addresses))) % self.period
+            measured_from = self.period - self.window
+            kinds = np.where(phase >= measured_from, MEASURED,
+                             np.where(phase >= measured_from - self.warmup, WARMUP, SKIPPED))
+        else:
+            kinds = np.full(len(addresses), MEASURED)
+        if self.set_fraction < 1:
+            sets = (addresses // sim.block_size) % sim.num_sets
+            kinds[~self.set_mask[sets]] = SKIPPED
+        return kinds
+
+    def select(self, sim, addresses):
+        """The accesses (from the current position on) that will be simulated."""
+        addresses = np.asarray(addresses, dtype=np.int64)
+        return addresses[self._kinds(sim, addresses) != SKIPPED]
+
+    def access_batch(self, sim, addresses, is_write):
+        """Simulate the sampled part of a batch on `sim`."""
+        kinds = self._kinds(sim, addresses)
+        start = self.position
+        self.position += len(addresses)
+        selected = np.flatnonzero(kinds)
+        if not len(selected):
+            return
+        kinds = kinds[selected]
+
+        # Runs of warm-up and measured accesses, in trace order
+        bounds = np.flatnonzero(kinds[1:] != kinds[:-1]) + 1
+        for first, run in zip(np.concatenate(([0], bounds)), np.split(selected, bounds)):
+            if kinds[first] == WARMUP:
+                sim._warm_batch(addresses[run], is_write[run])
+                continue
+            # Timeline windows are placed at trace positions, not sampled counts
+            outcomes = sim._simulate_batch(addresses[run], is_write[run],
+                                           start + run - self.start)
+            misses = outcomes != HIT
+            if sim.write_policy == WritePolicy.WRITE_BACK:
+                traffic = misses.astype(np.int64) + (outcomes == MISS_EVICT)
+            else:
+                traffic = misses.astype(np.int64) + is_write[run]
+            windows = (start + run) // self.period if self.period else np.zeros(len(run), dtype=np.int64)
+            sets = (addresses[run] // sim.block_size) % sim.num_sets
+            self._tally(windows * sim.num_sets + sets, sim.num_sets, misses, traffic)
+
+    def _tally(self, units, num_sets, misses, traffic):
+        keys, inverse = np.unique(units, return_inverse=True)
+        columns = (np.bincount(inverse),
+                   np.bincount(inverse, weights=misses),
+                   np.bincount(inverse, weights=traffic))
+        for key, accesses, missed, moved in zip(keys.tolist(), *(c.tolist() for c in columns)):
+            unit = self.units.setdefault(divmod(key, num_sets), [0, 0, 0])
+            unit[0] += accesses
+            unit[1] += int(missed)
+            unit[2] += int(moved)
+
+    @staticmethod
+    def _ratio_variance(accesses, values, fraction):
+        """Variance of the ratio estimator sum(values) / sum(accesses) over
+        units drawn without replacement; `fraction` is the share of all
+        units that was measured. None with fewer than two units."""
+        n = len(accesses)
+        if n < 2:
+            return None
+        ratio = values.sum() / accesses.sum()
+        spread = ((values - ratio * accesses) ** 2).sum() / (n - 1)
+        return max(0.0, 1 - fraction) * spread / n / accesses.mean() ** 2
+
+    def _ratio_interval(self, keys, counts, column):
+        """Ratio estimate of counts[:, column] per access and its interval."""
+        ratio = counts[:, column].sum() / counts[:, 0].sum()
+        variances = []
+        groupings = []
+        if self.set_fraction < 1:
+            groupings.append((keys[:, 1], self.sampled_sets / len(self.set_mask)))
+        if self.period:
+            groupings.append((keys[:, 0], self.window / self.period))
+        for groups, fraction in groupings:
+            _, inverse = np.unique(groups, return_inverse=True)
+            variances.append(self._ratio_variance(np.bincount(inverse, weights=counts[:, 0]),
+                                                  np.bincount(inverse, weights=counts[:, column]),
+                                                  fraction))
+        if None in variances:
+            return ratio, None
+        error = math.sqrt(sum(variances))
+        z = NormalDist().inv_cdf((1 + self.confidence) / 2)
+        return ratio, (float(ratio - z * error), float(ratio + z * error))
+
+    def estimate(self, sim):
+        """Whole-trace get_stats() estimate from the measured accesses."""
+        keys = np.array(list(self.units), dtype=np.int64).reshape(-1, 2)
+        counts = np.array(list(self.units.values()), dtype=np.float64).reshape(-1, 3)
+        total = self.position - self.start
+        if not counts[:, 0].sum():
+            stats = summarize_stats(total, 0, 0, 0, 0, sim.hit_time, sim.miss_penalty)
+            miss_interval = traffic_interval = None
+        else:
+            miss_rate, miss_interval = self._ratio_interval(keys, counts, 1)
+            traffic_rate, traffic_interval = self._ratio_interval(keys, counts, 2)
+            estimated_misses = round(miss_rate * total)
+            estimated_hits = total - estimated_misses
+            stats = summarize_stats(total, estimated_hits, estimated_misses,
+                                    estimated_hits * sim.hit_time + estimated_misses * sim.miss_penalty,
+                                    round(traffic_rate * total), sim.hit_time, sim.miss_penalty)
+
+        if sim.classifier is not None:
+            scale = stats['Misses'] / sim.misses if sim.misses else 0
+            stats.update({name: round(count * scale)
+                          for name, count in sim.classifier.counts().items()})
+
+        stats['Sampled Accesses'] = sim.accesses
+        stats['Sampled Sets'] = self.sampled_sets
+        stats['Sampled Windows'] = len(set(keys[:, 0].tolist())) if self.period else 0
+        stats['Confidence'] = self.confidence
+        if miss_interval is None:
+            stats['Miss Rate CI'] = stats['AMAT CI'] = stats['Memory Traffic CI'] = None
+        else:
+            low, high = max(0.0, miss_interval[0]), min(1.0, miss_interval[1])
+            stats['Miss Rate CI'] = (low, high)
+            stats['AMAT CI'] = (sim.hit_time + low * sim.miss_penalty,
+                                sim.hit_time + high * sim.miss_penalty)
+            stats['Memory Traffic CI'] = (max(0.0, traffic_interval[0]) * total,
+                                          traffic_interval[1] * total)
+        return stats
+
+
+def add_sampling_arguments(parser):
+    """Command-line options for a sampling plan (see sampling_from_args)."""
+    group = parser.add_argument_group("sampling (estimates with confidence intervals)")
+    group.add_argument("--sample-sets", type=float, default=1.0, metavar="FRACTION",
+                       help="simulate only this fraction of the cache sets")
+    group.add_argument("--sample-period", type=int, default=0, metavar="N",
+                       help="time sampling: one measured window every N accesses")
+    group.add_argument("--sample-window", type=int, default=1000, metavar="N",
+                       help="accesses per measured window")
+    group.add_argument("--sample-warmup", type=int, default=1000, metavar="N",
+                       help="unmeasured warm-up accesses before each window")
+
+
+def sampling_from_args(args):
+    """CacheSimulator `sampling` keyword for parsed arguments, or None."""
+    if args.sample_sets >= 1 and not args.sample_period:
+        return None
+    sampling = {'set_fraction': min(args.sample_sets, 1.0)}
+    if args.sample_period:
+        sampling.update(period=args.sample_period, window=args.sample_window,
+                        warmup=args.sample_warmup)
+    return sampling
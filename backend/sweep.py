@@ -0,0 +1,130 @@
+"""Parallel configuration sweeps over a shared trace.
+
+Every point of a sweep is an independent CacheSimulator run, so the grid is
+fanned out over a process pool. The trace is copied once into a shared
+memory block that workers attach to at start-up; tasks only carry their
+configuration, never the addresses.
+"""
+import hashlib
+import itertools
+import json
+import os
+from multiprocessing import Pool, shared_memory
+
+import numpy as np
+
+from backend.cache_simulator import CacheSimulator
+
+# Trace attached by each pool worker (see _attach_trace)
+_trace_shm = None
+_trace_addresses = None
+_trace_writes = None
+
+
+def expand_grid(**axes):
+    """Cartesian product of CacheSimulator keyword values as a list of dicts.
+
+    expand_grid(associativity=[1, 2], block_size=[32, 64]) gives four
+    configs; the last keyword varies fastest.
+    """
+    names = list(axes)
+    return [dict(zip(names, values))
+            for values in itertools.product(*axes.values())]
+
+
+def task_seed(seed, config):
+    """Deterministic RNG seed for one sweep point.
+
+    Derived from the configuration itself rather than its position in the
+    grid, so a point gives the same RANDOM-policy result in any sweep.
+    """
+    key = json.dumps({k: getattr(v, 'name', v) for k, v in config.items()},
+                     sort_keys=True)
+    digest = hashlib.sha256(f"{seed}:{key}".encode()).digest()
+    return int.from_bytes(digest[:8], 'little')
+
+
+def result_row(sim):
+    """get_stats() plus the configuration columns of simulation_results.csv."""
+    row = sim.get_stats()
+    row['Associativity'] = sim.associativity
+    row['Block Size'] = sim.block_size
+    row['Policy'] = sim.policy_name
+    row['Cache Size'] = sim.cache_size
+    row['Write Policy'] = sim.write_policy.name
+    return row
+
+
+def _simulate(config, seed, addresses, is_write):
+    sim = CacheSimulator(seed=seed, **config)
+    sim.prepare(addresses)  # Offline policies (OPT) see the trace first
+    sim.access_batch(addresses, is_write)
+    return result_row(sim)
+
+
+def _attach_trace(name, length, has_writes):
+    global _trace_shm, _trace_addresses, _trace_writes
+    _trace_shm = shared_memory.SharedMemory(name=name)
+    _trace_addresses = np.ndarray(length, dtype=np.int64, buffer=_trace_shm.buf)
+    if has_writes:
+        _trace_writes = np.ndarray(length, dtype=bool, buffer=_trace_shm.buf,
+                                   offset=length * 8)
+
+
+def _run_task(task):
+    index, config, seed = task
+    return index, _simulate(config, seed, _trace_addresses, _trace_writes)
+
+
+def iter_sweep(configs, addresses, is_write=None, processes=None, seed=0):
+    """Simulate every config against one trace, yielding (index, row) pairs
+    as points finish, in completion order.
+
+    Same arguments as run_sweep(); lets callers persist each result as soon
+    as it exists rather than when the whole sweep is done.
+    """
+    addresses = np.asarray(addresses, dtype=np.int64)
+    if is_write is not None:
+        is_write = np.asarray(is_write, dtype=bool)
+    tasks = [(i, config, task_seed(seed, config))
+             for i, config in enumerate(configs)]
+    if not tasks:
+        return
+    if processes is None:
+        processes = os.cpu_count() or 1
+    processes = max(1, min(processes, len(tasks)))
+
+    if processes == 1:
+        for index, config, config_seed in tasks:
+            yield index, _simulate(config, config_seed, addresses, is_write)
+        return
+
+    length = len(addresses)
+    size = length * 8 + (length if is_write is not None else 0)
+    shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    try:
+        np.ndarray(length, dtype=np.int64, buffer=shm.buf)[:] = addresses
+        if is_write is not None:
+            np.ndarray(length, dtype=bool, buffer=shm.buf, offset=length * 8)[:] = is_write
+        with Pool(processes, initializer=_attach_trace,
+                  initargs=(shm.name, length, is_write is not None)) as pool:
+            yield from pool.imap_unordered(_run_task, tasks)
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def run_sweep(configs, addresses, is_write=None, processes=None, seed=0):
+    """Simulate every config against one trace and collect a DataFrame.
+
+    `configs` is a list of CacheSimulator keyword dicts (see expand_grid).
+    Rows come back in config order whatever order the workers finish in.
+    With processes=1 the sweep runs in-process, which is handy for
+    debugging and gives identical results.
+    """
+    import pandas as pd  # Only the parent builds the table; workers never need it
+
+    rows = [None] * len(configs)
+    for index, row in iter_sweep(configs, addresses, is_write, processes, seed):
+        rows[index] = row
+    return pd.DataFrame(rows)
@@ -0,0 +1,224 @@
+"""Resumable command-line sweeps over a config grid x a list of traces.
+
+A sweep spec is a JSON file:
+
+    {
+      "grid": {"cache_size": [4096, 16384, 65536],
+               "associativity": [1, 2, 4, 8],
+               "replacement_policy": ["LRU", "FIFO", "SRRIP"],
+               "write_policy": ["WRITE_BACK"]},
+      "traces": [{"generator": "matrix_multiplication", "params": {"n": 32}},
+                 {"generator": "random_access", "seed": 1, "params": {"n": 100000},
+                  "write_every": 3},
+                 {"path": "results/traces/gcc.din"}],
+      "seed": 0
+    }
+
+`grid` values are CacheSimulator keywords (policies by name) expanded with
+expand_grid(); every point is simulated on every trace. Each result is
+appended to a ColumnStore (backend.sweep_store) as soon as it finishes,
+and points whose key is already stored are skipped, so an interrupted
+sweep simply continues where it stopped:
+
+    python -m backend.sweep_cli run spec.json --store results/sweeps/overnight
+    python -m backend.sweep_cli run spec.json --store ... --shard 2/8   # machine 3 of 8
+    python -m backend.sweep_cli status spec.json --store ...
+    python -m backend.sweep_cli export --store ... --csv results/overnight.csv
+
+A point's key hashes its trace, configuration and seed, and a trace file
+is identified by its path, size and modification time, so editing the
+spec or a trace only recomputes what changed. Randomized generators
+without their own "seed" use the sweep's seed, so every run and shard
+sees the same trace. Shard i of n takes the points whose index is i
+modulo n.
+"""
+import argparse
+import hashlib
+import json
+import os
+import signal
+import sys
+
+import numpy as np
+
+from backend.cache_simulator import ReplacementPolicy, WritePolicy
+from backend.sweep import expand_grid, iter_sweep
+from backend.sweep_store import ColumnStore
+
+# Bump when simulator output changes so stored results are recomputed
+SWEEP_VERSION = 2
+
+
+def load_spec(path):
+    with open(path) as f:
+        spec = json.load(f)
+    if not spec.get('grid') or not spec.get('traces'):
+        raise ValueError("a sweep spec needs a 'grid' and a list of 'traces'")
+    return spec
+
+
+def build_config(point):
+    """CacheSimulator keywords for one grid point (policy names resolved)."""
+    config = dict(point)
+    if isinstance(config.get('write_policy'), str):
+        config['write_policy'] = WritePolicy[config['write_policy']]
+    policy = config.get('replacement_policy')
+    if isinstance(policy, str) and policy in ReplacementPolicy.__members__:
+        config['replacement_policy'] = ReplacementPolicy[policy]
+    return config
+
+
+def trace_seed(trace, seed):
+    """Seed of a generated trace: its own, else the sweep's for randomized
+    generators, which would otherwise give a different trace on every run."""
+    from backend.trace_cache import RANDOMIZED
+
+    if trace.get('seed') is not None or trace['generator'] not in RANDOMIZED:
+        return trace.get('seed')
+    return seed
+
+
+def trace_identity(trace, seed=0):
+    """What a trace's results depend on: generator arguments or file stamp."""
+    if 'path' in trace:
+        path = os.path.abspath(trace['path'])
+        info = os.stat(path)
+        return {'path': path, 'size': info.st_size, 'mtime_ns': info.st_mtime_ns}
+    return {'generator': trace['generator'], 'params': trace.get('params', {}),
+            'seed': trace_seed(trace, seed), 'write_every': trace.get('write_every')}
+
+
+def trace_label(trace):
+    if 'path' in trace:
+        return trace.get('name', os.path.basename(trace['path']))
+    params = ','.join(f"{k}={v}" for k, v in sorted(trace.get('params', {}).items()))
+    return trace.get('name', f"{trace['generator']}({params})")
+
+
+def load_trace(trace, seed=0):
+    """(addresses, is_write) arrays for a spec trace (`seed` as for trace_seed)."""
+    if 'path' in trace:
+        from backend.trace_io import open_trace
+
+        chunks = list(open_trace(trace['path']))
+        addresses = np.concatenate([a for a, _ in chunks]) if chunks else np.zeros(0, np.int64)
+        is_write = None
+        if chunks and chunks[0][1] is not None:
+            is_write = np.concatenate([w for _, w in chunks])
+        return addresses, is_write
+
+    from backend.trace_cache import cached_trace
+
+    addresses = np.asarray(cached_trace(trace['generator'], seed=trace_seed(trace, seed),
+                                        **trace.get('params', {})).addresses, dtype=np.int64)
+    is_write = None
+    if trace.get('write_every'):
+        is_write = np.arange(len(addresses)) % trace['write_every'] == 0
+    return addresses, is_write
+
+
+def point_key(identity, point, seed):
+    spec = {'trace': identity, 'config': point, 'seed': seed, 'version': SWEEP_VERSION}
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()
+
+
+def plan(spec, shard=0, shards=1):
+    """Every point of this shard as (index, trace, grid point, key), in order."""
+    points = expand_grid(**spec['grid'])
+    seed = spec.get('seed', 0)
+    planned = []
+    index = 0
+    for trace in spec['traces']:
+        identity = trace_identity(trace, seed)
+        for point in points:
+            if index % shards == shard:
+                planned.append((index, trace, point, point_key(identity, point, seed)))
+            index += 1
+    return planned
+
+
+def run(spec, store, shard=0, shards=1, processes=None, progress=None):
+    """Simulate this shard's points that `store` does not have yet.
+
+    Returns the number of points simulated. `progress(done, pending)` is
+    called after each stored result.
+    """
+    seed = spec.get('seed', 0)
+    pending = [item for item in plan(spec, shard, shards) if item[3] not in store]
+    done = 0
+    for trace in spec['traces']:
+        todo = [item for item in pending if item[1] is trace]
+        if not todo:
+            continue
+        addresses, is_write = load_trace(trace, seed)
+        label = trace_label(trace)
+        configs = [build_config(point) for _, _, point, _ in todo]
+        for position, row in iter_sweep(configs, addresses, is_write, processes, seed):
+            index, _, point, key = todo[position]
+            store.append(dict(row, key=key, point=index, trace=label,
+                              config=json.dumps(point, sort_keys=True)))
+            done += 1
+            if progress is not None:
+                progress(done, len(pending))
+    return done
+
+
+def _parse_shard(text):
+    shard, shards = (int(part) for part in text.split('/'))
+    if not 0 <= shard < shards:
+        raise argparse.ArgumentTypeError("shard must be I/N with 0 <= I < N")
+    return shard, shards
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Resumable cache configuration sweeps")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="simulate the points not stored yet")
+    status_parser = commands.add_parser('status', help="count stored and pending points")
+    for sub in (run_parser, status_parser):
+        sub.add_argument('spec', help="sweep spec (JSON)")
+        sub.add_argument('--store', required=True, help="result store directory")
+        sub.add_argument('--shard', type=_parse_shard, default=(0, 1), metavar='I/N',
+                         help="only the points with index %% N == I (default 0/1)")
+    run_parser.add_argument('--processes', type=int, default=None,
+                            help="worker processes (default: one per CPU)")
+
+    export_parser = commands.add_parser('export', help="write the stored results as CSV")
+    export_parser.add_argument('--store', required=True)
+    export_parser.add_argument('--csv', required=True, help="output CSV path")
+    args = parser.parse_args(argv)
+
+    if args.command == 'export':
+        frame = ColumnStore(args.store, writer='export').to_frame()
+        if 'point' in frame:
+            frame = frame.sort_values('point')
+        frame.to_csv(args.csv, index=False)
+        print(f"Wrote {len(frame)} rows to {args.csv}")
+        return 0
+
+    # Exit through the normal cleanup path (journal close, shared memory
+    # unlink) when a batch scheduler sends SIGTERM
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(128 + signum))
+
+    spec = load_spec(args.spec)
+    shard, shards = args.shard
+    with ColumnStore(args.store, writer=f"shard{shard}of{shards}") as store:
+        if args.command == 'status':
+            planned = plan(spec, shard, shards)
+            stored = sum(1 for item in planned if item[3] in store)
+            print(f"shard {shard}/{shards}: {stored} of {len(planned)} points stored, "
+                  f"{len(planned) - stored} pending")
+            return 0
+
+        def report(done, pending):
+            if done == pending or done % 10 == 0:
+                print(f"  {done}/{pending} points", flush=True)
+
+        done = run(spec, store, shard, shards, args.processes, progress=report)
+        print(f"shard {shard}/{shards}: simulated {done} points, {len(store)} stored in total")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,189 @@
+"""Append-only columnar store for sweep results.
+
+A store is a directory of immutable segments, each an .npz file holding
+one array per column, plus one journal per writer. Every row is appended
+to the writer's JSON-lines journal and fsynced as soon as it is added, so
+a crash loses at most the row being written. Once the journal holds
+`segment_rows` rows (and on close) they are written out as a new segment
+and the journal is emptied. Segments and journals are never rewritten in
+place, so readers always see a consistent set of complete rows.
+
+Writers with different `writer` names (e.g. sweep shards on different
+machines) use disjoint file names and can share a directory, or have their
+directories merged by copying the files together. Rows are identified by
+their 'key' column; duplicates (which a crash between writing a segment
+and emptying the journal can leave behind) are ignored on read.
+"""
+import json
+import os
+import tempfile
+
+import numpy as np
+
+SEGMENT_PREFIX = 'segment-'
+JOURNAL_PREFIX = 'journal-'
+
+
+def _cell(value):
+    """Store scalars as they are and anything else as its JSON text."""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, np.generic):
+        return value.item()
+    return json.dumps(value, default=str)
+
+
+def _column(values):
+    """Array for one column of a segment; None marks a missing value."""
+    present = [v for v in values if v is not None]
+    if present and all(isinstance(v, bool) for v in present) and len(present) == len(values):
+        return np.array(values, dtype=bool)
+    if present and all(isinstance(v, int) and not isinstance(v, bool) for v in present) \
+            and len(present) == len(values):
+        return np.array(values, dtype=np.int64)
+    if present and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in present):
+        return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+    return np.array(['' if v is None else str(v) for v in values], dtype=str)
+
+
+class ColumnStore:
+    def __init__(self, directory, writer='0', segment_rows=256):
+        self.directory = os.path.abspath(directory)
+        self.writer = str(writer)
+        self.segment_rows = segment_rows
+        os.makedirs(self.directory, exist_ok=True)
+        self.journal_path = os.path.join(self.directory, f"{JOURNAL_PREFIX}{self.writer}.jsonl")
+        self._journal = None
+        self._pending = self._read_journal(self.journal_path)
+        self._keys = self._scan_keys()
+        if self._pending:  # Rows recovered from a previous run
+            self.flush()
+
+    # Reading
+
+    def _segment_paths(self):
+        return sorted(os.path.join(self.directory, name) for name in os.listdir(self.directory)
+                      if name.startswith(SEGMENT_PREFIX) and name.endswith('.npz'))
+
+    def _journal_paths(self):
+        return sorted(os.path.join(self.directory, name) for name in os.listdir(self.directory)
+                      if name.startswith(JOURNAL_PREFIX) and name.endswith('.jsonl'))
+
+    @staticmethod
+    def _read_journal(path):
+        """Complete rows of a journal; a torn last line is dropped."""
+        rows = []
+        try:
+            with open(path) as f:
+                for line in f:
+                    try:
+                        rows.append(json.loads(line))
+                    except ValueError:
+                        break
+        except FileNotFoundError:
+            pass
+        return rows
+
+    def _scan_keys(self):
+        keys = set()
+        for path in self._segment_paths():
+            with np.load(path, allow_pickle=False) as segment:
+                keys.update(segment['key'].tolist())
+        for path in self._journal_paths():
+            keys.update(row['key'] for row in self._read_journal(path))
+        return keys
+
+    def keys(self):
+        """Keys of every row stored so far, by any writer."""
+        return set(self._keys)
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def __len__(self):
+        return len(self._keys)
+
+    def read(self):
+        """Every stored row as a dict of columns (lists), first copy of each key."""
+        rows = []
+        seen = set()
+
+        def take(row):
+            if row['key'] not in seen:
+                seen.add(row['key'])
+                rows.append(row)
+
+        for path in self._segment_paths():
+            with np.load(path, allow_pickle=False) as segment:
+                names = list(segment.files)
+                columns = [segment[name].tolist() for name in names]
+            for values in zip(*columns):
+                take({name: value for name, value in zip(names, values)
+                      if not (isinstance(value, float) and np.isnan(value))})
+        for path in self._journal_paths():
+            for row in self._read_journal(path):
+                take(row)
+        names = list(dict.fromkeys(name for row in rows for name in row))
+        return {name: [row.get(name) for row in rows] for name in names}
+
+    def to_frame(self):
+        """read() as a pandas DataFrame."""
+        import pandas as pd
+
+        return pd.DataFrame(self.read())
+
+    # Writing
+
+    def append(self, row):
+        """Durably add one row; it must have a string 'key'."""
+        row = {name: _cell(value) for name, value in row.items()}
+        if not isinstance(row.get('key'), str):
+            raise ValueError("rows need a string 'key'")
+        if self._journal is None:
+            self._journal = open(self.journal_path, 'a')
+        self._journal.write(json.dumps(row) + '\n')
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+        self._pending.append(row)
+        self._keys.add(row['key'])
+        if len(self._pending) >= self.segment_rows:
+            self.flush()
+
+    def flush(self):
+        """Move journaled rows into a new segment and empty the journal."""
+        if not self._pending:
+            return
+        names = list(dict.fromkeys(name for row in self._pending for name in row))
+        columns = {name: _column([row.get(name) for row in self._pending]) for name in names}
+
+        sequence = len([path for path in self._segment_paths()
+                        if os.path.basename(path).startswith(f"{SEGMENT_PREFIX}{self.writer}-")])
+        path = os.path.join(self.directory, f"{SEGMENT_PREFIX}{self.writer}-{sequence:06d}.npz")
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, **columns)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        open(self.journal_path, 'w').close()
+        self._pending = []
+
+    def close(self):
+        self.flush()
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
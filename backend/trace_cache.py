@@ -0,0 +1,233 @@
+"""Content-addressed on-disk cache of generated benchmark traces.
+
+Each (generator, parameters, seed) combination is generated once, written
+as a memory-mapped .ctr trace under results/trace_cache/ and opened as a
+zero-copy view on every later call, in this process or any other, so any
+number of server workers share one page-cached copy of each trace.
+
+The cache is bounded: after a trace is published, the least recently
+opened traces are deleted until the total size fits `max_bytes`
+(TRACE_CACHE_MAX_BYTES, default 2 GiB; 0 disables eviction). A returned
+MappedTrace pins its file with a shared lock until it is closed or
+garbage-collected; the kernel keeps the count of pins across processes,
+and pinned traces are never evicted. Concurrent first requests for the
+same trace wait on a per-trace lock instead of all generating it. Lock
+files are never deleted (they are empty), so every process always locks
+the same inode for a given trace.
+"""
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+
+from backend import benchmark_programs
+from backend.trace_io import MappedTrace, open_mapped_trace, write_mapped_trace
+
+try:
+    import fcntl
+except ImportError:  # No advisory locks (Windows): no pinning either
+    fcntl = None
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    'TRACE_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'results', 'trace_cache'))
+DEFAULT_MAX_BYTES = int(os.environ.get('TRACE_CACHE_MAX_BYTES', 2 << 30))
+
+# Generators that can be cached, and which of them draw random numbers and
+# therefore only have a stable identity when a seed is given
+GENERATORS = {
+    'matrix_multiplication': benchmark_programs.matrix_multiplication,
+    'random_access': benchmark_programs.random_access,
+    'sequential_access': benchmark_programs.sequential_access,
+    'strided_access': benchmark_programs.strided_access,
+    'linked_list_traversal': benchmark_programs.linked_list_traversal,
+    'tiled_matrix_multiplication': benchmark_programs.tiled_matrix_multiplication,
+    'stencil_2d': benchmark_programs.stencil_2d,
+    'stencil_3d': benchmark_programs.stencil_3d,
+    'zipf_kv_lookup': benchmark_programs.zipf_kv_lookup,
+    'hash_probe': benchmark_programs.hash_probe,
+    'pointer_chase': benchmark_programs.pointer_chase,
+}
+RANDOMIZED = {'random_access', 'linked_list_traversal', 'zipf_kv_lookup', 'hash_probe',
+              'pointer_chase'}
+
+# Bump when a generator's output changes so stale entries are not reused
+FORMAT_VERSION = 2
+
+
+def _lock(f, exclusive):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+
+
+class TraceCache:
+    def __init__(self, root=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = os.path.abspath(root)
+        self.max_bytes = max_bytes
+
+    def key(self, generator, params):
+        """Content address of a trace: a hash of everything that defines it."""
+        spec = {'generator': generator, 'params': params,
+                'version': FORMAT_VERSION}
+        return hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.root, f"{key}.ctr")
+
+    def get(self, generator, seed=None, write_every=None, **params):
+        """Return the trace as a pinned MappedTrace, generating it on first use.
+
+        With `write_every`, every write_every-th access (from the first) is
+        a write and the mask is stored with the trace. Randomized
+        generators called without a seed are not reproducible, so they are
+        generated fresh every time and never cached.
+        """
+        if generator not in GENERATORS:
+            raise ValueError(f"Unknown trace generator: {generator}")
+        if seed is not None:
+            if generator not in RANDOMIZED:
+                raise ValueError(f"{generator} does not take a seed")
+            params = dict(params, seed=seed)
+        spec = dict(params, write_every=write_every) if write_every else params
+        if seed is None and generator in RANDOMIZED:
+            addresses, is_write = self._generate(generator, params, write_every)
+            return MappedTrace(None, addresses, is_write,
+                               {'generator': generator, 'params': spec})
+
+        path = self.path(self.key(generator, spec))
+        while True:
+            if not os.path.exists(path):
+                self._publish(path, generator, params, write_every, spec)
+            trace = self._attach(path)
+            if trace is not None:
+                return trace
+
+    @staticmethod
+    def _generate(generator, params, write_every):
+        addresses = np.asarray(GENERATORS[generator](**params), dtype=np.int64)
+        is_write = None
+        if write_every:
+            is_write = np.arange(len(addresses)) % write_every == 0
+        return addresses, is_write
+
+    def _publish(self, path, generator, params, write_every, spec):
+        """Generate and write a trace unless another process just did."""
+        os.makedirs(self.root, exist_ok=True)
+        with open(path[:-len('.ctr')] + '.lock', 'a') as lock:
+            _lock(lock, exclusive=True)
+            if os.path.exists(path):
+                return
+            addresses, is_write = self._generate(generator, params, write_every)
+            # Write to a temporary file and rename, so readers never see a
+            # partial trace
+            fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix='.tmp')
+            os.close(fd)
+            try:
+                write_mapped_trace(tmp_path, addresses, is_write,
+                                   meta={'generator': generator, 'params': spec})
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        self.evict(keep=path)
+
+    def _attach(self, path):
+        """Pin and open a published trace; None if it was evicted meanwhile."""
+        try:
+            pin = open(path, 'rb')
+        except FileNotFoundError:
+            return None
+        try:
+            _lock(pin, exclusive=False)
+            if os.fstat(pin.fileno()).st_nlink == 0:
+                pin.close()
+                return None
+            os.utime(path)  # Mark as recently used
+            trace = open_mapped_trace(path)
+        except BaseException:
+            pin.close()
+            raise
+        trace.pin = pin
+        return trace
+
+    def _entries(self):
+        if not os.path.isdir(self.root):
+            return []
+        entries = []
+        for name in os.listdir(self.root):
+            if name.endswith('.ctr'):
+                try:
+                    info = os.stat(os.path.join(self.root, name))
+                except FileNotFoundError:
+                    continue
+                entries.append((info.st_mtime_ns, info.st_size, os.path.join(self.root, name)))
+        return entries
+
+    def _remove(self, path):
+        """Delete a trace nobody has pinned; False if it is in use."""
+        try:
+            with open(path, 'rb') as f:
+                if fcntl is not None:
+                    try:
+                        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except BlockingIOError:
+                        return False
+                os.unlink(path)
+        except FileNotFoundError:
+            return True
+        except OSError:  # Still mapped on platforms that refuse to unlink it
+            return False
+        # The trace's .lock file stays: another process may hold or be about
+        # to take it, and a new file under the same name would not exclude it
+        return True
+
+    def evict(self, keep=None):
+        """Delete least recently used, unpinned traces until the cache fits
+        `max_bytes`. Returns the number of traces deleted."""
+        if not self.max_bytes:
+            return 0
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if path != keep and self._remove(path):
+                total -= size
+                removed += 1
+        return removed
+
+    def info(self):
+        entries = self._entries()
+        return {'entries': len(entries), 'bytes': sum(size for _, size, _ in entries),
+                'maxBytes': self.max_bytes, 'directory': self.root}
+
+    def clear(self):
+        """Delete every cached trace (open views stay readable). Lock files
+        are kept, for the same reason as in _remove()."""
+        if not os.path.isdir(self.root):
+            return
+        for name in os.listdir(self.root):
+            if name.endswith('.ctr'):
+                try:
+                    os.unlink(os.path.join(self.root, name))
+                except FileNotFoundError:
+                    pass
+
+
+_default_cache = None
+
+
+def default_cache():
+    """The TraceCache on the shared default cache directory."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = TraceCache()
+    return _default_cache
+
+
+def cached_trace(generator, seed=None, **params):
+    """TraceCache.get() on the shared default cache directory."""
+    return default_cache().get(generator, seed=seed, **params)
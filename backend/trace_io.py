@@ -0,0 +1,245 @@
+"""Streaming readers and writers for captured address traces.
+
+Readers never load a whole trace: they yield (addresses, is_write) NumPy
+chunks of at most `chunk_size` accesses, so memory stays flat however long
+the file is. Supported formats:
+
+- Dinero (.din, .dinero): one "<label> <hex address> [size]" per line with
+  label 0 = read, 1 = write, 2 = instruction fetch (treated as a read).
+- CSV (.csv): "address[,is_write]" per line, optional header row, decimal
+  or 0x-prefixed hex addresses.
+- Binary (.bin): packed little-endian records of a uint64 address and a
+  uint8 write flag (see RECORD_DTYPE).
+- Mapped (.ctr): a small header followed by a contiguous address array and
+  an optional write-flag array, opened with numpy.memmap as a zero-copy
+  view (see write_mapped_trace / open_mapped_trace).
+"""
+import itertools
+import json
+import os
+import struct
+
+import numpy as np
+
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+RECORD_DTYPE = np.dtype([('address', '<u8'), ('is_write', 'u1')])
+
+FORMATS = {
+    '.din': 'dinero',
+    '.dinero': 'dinero',
+    '.csv': 'csv',
+    '.bin': 'binary',
+    '.ctr': 'mapped',
+}
+
+# Mapped trace header: magic, version, address width (bytes), write flags
+# present, access count, metadata length, address offset, flags offset.
+# The JSON metadata (generator, parameters, seed) follows the header and the
+# arrays start at ALIGNMENT-byte boundaries.
+MAPPED_MAGIC = b'CTRACE\0\0'
+MAPPED_VERSION = 1
+MAPPED_HEADER = struct.Struct('<8sIIIQIQQ')
+ALIGNMENT = 64
+
+
+def _chunk_arrays(addresses, writes):
+    return (np.array(addresses, dtype=np.int64), np.array(writes, dtype=bool))
+
+
+def _parse_address(text):
+    return int(text, 0) if text[:2].lower() == '0x' else int(text)
+
+
+def read_dinero(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield chunks from a Dinero "din" text trace."""
+    with open(path) as f:
+        while True:
+            lines = list(itertools.islice(f, chunk_size))
+            if not lines:
+                return
+            addresses = []
+            writes = []
+            for line in lines:
+                fields = line.split()
+                if len(fields) < 2 or fields[0].startswith('#'):
+                    continue
+                addresses.append(int(fields[1], 16))
+                writes.append(fields[0] == '1')
+            if addresses:
+                yield _chunk_arrays(addresses, writes)
+
+
+def read_csv_trace(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield chunks from an "address[,is_write]" CSV trace."""
+    with open(path) as f:
+        first = True
+        while True:
+            lines = list(itertools.islice(f, chunk_size))
+            if not lines:
+                return
+            addresses = []
+            writes = []
+            for line in lines:
+                fields = line.strip().split(',')
+                if not fields[0]:
+                    continue
+                try:
+                    address = _parse_address(fields[0].strip())
+                except ValueError:
+                    if first:  # Header row
+                        first = False
+                        continue
+                    raise
+                first = False
+                addresses.append(address)
+                flag = fields[1].strip().lower() if len(fields) > 1 else ''
+                writes.append(flag in ('1', 'w', 'true', 'write'))
+            if addresses:
+                yield _chunk_arrays(addresses, writes)
+
+
+def read_binary_trace(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield chunks from a packed binary trace."""
+    with open(path, 'rb') as f:
+        while True:
+            records = np.fromfile(f, dtype=RECORD_DTYPE, count=chunk_size)
+            if len(records) == 0:
+                return
+            yield (records['address'].astype(np.int64),
+                   records['is_write'].astype(bool))
+
+
+def write_binary_trace(path, chunks):
+    """Write (addresses, is_write) chunks to a packed binary trace.
+
+    `is_write` may be None for an all-read chunk. Returns the number of
+    records written.
+    """
+    count = 0
+    with open(path, 'wb') as f:
+        for addresses, is_write in chunks:
+            records = np.empty(len(addresses), dtype=RECORD_DTYPE)
+            records['address'] = addresses
+            records['is_write'] = 0 if is_write is None else is_write
+            records.tofile(f)
+            count += len(records)
+    return count
+
+
+class MappedTrace:
+    """A .ctr trace opened as read-only memory maps.
+
+    `addresses` and `is_write` (None for an all-read trace) are views of the
+    file, so opening costs no parsing or copying and every process mapping
+    the same file shares one page-cached copy.
+    """
+
+    def __init__(self, path, addresses, is_write, meta):
+        self.path = path
+        self.addresses = addresses
+        self.is_write = is_write
+        self.meta = meta
+        self.pin = None  # Open file holding a shared lock (see TraceCache)
+
+    def close(self):
+        """Release the pin; the arrays stay readable until dropped."""
+        if self.pin is not None:
+            self.pin.close()
+            self.pin = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return len(self.addresses)
+
+    def chunks(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        for start in range(0, len(self.addresses), chunk_size):
+            end = start + chunk_size
+            writes = None if self.is_write is None else self.is_write[start:end]
+            yield self.addresses[start:end], writes
+
+
+def _align(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def write_mapped_trace(path, addresses, is_write=None, meta=None):
+    """Write a .ctr trace.
+
+    Addresses are stored 4 bytes wide when they fit, otherwise 8. `meta` is
+    a JSON-serializable dict kept in the header, typically the generator
+    name, its parameters and seed.
+    """
+    addresses = np.asarray(addresses)
+    width = 4 if len(addresses) == 0 or (addresses.min() >= 0 and addresses.max() < 1 << 32) else 8
+    meta_bytes = json.dumps(meta or {}, sort_keys=True).encode()
+    address_offset = _align(MAPPED_HEADER.size + len(meta_bytes))
+    flags_offset = _align(address_offset + width * len(addresses)) if is_write is not None else 0
+
+    with open(path, 'wb') as f:
+        f.write(MAPPED_HEADER.pack(MAPPED_MAGIC, MAPPED_VERSION, width,
+                                   is_write is not None, len(addresses),
+                                   len(meta_bytes), address_offset, flags_offset))
+        f.write(meta_bytes)
+        f.seek(address_offset)
+        addresses.astype(f'<u{width}', copy=False).tofile(f)
+        if is_write is not None:
+            f.seek(flags_offset)
+            np.asarray(is_write, dtype=np.uint8).tofile(f)
+
+
+def open_mapped_trace(path):
+    """Open a .ctr trace as a MappedTrace of read-only memory maps."""
+    with open(path, 'rb') as f:
+        header = f.read(MAPPED_HEADER.size)
+        if len(header) < MAPPED_HEADER.size:
+            raise ValueError(f"'{path}' is not a mapped trace (truncated header)")
+        (magic, version, width, has_writes, count, meta_len,
+         address_offset, flags_offset) = MAPPED_HEADER.unpack(header)
+        if magic != MAPPED_MAGIC:
+            raise ValueError(f"'{path}' is not a mapped trace")
+        if version != MAPPED_VERSION:
+            raise ValueError(f"Unsupported mapped trace version {version} in '{path}'")
+        meta = json.loads(f.read(meta_len) or b'{}')
+
+    if count == 0:
+        addresses = np.zeros(0, dtype=f'<u{width}')
+        is_write = np.zeros(0, dtype=bool) if has_writes else None
+    else:
+        addresses = np.memmap(path, dtype=f'<u{width}', mode='r',
+                              offset=address_offset, shape=(count,))
+        is_write = (np.memmap(path, dtype=np.bool_, mode='r',
+                              offset=flags_offset, shape=(count,))
+                    if has_writes else None)
+    return MappedTrace(path, addresses, is_write, meta)
+
+
+def read_mapped_trace(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield chunks from a .ctr trace."""
+    return open_mapped_trace(path).chunks(chunk_size)
+
+
+READERS = {
+    'dinero': read_dinero,
+    'csv': read_csv_trace,
+    'binary': read_binary_trace,
+    'mapped': read_mapped_trace,
+}
+
+
+def trace_format(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in FORMATS:
+        raise ValueError(f"Unknown trace format for '{path}' "
+                         f"(expected one of {', '.join(sorted(FORMATS))})")
+    return FORMATS[ext]
+
+
+def open_trace(path, fmt=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Return a chunk iterator for a trace file, picking the reader by extension."""
+    return READERS[fmt or trace_format(path)](path, chunk_size)
@@ -7,6 +7,7 @@ let currentConfig = {
     replacementPolicy: 'LRU',
     benchmark: 'matrix_multiplication',
     enableAdaptive: false,
+    sampling: null,
     matrixSize: 32
 };
 
@@ -66,6 +67,11 @@ function initializeEventListeners() {
         currentConfig.enableAdaptive = e.target.checked;
     });
 
+    // Sampling checkbox
+    document.getElementById('enableSampling').addEventListener('change', function (e) {
+        currentConfig.sampling = e.target.checked ? { setFraction: 0.125 } : null;
+    });
+
     // Matrix size change
     document.getElementById('matrixSize').addEventListener('input', function (e) {
         currentConfig.matrixSize = parseInt(e.target.value);
@@ -133,7 +139,7 @@ function initializeCharts() {
                     max: 100,
                     title: {
                         display: true,
-                        text: 'Number of Misses'
+                        text: 'Rate per Window (%)'
                     }
                 }
             }
@@ -379,15 +385,72 @@ function updateResults(results) {
     document.getElementById('missRateChange').textContent = results.missRateChange;
     document.getElementById('amatChange').textContent = results.amatChange;
     document.getElementById('trafficChange').textContent = results.trafficChange;
+    if (results.sampling && results.sampling.missRateCI) {
+        const [low, high] = results.sampling.missRateCI;
+        document.getElementById('missRateChange').textContent =
+            `${(low * 100).toFixed(1)}-${(high * 100).toFixed(1)}% (95% CI)`;
+    }
 
     // Update charts with new data
     updateCharts(results);
+    if (results.profile) {
+        renderHeatmap(results.profile);
+    }
+}
+
+// Draw per-set misses as a heatmap and list the hottest address regions
+function renderHeatmap(profile) {
+    const canvas = document.getElementById('setHeatmap');
+    const misses = profile.sets.misses;
+    const accesses = profile.sets.accesses;
+    const columns = Math.min(64, misses.length);
+    const rows = Math.ceil(misses.length / columns);
+    canvas.width = canvas.clientWidth || 600;
+    canvas.height = Math.max(40, Math.min(240, rows * 12));
+    const cellWidth = canvas.width / columns;
+    const cellHeight = canvas.height / rows;
+    const peak = Math.max(1, ...misses);
+
+    const ctx = canvas.getContext('2d');
+    ctx.clearRect(0, 0, canvas.width, canvas.height);
+    misses.forEach((count, cell) => {
+        // White (no misses) to red (the busiest cell)
+        const heat = count / peak;
+        const shade = Math.round(255 * (1 - heat));
+        ctx.fillStyle = accesses[cell] ? `rgb(220, ${shade}, ${shade})` : '#f1f3f5';
+        ctx.fillRect((cell % columns) * cellWidth, Math.floor(cell / columns) * cellHeight,
+            cellWidth - 1, cellHeight - 1);
+    });
+
+    const perCell = profile.setsPerCell;
+    canvas.onmousemove = function (e) {
+        const rect = canvas.getBoundingClientRect();
+        const cell = Math.floor((e.clientY - rect.top) / cellHeight) * columns
+            + Math.floor((e.clientX - rect.left) / cellWidth);
+        if (cell < 0 || cell >= misses.length) return;
+        const sets = perCell === 1 ? `Set ${cell}`
+            : `Sets ${cell * perCell}-${Math.min(profile.numSets, (cell + 1) * perCell) - 1}`;
+        document.getElementById('heatmapHover').textContent =
+            `${sets}: ${accesses[cell].toLocaleString()} accesses, ${misses[cell].toLocaleString()} misses, `
+            + `${profile.sets.evictions[cell].toLocaleString()} evictions`;
+    };
+
+    document.getElementById('heatmapSummary').textContent =
+        `${profile.activeSets} of ${profile.numSets} sets used, busiest set has `
+        + `${profile.missImbalance.toFixed(1)}x its share of misses`;
+    document.getElementById('hotRegionsBody').innerHTML = profile.hotRegions.slice(0, 8).map(region => `
+        <tr>
+            <td><code>0x${region.address.toString(16)}</code></td>
+            <td>${region.misses.toLocaleString()}</td>
+            <td>${(region.missRate * 100).toFixed(1)}%</td>
+        </tr>`).join('');
 }
 
 // Update Charts
 function updateCharts(results) {
     // Update performance chart
     if (charts.performance) {
+        charts.performance.data.labels = results.timelineData.map(d => String(d.time));
         charts.performance.data.datasets[0].data = results.timelineData.map(d => d.hitRate);
         charts.performance.data.datasets[1].data = results.timelineData.map(d => d.missRate);
         charts.performance.update();
@@ -456,6 +519,7 @@ function resetConfiguration() {
         replacementPolicy: 'LRU',
         benchmark: 'matrix_multiplication',
         enableAdaptive: false,
+        sampling: null,
         matrixSize: 32
     };
 
@@ -468,6 +532,7 @@ function resetConfiguration() {
     document.getElementById('replacementPolicy').value = currentConfig.replacementPolicy;
     document.getElementById('benchmark').value = currentConfig.benchmark;
     document.getElementById('enableAdaptive').checked = currentConfig.enableAdaptive;
+    document.getElementById('enableSampling').checked = false;
     document.getElementById('matrixSize').value = currentConfig.matrixSize;
 
     showToast('Configuration reset to defaults', 'info');
@@ -603,13 +668,15 @@ async function runSimulation() {
             replacementPolicy: document.getElementById('replacementPolicy').value,
             benchmark: document.getElementById('benchmark').value,
             enableAdaptive: document.getElementById('enableAdaptive').checked,
-            matrixSize: parseInt(document.getElementById('matrixSize').value || 32)
+            matrixSize: parseInt(document.getElementById('matrixSize').value || 32),
+            sampling: currentConfig.sampling,
+            profile: true
         };
 
         console.log('Sending config:', config); // Debug log
 
-        // Make API call to backend (relative path so frontend and backend can run together)
-        const response = await fetch('/api/simulate', {
+        // Submit the simulation as a background job (relative path so frontend and backend can run together)
+        const response = await fetch('/api/jobs', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
@@ -621,11 +688,13 @@ async function runSimulation() {
             throw new Error(`HTTP error! status: ${response.status}`);
         }
 
-        const results = await response.json();
+        const job = await response.json();
+        const results = await waitForJob(job.jobId);
         console.log('Received results:', results); // Debug log
 
         // Update UI with results
         updateResults(results);
+        updateComparison({ ...config, profile: false });
 
         // Show success message
         showToast('Simulation completed successfully!', 'success');
@@ -655,6 +724,7 @@ async function runSimulation() {
     } finally {
         // Hide loading spinner
         document.getElementById('loadingSpinner').style.display = 'none';
+        document.getElementById('simProgressText').textContent = 'Running cache simulation...';
         document.getElementById('resultsDashboard').style.opacity = '1';
 
         // Re-enable run button
@@ -663,6 +733,114 @@ async function runSimulation() {
     }
 }
 
+// Fill the comparison table with the current config at every organization,
+// simulated together by one batch request over a single shared trace
+async function updateComparison(config) {
+    const lines = config.cacheSize / config.blockSize;
+    const ways = [1, 2, 4, lines].filter((a, i, all) => a <= lines && all.indexOf(a) === i);
+    const { benchmark, matrixSize, ...base } = config;
+    const body = document.getElementById('comparisonBody');
+
+    try {
+        const response = await fetch('/api/batch', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({
+                workload: { benchmark, matrixSize },
+                base: { ...base, enableAdaptive: false },
+                grid: { associativity: ways }
+            })
+        });
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+
+        body.innerHTML = '';
+        const rows = ways.map(() => body.insertRow());
+        for await (const event of readEvents(response)) {
+            if (event.index === undefined) {
+                if (event.error) throw new Error(event.error);
+                continue;
+            }
+            const assoc = ways[event.index];
+            const name = assoc === 1 ? 'Direct-Mapped'
+                : assoc === lines ? 'Fully Associative' : `${assoc}-Way Set Associative`;
+            const row = rows[event.index];
+            if (event.error) {
+                row.innerHTML = `<td colspan="8" class="text-danger">${event.error}</td>`;
+                continue;
+            }
+            const r = event.result;
+            row.innerHTML = `
+                <td>${name}</td>
+                <td>${assoc}-way</td>
+                <td class="text-success">${r.hitRate}</td>
+                <td class="text-danger">${r.missRate}</td>
+                <td>${parseFloat(r.amat).toFixed(2)}</td>
+                <td>${r.memoryTraffic.replace(' blocks', '')}</td>
+                <td>${r.cycles.toLocaleString()}</td>
+                <td>${r.ces}</td>`;
+        }
+        body.querySelectorAll('tr').forEach(row => row.classList.remove('table-success'));
+        highlightBestCES();
+    } catch (error) {
+        console.error('Comparison error:', error);
+    }
+}
+
+// Parse a newline-delimited JSON response as it streams in
+async function* readEvents(response) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffered = '';
+    while (true) {
+        const { done, value } = await reader.read();
+        buffered += decoder.decode(value || new Uint8Array(), { stream: !done });
+        const lines = buffered.split('\n');
+        buffered = lines.pop();
+        for (const line of lines) {
+            if (line.trim()) yield JSON.parse(line);
+        }
+        if (done) break;
+    }
+    if (buffered.trim()) yield JSON.parse(buffered);
+}
+
+// Follow a simulation job's progress events until it finishes
+function waitForJob(jobId) {
+    return new Promise((resolve, reject) => {
+        const progressText = document.getElementById('simProgressText');
+        const events = new EventSource(`/api/jobs/${jobId}/events`);
+
+        events.addEventListener('progress', function (e) {
+            const progress = JSON.parse(e.data).progress;
+            if (progress.fraction !== null) {
+                progressText.textContent = `Running cache simulation... ${Math.round(progress.fraction * 100)}%`;
+            } else {
+                progressText.textContent = `Running cache simulation... ${progress.done.toLocaleString()} accesses`;
+            }
+        });
+        events.addEventListener('done', function (e) {
+            events.close();
+            resolve(JSON.parse(e.data).result);
+        });
+        events.addEventListener('failed', function (e) {
+            events.close();
+            reject(new Error(JSON.parse(e.data).error));
+        });
+        events.addEventListener('cancelled', function () {
+            events.close();
+            reject(new Error('simulation was cancelled'));
+        });
+        events.onerror = function () {
+            // The server closes the stream after the final event
+            if (events.readyState === EventSource.CLOSED) {
+                reject(new Error('lost connection to simulation job'));
+            }
+        };
+    });
+}
+
 // Helper functions for fallback data
 function generateTimelineData() {
     const data = [];
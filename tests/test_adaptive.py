@@ -0,0 +1,21 @@
+import numpy as np
+import pytest
+
+from backend.adaptive_policy import AdaptiveCache
+from backend.cache_simulator import CacheSimulator, WritePolicy
+
+
+def test_interval_after_reset_stats():
+    sim = CacheSimulator(4096, 32, 4, WritePolicy.WRITE_BACK, 'LRU', seed=0)
+    adaptive = AdaptiveCache({}, adaptation_interval=1000)
+    addresses = np.random.default_rng(0).integers(0, 1 << 16, 5000)
+
+    adaptive.access_batch(sim, addresses[:1500])
+    sim.reset_stats()  # Mid-interval, as a warm-up does
+    adaptive.access_batch(sim, addresses[1500:])
+
+    assert len(adaptive.miss_rate_history) == 5
+    assert all(0 <= rate <= 1 for rate in adaptive.miss_rate_history)
+    # The interval spanning the reset only counts the 500 accesses after it
+    history = adaptive.miss_rate_history
+    assert history[1] * 500 + sum(history[2:]) * 1000 == pytest.approx(sim.misses)
@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+from backend import app as server
+from backend import trace_cache
+from backend.result_cache import ResultCache
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(server, 'result_cache', ResultCache(max_entries=16))
+    monkeypatch.setattr(trace_cache, '_default_cache', trace_cache.TraceCache(str(tmp_path)))
+    return server.app.test_client()
+
+
+def simulate(client, config):
+    response = client.post('/api/simulate', json=config)
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def batch(client, body):
+    response = client.post('/api/batch', json=body)
+    assert response.status_code == 200
+    events = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    return {event['index']: event['result'] for event in events if 'result' in event}
+
+
+def test_mixed_workload_batch(client):
+    configs = [{'benchmark': 'sequential'}, {'benchmark': 'random'},
+               {'benchmark': 'random', 'warmup': 1000}, {'benchmark': 'sequential', 'seed': 3}]
+    results = batch(client, {'configs': configs})
+    assert sorted(results) == list(range(len(configs)))
+
+    # Each config ran on its own workload and warm-up...
+    server.result_cache.clear()
+    expected = [simulate(client, config) for config in configs]
+    for index, result in results.items():
+        assert dict(result, config=None) == dict(expected[index], config=None)
+    assert results[0]['hitRate'] != results[1]['hitRate']
+    assert results[1]['cycles'] != results[2]['cycles']
+
+    # ...and was cached under its own key
+    server.result_cache.clear()
+    batch(client, {'configs': configs})
+    for index, config in enumerate(configs):
+        assert simulate(client, config)['hitRate'] == expected[index]['hitRate']
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from backend.cache_simulator import CacheSimulator, WritePolicy
+from backend.hierarchy import CacheHierarchy, Inclusion
+
+
+def build(batch_size=None):
+    levels = [CacheSimulator(1024, 32, 2, WritePolicy.WRITE_BACK, 'LRU'),
+              CacheSimulator(4096, 64, 4, WritePolicy.WRITE_BACK, 'LRU'),
+              CacheSimulator(16384, 64, 4, WritePolicy.WRITE_BACK, 'FIFO')]
+    return CacheHierarchy(levels, Inclusion.INCLUSIVE, batch_size=batch_size)
+
+
+def trace():
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 1 << 15, 5000), rng.random(5000) < 0.3
+
+
+def covered(hierarchy):
+    """Whether every block of each level is held by every level below it."""
+    for k, upper in enumerate(hierarchy.levels):
+        for lower in hierarchy.levels[k + 1:]:
+            ratio = lower.block_size // upper.block_size
+            if any(block // ratio not in lower.state.resident for block in upper.state.resident):
+                return False
+    return True
+
+
+@pytest.mark.parametrize('batch_size', [1, 8, 64, None])
+def test_inclusive_results_do_not_depend_on_batch_size(batch_size):
+    addresses, is_write = trace()
+    reference = build(batch_size=1)
+    for address, write in zip(addresses.tolist(), is_write.tolist()):
+        reference.access(address, write)
+        assert covered(reference)
+
+    hierarchy = build(batch_size)
+    hierarchy.access_batch(addresses, is_write)
+    stats = hierarchy.get_stats()
+    assert stats['Back-Invalidations'] > 0
+    assert stats == reference.get_stats()
+    assert covered(hierarchy)
+
+
+@pytest.mark.parametrize('policy', ['FIFO', 'LRU', 'LFU'])
+def test_invalidated_line_is_refilled_first(policy):
+    sim = CacheSimulator(128, 32, 4, WritePolicy.WRITE_BACK, policy)  # One 4-way set
+    for block in range(4):
+        sim.access(block * 32)
+    sim.invalidate(2)
+    sim.access(4 * 32)
+    assert sorted(sim.state.resident) == [0, 1, 3, 4]
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from backend.cache_simulator import CacheSimulator, WritePolicy
+from backend.replacement import POLICIES, DuelingPolicy
+
+SET_LOCAL = sorted(name for name, cls in POLICIES.items()
+                   if cls.partitionable and name not in ('RANDOM', 'BRRIP'))
+
+
+def build(policy, **kwargs):
+    return CacheSimulator(cache_size=8192, block_size=32, associativity=4,
+                          write_policy=WritePolicy.WRITE_BACK, replacement_policy=policy,
+                          seed=3, timeline_window=1000, classify_misses=True, **kwargs)
+
+
+def trace():
+    rng = np.random.default_rng(1)
+    addresses = (rng.zipf(1.3, 20001) % (1 << 14)) * 8
+    return addresses, rng.random(len(addresses)) < 0.3
+
+
+@pytest.mark.parametrize('policy', SET_LOCAL)
+def test_partitioned_run_matches_serial(policy):
+    addresses, is_write = trace()
+    serial = build(policy)
+    serial.prepare(addresses)
+    expected = serial.access_batch(addresses, is_write)
+
+    parallel = build(policy)
+    outcomes = parallel.access_parallel(addresses, is_write, processes=2, partitions=3)
+    assert (outcomes == expected).all()
+    assert parallel.get_stats() == serial.get_stats()
+    assert parallel.get_timeline() == serial.get_timeline()
+    assert parallel.state.resident == serial.state.resident
+    assert parallel.state.dirty == serial.state.dirty
+
+
+def test_randomized_policies_are_reproducible():
+    addresses, is_write = trace()
+    runs = [build('RANDOM').access_parallel(addresses, is_write, processes=1, partitions=4)
+            for _ in range(2)]
+    assert (runs[0] == runs[1]).all()
+
+
+def test_unregistered_policy_is_rejected():
+    class Unregistered(POLICIES['LRU']):
+        pass
+
+    with pytest.raises(ValueError, match="not registered"):
+        build(Unregistered).access_parallel(*trace(), processes=1)
+
+
+def test_cross_set_policy_is_rejected():
+    with pytest.raises(ValueError, match="cannot be partitioned"):
+        build(DuelingPolicy).access_parallel(*trace(), processes=1)
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from backend.cache_simulator import CacheSimulator, WritePolicy, encode_runs
+from backend.replacement import POLICIES
+
+
+def trace():
+    """Sequential sweeps, repeated hot blocks and random accesses, with runs
+    long enough for access_batch() to take the run-collapsing path."""
+    rng = np.random.default_rng(3)
+    sequential = np.arange(0, 40000, 4)
+    hot = (rng.zipf(1.3, 4000) % 2048) * 4
+    addresses = np.concatenate([sequential, np.repeat(hot, 3), sequential[::-1]])
+    return addresses, rng.random(len(addresses)) < 0.3
+
+
+def build(policy, write_policy):
+    return CacheSimulator(cache_size=4096, block_size=32, associativity=4,
+                          write_policy=write_policy, replacement_policy=policy, seed=1,
+                          classify_misses=True)
+
+
+def assert_same(sim, reference):
+    assert sim.get_stats() == reference.get_stats()
+    assert sim.state.resident == reference.state.resident
+    assert sim.state.dirty == reference.state.dirty
+
+
+@pytest.mark.parametrize('write_policy', list(WritePolicy))
+@pytest.mark.parametrize('policy', sorted(POLICIES))
+def test_collapsed_runs_match_scalar_replay(policy, write_policy):
+    addresses, is_write = trace()
+    scalar = build(policy, write_policy)
+    scalar.prepare(addresses)
+    for address, write in zip(addresses.tolist(), is_write.tolist()):
+        scalar.access(address, write)
+
+    batch = build(policy, write_policy)
+    batch.prepare(addresses)
+    batch.access_batch(addresses, is_write)
+    assert_same(batch, scalar)
+
+    runs = build(policy, write_policy)
+    runs.prepare(addresses)
+    runs.access_runs(*encode_runs(addresses, 32, is_write))
+    assert_same(runs, scalar)
+
+    # Replacement metadata must match too, not just the contents
+    if not runs.policy.offline:
+        extra = np.random.default_rng(4).integers(0, 1 << 14, 3000)
+        for sim in (scalar, runs):
+            sim.access_batch(extra)
+        assert_same(runs, scalar)
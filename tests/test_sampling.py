@@ -0,0 +1,51 @@
+import numpy as np
+
+from backend.cache_simulator import CacheSimulator, ReplacementPolicy, WritePolicy
+
+SAMPLING = {'period': 1000, 'window': 200, 'warmup': 300}
+
+
+def build():
+    return CacheSimulator(4096, 32, 4, WritePolicy.WRITE_BACK, ReplacementPolicy.OPT,
+                          seed=0, sampling=dict(SAMPLING))
+
+
+def test_warmup_keeps_sampling_phase_with_opt():
+    rng = np.random.default_rng(0)
+    addresses = rng.integers(0, 1 << 15, 10000) * 4
+    is_write = rng.random(len(addresses)) < 0.3
+    warmup = 1234
+
+    reference = build()
+    reference.prepare(addresses)
+    reference.access_batch(addresses, is_write)
+
+    sim = build()
+    sim.prepare(addresses)
+    sim.access_batch(addresses[:warmup], is_write[:warmup])
+    sim.reset_stats()
+    sim.access_batch(addresses[warmup:], is_write[warmup:])
+
+    # The warm-up reset changes the statistics, not which accesses are simulated
+    assert list(sim.state.tags) == list(reference.state.tags)
+    assert sim.state.valid == reference.state.valid
+    assert sim.state.dirty == reference.state.dirty
+    assert sim.sampler.position == len(addresses)
+    stats = sim.get_stats()
+    assert stats['Accesses'] == len(addresses) - warmup
+    # Only windows after the warm-up count, in the same phase as the reference
+    phase = np.arange(len(addresses)) % SAMPLING['period']
+    measured = phase >= SAMPLING['period'] - SAMPLING['window']
+    assert stats['Sampled Accesses'] == int(measured[warmup:].sum())
+
+
+def test_sampled_timeline_windows_sit_at_trace_positions():
+    sim = CacheSimulator(4096, 32, 4, WritePolicy.WRITE_BACK, ReplacementPolicy.LRU, seed=0,
+                         sampling=dict(SAMPLING), timeline_window=100)
+    addresses = np.random.default_rng(1).integers(0, 1 << 15, 5000) * 4
+    for chunk in np.array_split(addresses, 7):
+        sim.access_batch(chunk)
+
+    starts = [window['start'] for window in sim.get_timeline()]
+    assert starts == [period + offset for period in range(0, 5000, 1000) for offset in (800, 900)]
+    assert all(window['accesses'] == 100 for window in sim.get_timeline())
@@ -0,0 +1,20 @@
+import os
+
+from backend.trace_cache import TraceCache
+
+
+def test_eviction_keeps_lock_files(tmp_path):
+    cache = TraceCache(str(tmp_path), max_bytes=1)
+    first = cache.get('sequential_access', n=1000)
+    lock = first.path[:-len('.ctr')] + '.lock'
+    lock_inode = os.stat(lock).st_ino
+    first.close()
+
+    cache.get('sequential_access', n=2000).close()  # Evicts the first trace
+    assert not os.path.exists(first.path)
+    assert os.stat(lock).st_ino == lock_inode
+
+    again = cache.get('sequential_access', n=1000)
+    assert list(again.addresses[:3]) == [0, 1, 2]
+    assert os.stat(lock).st_ino == lock_inode
+    again.close()